@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: maas_metrics
+author:
+  - Polona Mihalič (@PolonaM)
+short_description: Summarizes MAAS requests per host and per module.
+description:
+  - Aggregates the C(maas_metrics) returned by the modules of this collection
+    when their I(cluster_instance.collect_metrics) option is enabled.
+  - At the end of each play, the number of requests, bytes sent and received
+    (compressed and uncompressed) and the time spent waiting for MAAS in that
+    play are displayed per host and per module.
+version_added: 1.0.0
+type: aggregate
+requirements:
+  - Enable the plugin with C(callbacks_enabled = maas.maas.maas_metrics) in
+    the C([defaults]) section of C(ansible.cfg).
+"""
+
+from collections import defaultdict
+
+from ansible.plugins.callback import CallbackBase
+
+TOTALS = (
+    "requests",
+    "bytes_sent",
+    "bytes_received",
+    "bytes_uncompressed",
+    "time",
+)
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "maas.maas.maas_metrics"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.play = None
+        self._reset()
+
+    def _reset(self):
+        self.hosts = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+        self.modules = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+
+    def _add(self, host, module, totals):
+        for key in TOTALS:
+            self.hosts[host][key] += totals.get(key, 0)
+            self.modules[module][key] += totals.get(key, 0)
+
+    def _record(self, result):
+        # Loops return the result of each item under the results key.
+        task_results = [result._result] + list(
+            result._result.get("results") or []
+        )
+        module = getattr(result._task, "resolved_action", None)
+        module = module or result._task.action
+        for task_result in task_results:
+            if not isinstance(task_result, dict):
+                continue
+            metrics = task_result.get("maas_metrics")
+            if metrics:
+                self._add(result._host.get_name(), module, metrics["totals"])
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def _display_totals(self, title, totals):
+        self._display.banner(title)
+        for name in sorted(totals):
+            self._display.display(
+                "{0}: {1} requests, {2} bytes sent, {3} bytes received "
+                "({4} uncompressed), {5:.3f} s".format(
+                    name,
+                    totals[name]["requests"],
+                    totals[name]["bytes_sent"],
+                    totals[name]["bytes_received"],
+                    totals[name]["bytes_uncompressed"],
+                    totals[name]["time"],
+                )
+            )
+
+    def _display_play(self):
+        # A play ends when the next one starts or the playbook ends.
+        if self.hosts:
+            suffix = " [{0}]".format(self.play) if self.play else ""
+            self._display_totals("MAAS METRICS PER HOST" + suffix, self.hosts)
+            self._display_totals(
+                "MAAS METRICS PER MODULE" + suffix, self.modules
+            )
+        self._reset()
+
+    def v2_playbook_on_play_start(self, play):
+        self._display_play()
+        self.play = play.get_name().strip()
+
+    def v2_playbook_on_stats(self, stats):
+        self._display_play()
@@ -15,6 +15,13 @@ options:
   cluster_instance:
     description:
       - Canonical MAAS instance information.
+      - Required, unless the task uses the C(ansible.netcommon.httpapi)
+        connection with the C(maas.maas.maas) httpapi plugin, which then
+        sends the requests.
+      - With the httpapi plugin, the options of the plugin control how
+        requests are sent. Setting I(pool_maxsize), I(pool_idle_timeout),
+        I(cache_dir), I(cache_max_size), I(retry) or I(rate_limit) to
+        anything other than their defaults fails the task.
     type: dict
     suboptions:
       host:
@@ -23,27 +30,163 @@ options:
           - If not set, the value of the C(MAAS_HOST) environment
             variable will be used.
           - For example "http://localhost:5240/MAAS".
-        required: true
+          - Required, unless the task uses the C(maas.maas.maas) httpapi
+            plugin.
         type: str
       token_key:
         description:
           - Token key used for authentication.
           - If not set, the value of the C(MAAS_TOKEN_KEY) environment
             variable will be used.
-        required: true
+          - Required if I(host) is set.
         type: str
       token_secret:
         description:
           - Token secret used for authentication.
           - If not set, the value of the C(MAAS_TOKEN_SECRET) environment
             variable will be used.
-        required: true
+          - Required if I(host) is set.
         type: str
       customer_key:
         description:
           - Client secret used for authentication.
           - If not set, the value of the C(MAAS_CUSTOMER_KEY) environment
             variable will be used.
-        required: true
+          - Required if I(host) is set.
         type: str
+      pool_maxsize:
+        description:
+          - Maximum number of idle persistent connections kept open to the
+            MAAS instance and reused across the requests of a single task.
+          - Set to C(0) to open a new connection for every request.
+        type: int
+        default: 10
+      pool_idle_timeout:
+        description:
+          - Time in seconds after which an idle persistent connection is
+            closed instead of being reused.
+        type: int
+        default: 30
+      collect_metrics:
+        description:
+          - If set to C(true), every request sent to MAAS is traced and the
+            module returns the traces and their totals under the
+            C(maas_metrics) key.
+          - A trace contains the method, path, response status, bytes sent
+            and received, the size of the response after decompression, time
+            to the first byte of the response and the total time of the
+            request, in seconds.
+          - Enable the C(maas.maas.maas_metrics) callback plugin for
+            aggregating the metrics of a play.
+        type: bool
+        default: false
+      cache_dir:
+        description:
+          - Directory in which responses to GET requests are cached.
+          - Cached responses are revalidated with MAAS on every request using
+            the C(If-None-Match) and C(If-Modified-Since) headers. MAAS only
+            sends the content again if it changed, which saves downloading
+            large collections, like the machine list, in every task.
+          - Only responses with an C(ETag) or C(Last-Modified) header are
+            cached. Entries are kept per URL and per user.
+          - If not set, the value of the C(MAAS_CACHE_DIR) environment
+            variable will be used. If neither is set, responses are not
+            cached.
+        type: path
+      cache_max_size:
+        description:
+          - Maximum size of the I(cache_dir) directory in MiB.
+          - When the limit is exceeded, the least recently used responses are
+            removed.
+        type: int
+        default: 100
+      retry:
+        description:
+          - Controls how requests that fail for transient reasons are sent to
+            MAAS again, for example while a region controller fails over or
+            while a machine is locked by another operation.
+          - Requests that could not be sent or whose response was lost, and
+            requests answered with one of the I(statuses), are retried.
+          - Only GET, PUT and DELETE requests and the POST operations that
+            are safe to repeat, like adding a tag, are retried. Other
+            requests might have been processed by MAAS already.
+          - The first retry waits I(interval) seconds and each following
+            wait is I(backoff) times longer, up to I(max_interval) seconds.
+            A C(Retry-After) header sent by MAAS is respected up to
+            I(max_interval) seconds.
+          - If not set, failed requests are not retried. Set to an empty
+            dictionary to retry with the default settings.
+        type: dict
+        suboptions:
+          retries:
+            description:
+              - Maximum number of times a request is retried.
+              - Set to C(0) to disable retries.
+            type: int
+            default: 3
+          interval:
+            description:
+              - Time in seconds to wait before the first retry.
+            type: float
+            default: 1
+          backoff:
+            description:
+              - Factor the wait time is multiplied by after each retry.
+            type: float
+            default: 2
+          max_interval:
+            description:
+              - Upper limit in seconds for the wait time between two
+                attempts.
+            type: float
+            default: 10
+          jitter:
+            description:
+              - Fraction by which each wait time is randomly lengthened or
+                shortened, so that many tasks do not retry at the same time.
+            type: float
+            default: 0.1
+          max_time:
+            description:
+              - Time in seconds after which a request is not retried
+                anymore.
+            type: float
+            default: 60
+          statuses:
+            description:
+              - HTTP statuses of MAAS responses that are retried.
+            type: list
+            elements: int
+            default: [409, 502, 503, 504]
+      rate_limit:
+        description:
+          - Limits the requests sent to the MAAS instance by all tasks that
+            run on the same node, regardless of the number of forks.
+          - The limits are shared through lock files, so they apply to all
+            tasks using the same I(host) and I(lock_dir).
+          - If neither I(rate) nor I(max_in_flight) is set, requests are not
+            limited.
+        type: dict
+        suboptions:
+          rate:
+            description:
+              - Average number of requests per second.
+            type: float
+          burst:
+            description:
+              - Number of requests that can be sent at once after a period
+                without requests, before I(rate) applies.
+            type: int
+            default: 1
+          max_in_flight:
+            description:
+              - Maximum number of requests sent at the same time.
+            type: int
+          lock_dir:
+            description:
+              - Directory with the lock files shared by the tasks.
+              - If not set, the value of the C(MAAS_LOCK_DIR) environment
+                variable will be used. If neither is set, a directory in the
+                system temporary directory is used.
+            type: path
 """
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    DOCUMENTATION = r"""
+options:
+  polling:
+    description:
+      - Controls how the module polls MAAS while waiting for a machine to
+        reach the desired state.
+      - The first status check is repeated after I(interval) seconds and
+        each following wait is I(backoff) times longer, up to
+        I(max_interval) seconds.
+    type: dict
+    suboptions:
+      interval:
+        description:
+          - Time in seconds to wait before polling the machine status for
+            the second time.
+          - Must be greater than C(0).
+        type: float
+        default: 1
+      backoff:
+        description:
+          - Factor the wait time is multiplied by after each poll.
+          - Set to C(1) to poll in fixed intervals.
+          - Must be at least C(1).
+        type: float
+        default: 2
+      max_interval:
+        description:
+          - Upper limit in seconds for the wait time between two polls.
+        type: float
+        default: 10
+      jitter:
+        description:
+          - Fraction by which each wait time is randomly lengthened or
+            shortened, so that many tasks do not poll MAAS at the same time.
+          - Must be at least C(0) and less than C(1).
+        type: float
+        default: 0.1
+      timeout:
+        description:
+          - Time in seconds after which the module stops waiting and fails.
+          - The time is counted from the start of the task and covers all the
+            states the machine has to go through, not each of them separately.
+          - If not set, the module waits until the machine reaches the
+            desired state or fails.
+        type: int
+"""
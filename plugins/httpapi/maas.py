@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: maas
+author:
+  - Polona Mihalič (@PolonaM)
+short_description: HttpApi plugin for Canonical MAAS.
+description:
+  - Lets the modules of this collection send their requests through
+    Ansible's persistent connection process when a task uses the
+    C(ansible.netcommon.httpapi) connection.
+  - Keep-alive connections to MAAS, the response cache and the retry and
+    rate limits then live across all tasks of a play, instead of being set
+    up again by every task. Modules do not need the I(cluster_instance)
+    option in that case.
+  - The MAAS instance address is built from C(ansible_host),
+    C(ansible_httpapi_port), C(ansible_httpapi_use_ssl) and I(path).
+version_added: 1.0.0
+requirements:
+  - The C(ansible.netcommon) collection, which provides the
+    C(ansible.netcommon.httpapi) connection.
+options:
+  path:
+    description:
+      - Path of the MAAS instance on the host.
+    type: str
+    default: /MAAS
+    vars:
+      - name: ansible_maas_path
+  token_key:
+    description:
+      - Token key used for authentication.
+    type: str
+    env:
+      - name: MAAS_TOKEN_KEY
+    vars:
+      - name: ansible_maas_token_key
+  token_secret:
+    description:
+      - Token secret used for authentication.
+    type: str
+    env:
+      - name: MAAS_TOKEN_SECRET
+    vars:
+      - name: ansible_maas_token_secret
+  customer_key:
+    description:
+      - Client secret used for authentication.
+    type: str
+    env:
+      - name: MAAS_CUSTOMER_KEY
+    vars:
+      - name: ansible_maas_customer_key
+  pool_maxsize:
+    description:
+      - Maximum number of idle persistent connections kept open to MAAS.
+    type: int
+    default: 10
+    vars:
+      - name: ansible_maas_pool_maxsize
+  cache_dir:
+    description:
+      - Directory in which responses to GET requests are cached, see the
+        I(cluster_instance.cache_dir) module option.
+    type: path
+    env:
+      - name: MAAS_CACHE_DIR
+    vars:
+      - name: ansible_maas_cache_dir
+  cache_max_size:
+    description:
+      - Maximum size of the I(cache_dir) directory in MiB.
+    type: int
+    default: 100
+    vars:
+      - name: ansible_maas_cache_max_size
+  retries:
+    description:
+      - Maximum number of times a request that failed for transient reasons
+        is retried, see the I(cluster_instance.retry) module option.
+      - Requests are not retried if this is not set.
+    type: int
+    vars:
+      - name: ansible_maas_retries
+  rate:
+    description:
+      - Average number of requests per second sent to MAAS by all
+        connections on this node.
+    type: float
+    vars:
+      - name: ansible_maas_rate
+  max_in_flight:
+    description:
+      - Maximum number of requests sent to MAAS at the same time by all
+        connections on this node.
+    type: int
+    vars:
+      - name: ansible_maas_max_in_flight
+"""
+
+EXAMPLES = r"""
+# Inventory
+# [maas]
+# region ansible_host=10.44.240.10 ansible_httpapi_port=5240
+#
+# [maas:vars]
+# ansible_connection=ansible.netcommon.httpapi
+# ansible_network_os=maas.maas.maas
+# ansible_maas_token_key=kDcKvtWX7fXLB7TvB2
+# ansible_maas_token_secret=ktBqeLMRvLBDLFm7g8xybgpQ4jSkkwgk
+# ansible_maas_customer_key=tqDErtYzyzRVdUb9hS
+
+- name: List tags
+  maas.maas.tag_info:
+"""
+
+from ansible.module_utils.connection import ConnectionError
+from ansible.plugins.httpapi import HttpApiBase
+
+from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.errors import MaasError
+from ..module_utils.httpapi_client import (
+    decode_bytes,
+    encode_bytes,
+    get_error_code,
+)
+
+
+class HttpApi(HttpApiBase):
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._client = None
+
+    def get_host(self):
+        scheme = "https" if self.connection.get_option("use_ssl") else "http"
+        host = self.connection.get_option("host")
+        port = self.connection.get_option("port")
+        if port:
+            host = "{0}:{1}".format(host, port)
+        return "{0}://{1}{2}".format(scheme, host, self.get_option("path"))
+
+    def get_client(self):
+        # Created on the first request and kept for the lifetime of the
+        # persistent connection.
+        if self._client is None:
+            cluster_instance = dict(
+                host=self.get_host(),
+                token_key=self.get_option("token_key"),
+                token_secret=self.get_option("token_secret"),
+                customer_key=self.get_option("customer_key"),
+                pool_maxsize=self.get_option("pool_maxsize"),
+                cache_dir=self.get_option("cache_dir"),
+                cache_max_size=self.get_option("cache_max_size"),
+                rate_limit=dict(
+                    rate=self.get_option("rate"),
+                    max_in_flight=self.get_option("max_in_flight"),
+                ),
+            )
+            if self.get_option("retries") is not None:
+                cluster_instance["retry"] = dict(
+                    retries=self.get_option("retries")
+                )
+            self._client = get_oauth1_client(
+                dict(cluster_instance=cluster_instance)
+            )
+        return self._client
+
+    def send_request(
+        self,
+        data,
+        method="GET",
+        path="/",
+        query=None,
+        headers=None,
+        binary_data=None,
+        timeout=None,
+    ):
+        try:
+            response = self.get_client().request(
+                method,
+                path,
+                query=query,
+                data=data,
+                headers=headers,
+                binary_data=decode_bytes(binary_data),
+                timeout=timeout,
+            )
+        except MaasError as e:
+            raise ConnectionError(str(e), code=get_error_code(e))
+        return dict(
+            status=response.status,
+            data=encode_bytes(response.data),
+            headers=response.headers,
+            ttfb=response.ttfb,
+            bytes_received=response.bytes_received,
+        )
+
+    def logout(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
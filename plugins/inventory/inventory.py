@@ -14,9 +14,24 @@ author:
 short_description: Inventory source for Canonical MAAS.
 description:
   - Builds an inventory containing VMs on Canonical MAAS.
-  - Does not support caching.
+  - Supports caching of the machine list retrieved from MAAS, see the
+    I(cache) option.
+  - Machines of several MAAS regions can be combined into a single inventory
+    with the I(regions) option. The regions are queried concurrently.
+  - The I(compose), I(groups) and I(keyed_groups) expressions can refer to
+    these machine facts, in addition to the host variables; C(system_id),
+    C(hostname), C(domain), C(status), C(zone), C(pool), C(tags) (a list),
+    C(architecture), C(vm_host) (C(None) for machines that are not VMs) and
+    C(region).
+  - Results of the expressions are reused for hosts whose facts used by the
+    expression are equal, so grouping thousands of machines stays fast.
+  - With I(incremental) enabled, only machines that changed since the last
+    run are downloaded, see the I(incremental) option.
 version_added: 1.0.0
 seealso: []
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
 options:
   plugin:
     description:
@@ -25,12 +40,95 @@ options:
     required: true
     type: str
     choices: [ maas.maas.inventory ]
+  regions:
+    description:
+      - MAAS regions to fetch the machines from.
+      - If missing, machines are fetched from the single region set by the
+        C(MAAS_HOST), C(MAAS_TOKEN_KEY), C(MAAS_TOKEN_SECRET) and
+        C(MAAS_CUSTOMER_KEY) environment variables.
+      - Machines of a region are added to the C(<name>_<domain>) groups,
+        which are children of the C(<name>) group. The region name is also
+        stored in the C(maas_region) host variable.
+      - A machine that is returned by more than one region, as identified by
+        its system ID, is only added from the first of them.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - Name of the region, used as the prefix of its groups.
+        type: str
+        required: true
+      host:
+        description:
+          - The MAAS API URL of the region.
+        type: str
+        required: true
+      token_key:
+        description:
+          - Token key used for authentication.
+        type: str
+        required: true
+      token_secret:
+        description:
+          - Token secret used for authentication.
+        type: str
+        required: true
+      customer_key:
+        description:
+          - Customer key used for authentication.
+        type: str
+        required: true
   status:
     description:
       - If missing, all VMs are included into inventory.
       - If set, then only VMs with selected status are included into inventory.
     type: str
     choices: [ ready, broken, new, allocated, deployed, commissioning, testing, failed commissioning, failed deployment ]
+  zone:
+    description:
+      - If set, only machines in this availability zone are included.
+    type: str
+  pool:
+    description:
+      - If set, only machines in this resource pool are included.
+    type: str
+  domain:
+    description:
+      - If set, only machines in this domain are included.
+    type: str
+  tags:
+    description:
+      - If set, only machines that have all of these tags are included.
+    type: list
+    elements: str
+  incremental:
+    description:
+      - Keep a snapshot of the machines of every region in I(snapshot_dir)
+        and refresh it from the MAAS event log instead of downloading all
+        machines every time.
+      - Only machines that MAAS logged events for since the snapshot was
+        taken are downloaded again.
+      - All machines are downloaded if there is no snapshot, if it is older
+        than I(snapshot_timeout) or if too many events were logged since.
+    type: bool
+    default: false
+  snapshot_dir:
+    description:
+      - Directory that keeps the snapshots used by I(incremental).
+      - If not set, the value of the C(MAAS_SNAPSHOT_DIR) environment
+        variable is used, or a directory in the system temporary directory.
+    type: path
+    env:
+      - name: MAAS_SNAPSHOT_DIR
+  snapshot_timeout:
+    description:
+      - Seconds after which a snapshot is discarded and all machines are
+        downloaded again.
+      - Some changes, for example removed machines or changed tags, are not
+        logged as events by MAAS and only show up after a full download.
+    type: int
+    default: 86400
 """
 EXAMPLES = r"""
 # A trivial example that creates a list of all VMs.
@@ -74,8 +172,14 @@ plugin: maas.maas.inventory
 # Example with all available parameters and how to set them.
 # A group "test" is created based on the domain name "test".
 # Only VMs with status "ready", are added to the group.
+# Machines are filtered by MAAS, so only the matching ones are downloaded.
 
 status: ready
+zone: default
+pool: default
+domain: test
+tags:
+  - virtual
 
 # `ansible-inventory -i examples/maas_inventory.yaml --graph` output:
 # @all:
@@ -100,20 +204,92 @@ status: ready
 #        ]
 #    }
 # }
+
+# Example with two regions, queried concurrently.
+# Machines are added to the "east_maas" and "west_maas" groups, which are
+# children of the "east" and "west" groups.
+
+plugin: maas.maas.inventory
+regions:
+  - name: east
+    host: http://east.example.com:5240/MAAS
+    token_key: east-token-key
+    token_secret: east-token-secret
+    customer_key: east-customer-key
+  - name: west
+    host: http://west.example.com:5240/MAAS
+    token_key: west-token-key
+    token_secret: west-token-secret
+    customer_key: west-customer-key
+
+# Example that groups machines by their facts.
+# Groups like "zone_default", "pool_default", "arch_amd64_generic" and
+# "tag_virtual" are created, VMs are added to the "vms" group and the
+# architecture is kept in the "arch" host variable.
+
+plugin: maas.maas.inventory
+compose:
+  arch: architecture
+groups:
+  vms: vm_host is not none
+keyed_groups:
+  - key: zone
+    prefix: zone
+  - key: pool
+    prefix: pool
+  - key: architecture
+    prefix: arch
+  - key: tags
+    prefix: tag
+  - key: status | lower
+    prefix: status
+
+# Example with caching enabled.
+# The machine list is kept in the jsonfile cache for one hour, so subsequent
+# inventory runs do not query MAAS.
+
+plugin: maas.maas.inventory
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_timeout: 3600
+cache_connection: /tmp/maas_inventory_cache
 """
 
+import asyncio
+import copy
+import json
 import logging
 import os
+import time
 
 from ansible.plugins.inventory import (
     BaseInventoryPlugin,
     Cacheable,
     Constructable,
 )
+from ansible.utils.vars import combine_vars
+from jinja2 import meta, nodes
 import yaml
 
 from ..module_utils import errors
-from ..module_utils.client import Client
+from ..module_utils.async_client import AsyncClient
+from ..module_utils.machine_snapshot import (
+    MachineSnapshot,
+    get_default_snapshot_dir,
+)
+from ..module_utils.retry import RetryPolicy
+
+# Events read per incremental refresh. If more were logged since the last
+# one, all machines are downloaded instead.
+EVENTS_LIMIT = 1000
+# Changed machines are requested by ID in batches of this size, to keep URLs
+# short.
+IDS_PER_REQUEST = 100
+
+REGION_KEYS = ("name", "host", "token_key", "token_secret", "customer_key")
+
+# Filters that can return a different value every time they are applied.
+VOLATILE_FILTERS = ("random", "shuffle", "random_mac", "password_hash")
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
@@ -123,19 +299,85 @@ class LdapBaseException(Exception):
     pass
 
 
+class _TemplateCache:
+    """
+    Templar proxy that reuses the results of expressions.
+
+    A template is parsed once to find the variables it refers to. Its result
+    is then reused for all hosts with equal values of those variables, which
+    for facts like zones or pools means evaluating it a handful of times
+    instead of once per host. Templates that refer to variables Ansible adds
+    while templating, such as hostvars, are always evaluated. So are
+    templates that refer to no variables, call functions like now() or
+    lookup(), or use filters like random, since their results can differ
+    between hosts anyway.
+    """
+
+    def __init__(self, templar):
+        self._templar = templar
+        self._names = {}
+        self._results = {}
+
+    def __getattr__(self, name):
+        return getattr(self._templar, name)
+
+    @property
+    def available_variables(self):
+        return self._templar.available_variables
+
+    @available_variables.setter
+    def available_variables(self, variables):
+        self._templar.available_variables = variables
+
+    @staticmethod
+    def _is_volatile(tree):
+        for node in tree.find_all((nodes.Call, nodes.Filter)):
+            if isinstance(node, nodes.Filter):
+                if node.name.rsplit(".", 1)[-1] in VOLATILE_FILTERS:
+                    return True
+            elif isinstance(node.node, nodes.Name):
+                # Globals like now(), lookup() and query().
+                return True
+        return False
+
+    def _get_names(self, template):
+        # Returns None for templates whose results cannot be reused.
+        if template not in self._names:
+            environment = self._templar.environment
+            try:
+                tree = environment.parse(template)
+                names = meta.find_undeclared_variables(tree)
+                names = sorted(names - set(environment.globals))
+                if not names or self._is_volatile(tree):
+                    names = None
+            except Exception:
+                names = None  # Let the templar report the error.
+            self._names[template] = names
+        return self._names[template]
+
+    def template(self, variable, **kwargs):
+        names = (
+            self._get_names(variable) if isinstance(variable, str) else None
+        )
+        variables = self._templar.available_variables
+        if names is None or not set(names) <= set(variables):
+            return self._templar.template(variable, **kwargs)
+        try:
+            key = json.dumps(
+                [variable, sorted(kwargs.items())]
+                + [variables[name] for name in names],
+                sort_keys=True,
+            )
+        except (TypeError, ValueError):
+            return self._templar.template(variable, **kwargs)
+        if key not in self._results:
+            self._results[key] = self._templar.template(variable, **kwargs)
+        return copy.deepcopy(self._results[key])
+
+
 class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     NAME = "inventory"  # used internally by Ansible, it should match the file name but not required
 
-    @classmethod
-    def read_config_data(cls, path, env):
-        """
-        Reads and validates the inventory source file and environ,
-        storing the provided configuration as options.
-        """
-        with open(path, "r") as inventory_src:
-            cfg = yaml.safe_load(inventory_src)
-        return cfg
-
     def verify_file(self, path):
         """
         return true/false if this is possibly a valid file for this plugin to consume
@@ -150,43 +392,267 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
             return False
         return True
 
-    def parse(self, inventory, loader, path, cache=False):
-        super(InventoryModule, self).parse(inventory, loader, path)
-        cfg = self.read_config_data(path, os.environ)
+    def get_regions(self):
+        regions = self.get_option("regions")
+        if regions:
+            # Ansible does not validate the suboptions of inventory plugins.
+            for i, region in enumerate(regions):
+                missing = [key for key in REGION_KEYS if not region.get(key)]
+                if missing:
+                    raise errors.MaasError(
+                        "Missing {0} in region {1}".format(
+                            ", ".join(missing), region.get("name") or i + 1
+                        )
+                    )
+            return regions
+        # A single unnamed region, configured from env
+        return [
+            dict(
+                name=None,
+                host=os.getenv("MAAS_HOST"),
+                token_key=os.getenv("MAAS_TOKEN_KEY"),
+                token_secret=os.getenv("MAAS_TOKEN_SECRET"),
+                customer_key=os.getenv("MAAS_CUSTOMER_KEY"),
+            )
+        ]
 
-        # Try getting variables from env
-        try:
-            host = os.getenv("MAAS_HOST")
-            token_key = os.getenv("MAAS_TOKEN_KEY")
-            token_secret = os.getenv("MAAS_TOKEN_SECRET")
-            customer_key = os.getenv("MAAS_CUSTOMER_KEY")
-        except KeyError:
-            raise errors.MaasError(
-                "Missing parameters: MAAS_HOST, MAAS_TOKEN_KEY, MAAS_TOKEN_SECRET, MAAS_CUSTOMER_KEY."
+    @staticmethod
+    def get_client(region):
+        return AsyncClient(
+            region["host"],
+            region["token_key"],
+            region["token_secret"],
+            region["customer_key"],
+            retry=RetryPolicy(),
+        )
+
+    def get_query(self):
+        # Filters applied by MAAS, so machines that are not included in the
+        # inventory are not downloaded at all.
+        query = {}
+        status = self.get_option("status")
+        if status:
+            query["status"] = status.lower().replace(" ", "_")
+        for key in ("zone", "pool", "domain", "tags"):
+            if self.get_option(key):
+                query[key] = self.get_option(key)
+        return query
+
+    @staticmethod
+    def get_machines(client, query=None):
+        # Only keep the fields needed to populate the inventory, so cached
+        # entries stay small. Machines are parsed one at a time while the
+        # list is received, so the full records are never all in memory.
+        return [
+            dict(
+                system_id=machine["system_id"],
+                fqdn=machine["fqdn"],
+                domain=dict(name=machine["domain"]["name"]),
+                status_name=machine["status_name"],
+                zone=machine["zone"]["name"],
+                pool=machine["pool"]["name"],
+                tag_names=machine["tag_names"],
+                architecture=machine["architecture"],
+                vm_host=(machine["pod"] or {}).get("name"),
+            )
+            for machine in client.iter_records(
+                "/api/2.0/machines/", query=query or None
             )
-        client = Client(host, token_key, token_secret, customer_key)
+        ]
+
+    @staticmethod
+    def get_events(client, after=None, limit=EVENTS_LIMIT):
+        # Status changes are logged at the debug level.
+        query = dict(op="query", level="DEBUG", limit=limit)
+        if after is not None:
+            query["after"] = after
+        return client.get("/api/2.0/events/", query=query).json["events"]
+
+    @classmethod
+    def refresh_machines(cls, client, query, snapshot):
+        """
+        Returns the machines of a region, reusing the snapshot if possible.
+
+        Machines that have events logged after the snapshot's event are
+        downloaded again. The others are taken from the snapshot.
+        """
+        key = snapshot.get_key(
+            client.host, client.token_key, json.dumps(query, sort_keys=True)
+        )
+        entry = snapshot.get(key)
+        if entry:
+            event_id, created, machines = entry
+            events = cls.get_events(client, after=event_id)
+            if len(events) < EVENTS_LIMIT:
+                changed = set(e["node"] for e in events if e.get("node"))
+                if changed:
+                    ids = sorted(changed)
+                    changed_machines = []
+                    for i in range(0, len(ids), IDS_PER_REQUEST):
+                        changed_machines.extend(
+                            cls.get_machines(
+                                client,
+                                dict(query, id=ids[i : i + IDS_PER_REQUEST]),
+                            )
+                        )
+                    machines = cls.merge_changes(
+                        machines, changed_machines, changed
+                    )
+                event_id = max([event_id] + [e["id"] for e in events])
+                snapshot.set(key, event_id, created, machines)
+                return machines
+
+        # The event is read first, so changes made while the machines are
+        # being downloaded are applied by the next refresh.
+        created = time.time()
+        events = cls.get_events(client, limit=1)
+        event_id = max([e["id"] for e in events] or [0])
+        machines = cls.get_machines(client, query)
+        snapshot.set(key, event_id, created, machines)
+        return machines
 
-        machine_list = client.get("/api/2.0/machines/").json
+    @staticmethod
+    def merge_changes(machines, changed_machines, changed):
+        # Changed machines that were not returned were deleted or no longer
+        # match the filters.
+        updates = dict((m["system_id"], m) for m in changed_machines)
+        merged = []
+        for machine in machines:
+            if machine["system_id"] in changed:
+                machine = updates.pop(machine["system_id"], None)
+            if machine:
+                merged.append(machine)
+        return merged + list(updates.values())
 
+    def get_snapshot(self):
+        return MachineSnapshot(
+            self.get_option("snapshot_dir") or get_default_snapshot_dir(),
+            self.get_option("snapshot_timeout"),
+        )
+
+    async def _get_region_machines(self, region):
+        try:
+            async with self.get_client(region) as client:
+                if self.get_option("incremental"):
+                    return await client.call(
+                        self.refresh_machines,
+                        self.get_query(),
+                        self.get_snapshot(),
+                    )
+                return await client.call(self.get_machines, self.get_query())
+        except errors.MaasError as e:
+            if region["name"] is None:
+                raise
+            raise errors.MaasError("Region {0}: {1}".format(region["name"], e))
+
+    async def _get_all_machines(self, regions):
+        return await asyncio.gather(
+            *(self._get_region_machines(region) for region in regions)
+        )
+
+    @staticmethod
+    def merge_machines(regions, region_machines):
+        # Regions may share machines, for example when two entries point to
+        # controllers of the same region. Earlier regions take precedence.
+        seen = set()
+        machine_list = []
+        for region, machines in zip(regions, region_machines):
+            for machine in machines:
+                if machine["system_id"] in seen:
+                    continue
+                seen.add(machine["system_id"])
+                machine_list.append(dict(machine, region=region["name"]))
+        return machine_list
+
+    def get_all_machines(self, regions):
+        # Regions are queried at the same time, so the slowest one decides
+        # how long this takes.
+        region_machines = asyncio.run(self._get_all_machines(regions))
+        return self.merge_machines(regions, region_machines)
+
+    @staticmethod
+    def get_facts(machine):
+        # Variables available to the compose, groups and keyed_groups
+        # expressions. Machines cached by older versions lack some fields.
+        return dict(
+            system_id=machine.get("system_id"),
+            hostname=machine["fqdn"].split(".")[0],
+            domain=machine["domain"]["name"],
+            status=machine["status_name"],
+            zone=machine.get("zone"),
+            pool=machine.get("pool"),
+            tags=machine.get("tag_names", []),
+            architecture=machine.get("architecture"),
+            vm_host=machine.get("vm_host"),
+            region=machine.get("region"),
+        )
+
+    def construct(self, host, facts):
+        strict = self.get_option("strict")
+        variables = combine_vars(
+            self.inventory.get_host(host).get_vars(), facts
+        )
+        self._set_composite_vars(
+            self.get_option("compose"), variables, host, strict=strict
+        )
+        self._add_host_to_composed_groups(
+            self.get_option("groups"), variables, host, strict=strict
+        )
+        self._add_host_to_keyed_groups(
+            self.get_option("keyed_groups"), variables, host, strict=strict
+        )
+
+    def populate(self, machine_list):
+        status = self.get_option("status")
         for machine in machine_list:
-            include = False
-            if (
-                "status" not in cfg
-                or "status" in cfg
-                and cfg["status"].lower() == machine["status_name"].lower()
-            ):
-                include = True
-            if include:
-                # Group
-                inventory.add_group(machine["domain"]["name"])
-                # Host
-                inventory.add_host(
-                    machine["fqdn"], group=machine["domain"]["name"]
-                )
-                # Variables
-                inventory.set_variable(
-                    machine["fqdn"], "ansible_host", machine["fqdn"]
-                )
-                inventory.set_variable(
-                    machine["fqdn"], "ansible_group", machine["domain"]["name"]
+            if status and status.lower() != machine["status_name"].lower():
+                continue
+            region = machine.get("region")
+            # Group
+            group = machine["domain"]["name"]
+            if region:
+                group = "{0}_{1}".format(region, group)
+                self.inventory.add_group(region)
+            self.inventory.add_group(group)
+            if region:
+                self.inventory.add_child(region, group)
+            # Host
+            self.inventory.add_host(machine["fqdn"], group=group)
+            # Variables
+            self.inventory.set_variable(
+                machine["fqdn"], "ansible_host", machine["fqdn"]
+            )
+            self.inventory.set_variable(
+                machine["fqdn"], "ansible_group", group
+            )
+            if region:
+                self.inventory.set_variable(
+                    machine["fqdn"], "maas_region", region
                 )
+            self.construct(machine["fqdn"], self.get_facts(machine))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+        self.templar = _TemplateCache(self.templar)
+
+        cache_key = self.get_cache_key(path)
+        # cache is False when the inventory is being refreshed, in which case
+        # the cached machine list must be replaced, not used.
+        user_cache_setting = self.get_option("cache")
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        machine_list = None
+        if attempt_to_read_cache:
+            try:
+                machine_list = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        if machine_list is None:
+            machine_list = self.get_all_machines(self.get_regions())
+        if cache_needs_update:
+            self._cache[cache_key] = machine_list
+
+        self.populate(machine_list)
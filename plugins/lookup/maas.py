@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: maas
+author:
+  - Polona Mihalič (@PolonaM)
+short_description: Look up MAAS objects and their attributes.
+description:
+  - Returns the MAAS objects of the given kinds that match I(query), or the
+    value of their I(attribute).
+  - Every kind of objects is listed once and the list is reused by all
+    lookups on the controller for I(cache_timeout) seconds, so templating
+    over hundreds of hosts costs one request per kind, not one per host.
+    Ansible evaluates lookups in separate worker processes, which share the
+    lists through files in I(cache_dir).
+  - Machines are listed without their network interfaces and storage to keep
+    the lists small.
+version_added: 1.0.0
+options:
+  _terms:
+    description:
+      - Kinds of objects to look up.
+    type: list
+    elements: str
+    required: true
+    choices: [ domain, dns_record, fabric, ip_range, machine, pool, space, subnet, tag, user, vlan, vm_host, zone ]
+  query:
+    description:
+      - Only objects whose attributes are equal to the values in this
+        dictionary are returned.
+      - Keys may refer to nested attributes, for example C(vlan.fabric).
+    type: dict
+    default: {}
+  attribute:
+    description:
+      - If set, the value of this attribute is returned instead of the
+        whole object.
+      - May refer to a nested attribute, for example C(domain.name).
+    type: str
+  host:
+    description:
+      - The MAAS API URL.
+    type: str
+    env:
+      - name: MAAS_HOST
+  token_key:
+    description:
+      - Token key used for authentication.
+    type: str
+    env:
+      - name: MAAS_TOKEN_KEY
+  token_secret:
+    description:
+      - Token secret used for authentication.
+    type: str
+    env:
+      - name: MAAS_TOKEN_SECRET
+  customer_key:
+    description:
+      - Customer key used for authentication.
+    type: str
+    env:
+      - name: MAAS_CUSTOMER_KEY
+  cache_timeout:
+    description:
+      - Seconds for which a list of objects is reused.
+      - Set to C(0) to list the objects for every lookup.
+    type: int
+    default: 60
+  cache_dir:
+    description:
+      - Directory in which the worker processes share the lists of objects.
+      - If not set, the value of the C(MAAS_LOOKUP_CACHE_DIR) environment
+        variable is used, or a directory in the system temporary directory.
+    type: path
+    env:
+      - name: MAAS_LOOKUP_CACHE_DIR
+"""
+
+EXAMPLES = r"""
+- name: Get the ID of a subnet
+  ansible.builtin.debug:
+    msg: "{{ lookup('maas.maas.maas', 'subnet', query={'cidr': '10.10.10.0/24'}, attribute='id') }}"
+
+- name: Get the fabric of a VLAN
+  ansible.builtin.debug:
+    msg: "{{ lookup('maas.maas.maas', 'vlan', query={'name': 'vlan-5'}, attribute='fabric') }}"
+
+- name: Get the system ID of every host in the play
+  ansible.builtin.set_fact:
+    system_id: "{{ lookup('maas.maas.maas', 'machine', query={'fqdn': inventory_hostname}, attribute='system_id') }}"
+
+- name: List the names of all zones
+  ansible.builtin.debug:
+    msg: "{{ query('maas.maas.maas', 'zone', attribute='name') }}"
+"""
+
+RETURN = r"""
+_raw:
+  description:
+    - The matching objects, or the values of their I(attribute).
+  type: list
+  elements: raw
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+from ansible.errors import AnsibleLookupError
+from ansible.plugins.lookup import LookupBase
+
+from ..module_utils.client import Client
+from ..module_utils.errors import MaasError
+from ..module_utils.file_cache import get_key, write_atomic
+from ..module_utils.rest_client import RestClient
+from ..module_utils.retry import RetryPolicy
+
+# Endpoint that lists each kind of objects and, for objects that are only
+# listed as part of their parent, the key of the nested list.
+KINDS = dict(
+    domain=("/api/2.0/domains/", None),
+    dns_record=("/api/2.0/dnsresources/", None),
+    fabric=("/api/2.0/fabrics/", None),
+    ip_range=("/api/2.0/ipranges/", None),
+    machine=("/api/2.0/machines/", None),
+    pool=("/api/2.0/resourcepools/", None),
+    space=("/api/2.0/spaces/", None),
+    subnet=("/api/2.0/subnets/", None),
+    tag=("/api/2.0/tags/", None),
+    user=("/api/2.0/users/", None),
+    vlan=("/api/2.0/fabrics/", "vlans"),
+    vm_host=("/api/2.0/vm-hosts/", None),
+    zone=("/api/2.0/zones/", None),
+)
+
+# Machine attributes left out of the lists. They make up most of a machine
+# record and are rarely needed in templates.
+MACHINE_DETAILS = (
+    "interface_set",
+    "blockdevice_set",
+    "physicalblockdevice_set",
+    "virtualblockdevice_set",
+    "iscsiblockdevice_set",
+    "special_filesystems",
+    "numanode_set",
+    "service_set",
+    "cache_sets",
+    "raids",
+    "volume_groups",
+    "bcaches",
+)
+
+# Lists of objects fetched by this process, by key.
+_lists = {}
+_lists_lock = threading.Lock()
+
+
+def get_default_cache_dir():
+    return os.path.join(
+        tempfile.gettempdir(),
+        "ansible-maas-{0}".format(os.getuid()),
+        "lookup",
+    )
+
+
+def get_value(obj, path):
+    for key in path.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            raise KeyError(path)
+        obj = obj[key]
+    return obj
+
+
+def matches(obj, query):
+    try:
+        return all(get_value(obj, k) == v for k, v in query.items())
+    except KeyError:
+        return False
+
+
+def fetch(client, kind):
+    endpoint, nested = KINDS[kind]
+    records = RestClient(client).iter_records(endpoint)
+    if nested:
+        return [item for record in records for item in record[nested]]
+    if kind == "machine":
+        return [
+            dict((k, v) for k, v in r.items() if k not in MACHINE_DETAILS)
+            for r in records
+        ]
+    return list(records)
+
+
+class LookupModule(LookupBase):
+    def get_client(self):
+        missing = [
+            name
+            for name in ("host", "token_key", "token_secret", "customer_key")
+            if not self.get_option(name)
+        ]
+        if missing:
+            raise AnsibleLookupError(
+                "Missing parameters: {0}.".format(", ".join(missing))
+            )
+        return Client(
+            self.get_option("host"),
+            self.get_option("token_key"),
+            self.get_option("token_secret"),
+            self.get_option("customer_key"),
+            retry=RetryPolicy(),
+        )
+
+    def get_list(self, client, kind):
+        timeout = self.get_option("cache_timeout")
+        if not timeout:
+            return fetch(client, kind)
+        key = get_key(client.host, client.token_key, kind)
+        with _lists_lock:
+            if key in _lists and time.time() - _lists[key][0] <= timeout:
+                return _lists[key][1]
+            fetched = self._get_shared_list(client, kind, key, timeout)
+            _lists[key] = fetched
+        return fetched[1]
+
+    def _get_shared_list(self, client, kind, key, timeout):
+        # Returns (fetched_at, records). The first process to hold the lock
+        # lists the objects, the others wait for it and read its file.
+        cache_dir = self.get_option("cache_dir") or get_default_cache_dir()
+        path = os.path.join(cache_dir, key + ".json")
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            lock = open(path + ".lock", "a")
+        except OSError:
+            return time.time(), fetch(client, kind)
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(path) as f:
+                    fetched_at, records = json.load(f)
+                if time.time() - fetched_at <= timeout:
+                    return fetched_at, records
+            except (OSError, ValueError, TypeError):
+                pass
+            fetched_at, records = time.time(), fetch(client, kind)
+            try:
+                write_atomic(
+                    path, json.dumps([fetched_at, records]).encode("utf-8")
+                )
+            except OSError:
+                pass
+            return fetched_at, records
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        for kind in terms:
+            if kind not in KINDS:
+                raise AnsibleLookupError(
+                    "Unknown kind of MAAS objects: {0}. Use one of: {1}.".format(
+                        kind, ", ".join(sorted(KINDS))
+                    )
+                )
+        query = self.get_option("query") or {}
+        attribute = self.get_option("attribute")
+
+        results = []
+        client = None
+        try:
+            for kind in terms:
+                if client is None:
+                    client = self.get_client()
+                for obj in self.get_list(client, kind):
+                    if not matches(obj, query):
+                        continue
+                    if attribute:
+                        try:
+                            obj = get_value(obj, attribute)
+                        except KeyError:
+                            raise AnsibleLookupError(
+                                "MAAS {0} has no attribute {1}.".format(
+                                    kind, attribute
+                                )
+                            )
+                    results.append(obj)
+        except MaasError as e:
+            raise AnsibleLookupError(str(e))
+        finally:
+            if client is not None:
+                client.close()
+        return results
@@ -14,32 +14,90 @@ SHARED_SPECS = dict(
     cluster_instance=dict(
         type="dict",
         apply_defaults=True,
+        # host may only be left out if the task uses the httpapi plugin,
+        # which get_oauth1_client checks. The credentials of a host are
+        # always required.
+        required_by=dict(host=("token_key", "token_secret", "customer_key")),
         options=dict(
             host=dict(
                 type="str",
-                required=True,
                 fallback=(env_fallback, ["MAAS_HOST"]),
             ),
             token_key=dict(
                 type="str",
-                required=True,
                 no_log=True,
                 fallback=(env_fallback, ["MAAS_TOKEN_KEY"]),
             ),
             token_secret=dict(
                 type="str",
-                required=True,
                 no_log=True,
                 fallback=(env_fallback, ["MAAS_TOKEN_SECRET"]),
             ),
             customer_key=dict(
                 type="str",
-                required=True,
                 no_log=True,
                 fallback=(env_fallback, ["MAAS_CUSTOMER_KEY"]),
             ),
+            pool_maxsize=dict(
+                type="int",
+                default=10,
+            ),
+            pool_idle_timeout=dict(
+                type="int",
+                default=30,
+            ),
+            collect_metrics=dict(
+                type="bool",
+                default=False,
+            ),
+            cache_dir=dict(
+                type="path",
+                fallback=(env_fallback, ["MAAS_CACHE_DIR"]),
+            ),
+            cache_max_size=dict(
+                type="int",
+                default=100,
+            ),
+            retry=dict(
+                type="dict",
+                options=dict(
+                    retries=dict(type="int", default=3),
+                    interval=dict(type="float", default=1),
+                    backoff=dict(type="float", default=2),
+                    max_interval=dict(type="float", default=10),
+                    jitter=dict(type="float", default=0.1),
+                    max_time=dict(type="float", default=60),
+                    statuses=dict(
+                        type="list",
+                        elements="int",
+                        default=[409, 502, 503, 504],
+                    ),
+                ),
+            ),
+            rate_limit=dict(
+                type="dict",
+                options=dict(
+                    rate=dict(type="float"),
+                    burst=dict(type="int", default=1),
+                    max_in_flight=dict(type="int"),
+                    lock_dir=dict(
+                        type="path",
+                        fallback=(env_fallback, ["MAAS_LOCK_DIR"]),
+                    ),
+                ),
+            ),
+        ),
+    ),
+    polling=dict(
+        type="dict",
+        options=dict(
+            interval=dict(type="float", default=1),
+            backoff=dict(type="float", default=2),
+            max_interval=dict(type="float", default=10),
+            jitter=dict(type="float", default=0.1),
+            timeout=dict(type="int"),
         ),
-    )
+    ),
 )
 
 
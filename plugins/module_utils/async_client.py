@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+
+from .client import Client
+
+# Requests an AsyncClient keeps in flight at the same time.
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncClient:
+    """
+    asyncio counterpart of Client for plugins that run on the controller.
+
+    Every request is sent by a Client, so authentication, retries, errors
+    and the returned Response objects are the same. The blocking requests
+    run on a pool of max_concurrency threads, which lets a coroutine await
+    many of them at once, for example with asyncio.gather. The connection
+    pool is sized so that every thread can keep its connection open.
+    """
+
+    def __init__(
+        self,
+        host,
+        token_key=None,
+        token_secret=None,
+        consumer_key=None,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        **kwargs
+    ):
+        kwargs.setdefault("pool_maxsize", max_concurrency)
+        self.client = Client(
+            host, token_key, token_secret, consumer_key, **kwargs
+        )
+        self.host = self.client.host
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="maas"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def call(self, func, *args, **kwargs):
+        """
+        Awaits func(client, *args, **kwargs) run in a worker thread.
+
+        Use it for work that sends several dependent requests or processes
+        records while they are streamed with Client.iter_records.
+        """
+        return await self._run(func, self.client, *args, **kwargs)
+
+    async def request(
+        self,
+        method,
+        path,
+        query=None,
+        data=None,
+        headers=None,
+        binary_data=None,
+        timeout=None,
+    ):
+        return await self._run(
+            self.client.request,
+            method,
+            path,
+            query=query,
+            data=data,
+            headers=headers,
+            binary_data=binary_data,
+            timeout=timeout,
+        )
+
+    async def get(self, path, query=None, timeout=None):
+        return await self._run(
+            self.client.get, path, query=query, timeout=timeout
+        )
+
+    async def list_records(self, path, query=None, timeout=None):
+        # The list is parsed while it is received, in the worker thread.
+        return await self.call(
+            lambda client: list(
+                client.iter_records(path, query=query, timeout=timeout)
+            )
+        )
+
+    async def post(self, path, data, query=None, timeout=None):
+        return await self._run(
+            self.client.post, path, data, query=query, timeout=timeout
+        )
+
+    async def patch(self, path, data, query=None, timeout=None):
+        return await self._run(
+            self.client.patch, path, data, query=query, timeout=timeout
+        )
+
+    async def put(
+        self,
+        path,
+        data,
+        query=None,
+        timeout=None,
+        binary_data=None,
+        headers=None,
+    ):
+        return await self._run(
+            self.client.put,
+            path,
+            data,
+            query=query,
+            timeout=timeout,
+            binary_data=binary_data,
+            headers=headers,
+        )
+
+    async def delete(self, path, query=None, timeout=None):
+        return await self._run(
+            self.client.delete, path, query=query, timeout=timeout
+        )
@@ -7,23 +7,54 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import contextlib
 import json
+import time
 
+from ansible.module_utils.six.moves import http_client
 from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
-from ansible.module_utils.six.moves.urllib.parse import quote, urlencode
+from ansible.module_utils.six.moves.urllib.parse import (
+    quote,
+    urlencode,
+    urlsplit,
+)
+from ansible.module_utils.six.moves.urllib.request import (
+    getproxies,
+    proxy_bypass,
+)
 from ansible.module_utils.urls import Request
 
 from .auth import get_oauth_header
-from .errors import AuthError, MaasError, UnexpectedAPIResponse
+from .compression import ACCEPT_ENCODING, DecodedBody, read_body
+from .connection_pool import (
+    DEFAULT_POOL_IDLE_TIMEOUT,
+    DEFAULT_POOL_MAXSIZE,
+    ConnectionPool,
+    StreamedResponse,
+)
+from .errors import (
+    AuthError,
+    MaasError,
+    RequestFailed,
+    UnexpectedAPIResponse,
+)
 from .form import Multipart
+from .json_stream import iter_array
 
 DEFAULT_HEADERS = dict(Accept="application/json")
 
 
 class Response:
-    def __init__(self, status, data, headers=None):
+    def __init__(
+        self, status, data, headers=None, ttfb=None, bytes_received=None
+    ):
         self.status = status
-        self.data = data
+        self.data = data  # Decoded body.
+        self.ttfb = ttfb  # Seconds until the response headers arrived.
+        # Size of the body as received, before it was decompressed.
+        self.bytes_received = (
+            len(data or b"") if bytes_received is None else bytes_received
+        )
         # [('h1', 'v1'), ('H2', 'V2')] -> {'h1': 'v1', 'h2': 'V2'}
         self.headers = (
             dict((k.lower(), v) for k, v in dict(headers).items())
@@ -47,21 +78,77 @@ class Response:
 
 class Client:
     def __init__(
-        self, host, token_key=None, token_secret=None, consumer_key=None
+        self,
+        host,
+        token_key=None,
+        token_secret=None,
+        consumer_key=None,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+        trace=None,
+        cache=None,
+        retry=None,
+        limiter=None,
     ):
         if not (host or "").startswith(("https://", "http://")):
             raise MaasError(
                 "Invalid instance host value: '{0}'. "
                 "Value must start with 'https://' or 'http://'".format(host)
             )
+        self._setup(
+            host,
+            token_key,
+            token_secret,
+            consumer_key,
+            pool_maxsize,
+            pool_idle_timeout,
+            trace,
+            cache,
+            retry,
+            limiter,
+        )
 
+    def _setup(
+        self,
+        host,
+        token_key=None,
+        token_secret=None,
+        consumer_key=None,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+        trace=None,
+        cache=None,
+        retry=None,
+        limiter=None,
+    ):
+        # Sets up the state of every client. Subclasses that do not talk to
+        # MAAS over HTTP themselves call it instead of __init__.
         self.host = host
         self.token_key = token_key
         self.token_secret = token_secret
         self.consumer_key = consumer_key
 
         self._auth_header = None
-        self._client = Request()
+        # Called with a dict describing every completed request.
+        self.trace = trace
+        # ResponseCache used to revalidate GET responses, if any.
+        self.cache = cache
+        # RetryPolicy for failed requests. Requests are not retried if None.
+        self.retry = retry
+        # RateLimiter shared with other processes, if any.
+        self.limiter = limiter
+        # Responses are decoded by the client for both transports.
+        self._client = Request(decompress=False)
+        # pool_maxsize=0 disables connection reuse.
+        self._pool = (
+            ConnectionPool(pool_maxsize, pool_idle_timeout)
+            if pool_maxsize
+            else None
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
 
     @property
     def auth_header(self):
@@ -76,7 +163,52 @@ class Client:
         )
         return dict(Authorization=result)
 
+    @staticmethod
+    def _uses_proxy(url):
+        # Persistent connections go directly to the MAAS host. Leave proxied
+        # requests to the urllib machinery that knows how to handle them.
+        parts = urlsplit(url)
+        return parts.scheme in getproxies() and not proxy_bypass(
+            parts.hostname
+        )
+
+    def _limit(self):
+        if self.limiter is None:
+            return contextlib.nullcontext()
+        return self.limiter.limit()
+
     def _request(self, method, path, data=None, headers=None, timeout=None):
+        if self._pool is None or self._uses_proxy(path):
+            return self._request_urllib(method, path, data, headers, timeout)
+        try:
+            raw_resp = self._pool.urlopen(
+                method, path, data=data, headers=headers, timeout=timeout
+            )
+        except TimeoutError:
+            raise RequestFailed("The action - timed out.")
+        except (OSError, http_client.HTTPException) as e:
+            raise RequestFailed(e)
+        # Wrong username/password, or expired access token
+        if raw_resp.status == 401:
+            raise AuthError(
+                "Failed to authenticate with the instance: {0} {1} {2}".format(
+                    raw_resp.status, raw_resp.reason, raw_resp.data
+                ),
+            )
+        # Other HTTP error codes do not necessarily mean errors.
+        # This is for the caller to decide.
+        return Response(
+            raw_resp.status,
+            raw_resp.data,
+            raw_resp.headers,
+            raw_resp.ttfb,
+            raw_resp.bytes_received,
+        )
+
+    def _request_urllib(
+        self, method, path, data=None, headers=None, timeout=None
+    ):
+        started = time.perf_counter()
         try:
             raw_resp = self._client.open(
                 method,
@@ -96,12 +228,69 @@ class Client:
                 )
             # Other HTTP error codes do not necessarily mean errors.
             # This is for the caller to decide.
-            return Response(e.code, e.read(), e.headers)
+            ttfb = time.perf_counter() - started
+            data, bytes_received = read_body(
+                e, e.headers.get("Content-Encoding")
+            )
+            return Response(e.code, data, e.headers, ttfb, bytes_received)
         except URLError as e:
-            raise MaasError(e.reason)
+            raise RequestFailed(e.reason)
         except TimeoutError:
-            raise MaasError("The action - timed out.")
-        return Response(raw_resp.status, raw_resp.read(), raw_resp.headers)
+            raise RequestFailed("The action - timed out.")
+        ttfb = time.perf_counter() - started
+        data, bytes_received = read_body(
+            raw_resp, raw_resp.headers.get("Content-Encoding")
+        )
+        return Response(
+            raw_resp.status, data, raw_resp.headers, ttfb, bytes_received
+        )
+
+    def _stream(self, method, path, headers=None, timeout=None):
+        # Same as _request, but returns a StreamedResponse.
+        if self._pool is not None and not self._uses_proxy(path):
+            try:
+                return self._pool.stream(
+                    method, path, headers=headers, timeout=timeout
+                )
+            except TimeoutError:
+                raise RequestFailed("The action - timed out.")
+            except (OSError, http_client.HTTPException) as e:
+                raise RequestFailed(e)
+
+        started = time.perf_counter()
+        try:
+            raw_resp = self._client.open(
+                method,
+                path,
+                headers=headers,
+                validate_certs=False,
+                timeout=timeout,
+            )
+            status = raw_resp.status
+        except HTTPError as e:
+            raw_resp, status = e, e.code
+        except URLError as e:
+            raise RequestFailed(e.reason)
+        except TimeoutError:
+            raise RequestFailed("The action - timed out.")
+        return StreamedResponse(
+            status,
+            raw_resp.reason,
+            list(raw_resp.headers.items()),
+            DecodedBody(raw_resp, raw_resp.headers.get("Content-Encoding")),
+            time.perf_counter() - started,
+            release=raw_resp.close,
+            discard=raw_resp.close,
+        )
+
+    def get_url(self, path, query=None):
+        escaped_path = quote(path.lstrip("/"))
+        if escaped_path:
+            escaped_path = "/" + escaped_path
+        url = "{0}{1}".format(self.host, escaped_path)
+        if query:
+            url = "{0}?{1}".format(url, urlencode(query, doseq=True))
+        return url
 
     def request(
         self,
@@ -118,32 +307,168 @@ class Client:
             raise AssertionError(
                 "Cannot have JSON and binary payload in a single request."
             )
-        escaped_path = quote(path.lstrip("/"))
-        if escaped_path:
-            escaped_path = "/" + escaped_path
-        url = "{0}{1}".format(self.host, escaped_path)
-        if query:
-            url = "{0}?{1}".format(url, urlencode(query))
-
-        headers = dict(headers or DEFAULT_HEADERS, **self.auth_header)
+        if method == "GET" and headers is None and self.cache is not None:
+            return self._get_cached(path, query, timeout)
+        url = self.get_url(path, query)
+        headers = dict(headers or DEFAULT_HEADERS)
+        headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
         if data is not None:
-            boundary, data = Multipart.get_mulipart(data)
-            headers["Content-type"] = (
-                f'multipart/form-data; boundary="{boundary}"'
-            )
+            # The body is streamed in chunks, so its length is set upfront.
+            data = Multipart.encode(data)
+            headers["Content-type"] = data.content_type
+            headers["Content-Length"] = str(len(data))
         elif binary_data is not None:
             data = binary_data
 
-        return self._request(
-            method, url, data=data, headers=headers, timeout=timeout
+        def send():
+            with self._limit():
+                # Every attempt is signed anew, OAuth nonces are single use.
+                started = time.perf_counter()
+                response = self._request(
+                    method,
+                    url,
+                    data=data,
+                    headers=dict(headers, **self.auth_header),
+                    timeout=timeout,
+                )
+            self._trace(method, path, data, response, started)
+            return response
+
+        return self._retry(method, query, send)
+
+    def _trace(self, method, path, data, response, started):
+        if self.trace is None:
+            return
+        self.trace(
+            dict(
+                method=method,
+                path=path,
+                status=response.status,
+                bytes_sent=len(data) if hasattr(data, "__len__") else 0,
+                bytes_received=response.bytes_received,
+                bytes_uncompressed=len(response.data or b""),
+                ttfb=round(response.ttfb or 0, 6),
+                time=round(time.perf_counter() - started, 6),
+            )
         )
 
+    def _retry(self, method, query, send):
+        # Calls send() again for as long as the retry policy allows it.
+        policy = self.retry
+        if policy is None or not policy.allows(method, query):
+            return send()
+        delays = policy.delays()
+        while True:
+            try:
+                response = send()
+            except RequestFailed:
+                delay = next(delays, None)
+                if delay is None:
+                    raise
+            else:
+                if response.status not in policy.statuses:
+                    return response
+                delay = next(delays, None)
+                if delay is None:
+                    return response
+                headers = dict(
+                    (k.lower(), v) for k, v in dict(response.headers).items()
+                )
+                delay = policy.get_delay(delay, headers.get("retry-after"))
+                if isinstance(response, StreamedResponse):
+                    response.close()
+            time.sleep(delay)
+
     def get(self, path, query=None, timeout=None):
         resp = self.request("GET", path, query=query, timeout=timeout)
         if resp.status in (200, 404):
             return resp
         raise UnexpectedAPIResponse(response=resp)
 
+    def iter_records(self, path, query=None, timeout=None):
+        """
+        Yields the records of a list endpoint while they are received.
+
+        Unlike with get(), the response is parsed incrementally, so memory
+        does not grow with the size of the list. Responses are not stored in
+        the response cache.
+        """
+        url = self.get_url(path, query)
+        headers = dict(DEFAULT_HEADERS)
+        headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # A streamed list holds its request slot until it is read.
+        with self._limit():
+            started = time.perf_counter()
+            response = self._retry(
+                "GET",
+                query,
+                lambda: self._stream(
+                    "GET",
+                    url,
+                    headers=dict(headers, **self.auth_header),
+                    timeout=timeout,
+                ),
+            )
+            uncompressed = 0
+
+            def chunks():
+                nonlocal uncompressed
+                for chunk in response:
+                    uncompressed += len(chunk)
+                    yield chunk
+
+            try:
+                if response.status != 200:
+                    data = b"".join(chunks())
+                    if response.status == 401:
+                        raise AuthError(
+                            "Failed to authenticate with the instance: "
+                            "{0} {1} {2}".format(
+                                response.status, response.reason, data
+                            ),
+                        )
+                    raise UnexpectedAPIResponse(
+                        response=Response(
+                            response.status, data, response.headers
+                        )
+                    )
+                for record in iter_array(chunks()):
+                    yield record
+            finally:
+                response.close()
+                if self.trace is not None:
+                    self.trace(
+                        dict(
+                            method="GET",
+                            path=path,
+                            status=response.status,
+                            bytes_sent=0,
+                            bytes_received=response.bytes_received,
+                            bytes_uncompressed=uncompressed,
+                            ttfb=round(response.ttfb or 0, 6),
+                            time=round(time.perf_counter() - started, 6),
+                        )
+                    )
+
+    def _get_cached(self, path, query, timeout):
+        # Conditional GET: MAAS answers with 304 Not Modified and no body if
+        # the cached response is still current.
+        key = self.cache.get_key(
+            self.get_url(path, query), self.consumer_key, self.token_key
+        )
+        cached = self.cache.get(key)
+        headers = dict(DEFAULT_HEADERS)
+        if cached:
+            headers.update(cached.validators)
+        resp = self.request(
+            "GET", path, query=query, headers=headers, timeout=timeout
+        )
+        if resp.status == 304 and cached:
+            return Response(200, cached.data, cached.headers)
+        if resp.status == 200:
+            self.cache.set(key, resp)
+        return resp
+
     def post(self, path, data, query=None, timeout=None):
         resp = self.request(
             "POST", path, data=data, query=query, timeout=timeout
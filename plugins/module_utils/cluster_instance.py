@@ -8,15 +8,111 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 
+import os
+
+from ansible.module_utils.connection import Connection
+
 from .client import Client
+from .connection_pool import DEFAULT_POOL_IDLE_TIMEOUT, DEFAULT_POOL_MAXSIZE
+from .errors import MaasError
+from .httpapi_client import HttpApiClient
+from .metrics import Metrics
+from .rate_limit import RateLimiter, get_default_lock_dir
+from .response_cache import DEFAULT_CACHE_MAX_SIZE, ResponseCache
+from .retry import RetryPolicy
+
+REQUIRED = ("host", "token_key", "token_secret", "customer_key")
+
+
+def get_transport_options(cluster_instance):
+    # Returns the names of the options that configure how requests are sent,
+    # if they are set to something else than their defaults.
+    defaults = dict(
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+        # The httpapi plugin reads the same environment variable.
+        cache_dir=os.environ.get("MAAS_CACHE_DIR"),
+        cache_max_size=DEFAULT_CACHE_MAX_SIZE,
+    )
+    names = [
+        name
+        for name, default in defaults.items()
+        if cluster_instance.get(name) not in (None, default)
+    ]
+    if cluster_instance.get("retry") is not None:
+        names.append("retry")
+    rate_limit = cluster_instance.get("rate_limit") or {}
+    if rate_limit.get("rate") or rate_limit.get("max_in_flight"):
+        names.append("rate_limit")
+    return names
+
 
+def get_oauth1_client(params, module=None):
+    cluster_instance = params["cluster_instance"] or {}
+    # Without a host, requests go through the persistent connection of the
+    # maas.maas.maas httpapi plugin, if the task uses one.
+    socket_path = getattr(module, "_socket_path", None)
+    if not cluster_instance.get("host") and socket_path:
+        # The plugin sends the requests, so only its options apply.
+        ignored = get_transport_options(cluster_instance)
+        if ignored:
+            raise MaasError(
+                "cluster_instance options {0} cannot be used with the "
+                "maas.maas.maas httpapi plugin. Set the options of the "
+                "plugin instead.".format(", ".join(ignored))
+            )
+        client = HttpApiClient(Connection(socket_path))
+        if cluster_instance.get("collect_metrics"):
+            client.trace = Metrics()
+            client.trace.instrument(module)
+        return client
 
-def get_oauth1_client(params):
-    cluster_instance = params["cluster_instance"]
+    missing = [name for name in REQUIRED if not cluster_instance.get(name)]
+    if missing:
+        raise MaasError(
+            "missing required arguments: {0} found in cluster_instance".format(
+                ", ".join(missing)
+            )
+        )
     host = cluster_instance["host"]
     consumer_key = cluster_instance["customer_key"]
     token_key = cluster_instance["token_key"]
     token_secret = cluster_instance["token_secret"]
 
-    client = Client(host, token_key, token_secret, consumer_key)
+    client = Client(
+        host,
+        token_key,
+        token_secret,
+        consumer_key,
+        pool_maxsize=cluster_instance.get(
+            "pool_maxsize", DEFAULT_POOL_MAXSIZE
+        ),
+        pool_idle_timeout=cluster_instance.get(
+            "pool_idle_timeout", DEFAULT_POOL_IDLE_TIMEOUT
+        ),
+    )
+    if cluster_instance.get("cache_dir"):
+        max_size = (
+            cluster_instance.get("cache_max_size") or DEFAULT_CACHE_MAX_SIZE
+        )
+        client.cache = ResponseCache(
+            cluster_instance["cache_dir"], max_size * 1024 * 1024
+        )
+    rate_limit = cluster_instance.get("rate_limit") or {}
+    if (
+        rate_limit.get("rate") is not None
+        or rate_limit.get("max_in_flight") is not None
+    ):
+        client.limiter = RateLimiter(
+            rate_limit.get("lock_dir") or get_default_lock_dir(),
+            RateLimiter.get_key(host),
+            rate=rate_limit.get("rate"),
+            burst=rate_limit.get("burst", 1),
+            max_in_flight=rate_limit.get("max_in_flight"),
+        )
+    if cluster_instance.get("retry"):
+        client.retry = RetryPolicy.from_ansible(cluster_instance["retry"])
+    if module is not None and cluster_instance.get("collect_metrics"):
+        client.trace = Metrics()
+        client.trace.instrument(module)
     return client
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from .errors import MaasError
+
+
+def _freeze(value):
+    # Makes list and dict values usable as index keys.
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _get_value(item, key):
+    # key is either a field name or a path into nested dicts:
+    # "name" -> item["name"], ("subnet", "id") -> item["subnet"]["id"]
+    if isinstance(key, str):
+        return item.get(key)
+    value = item
+    for part in key:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class RecordCollection:
+    """
+    List of records (dicts) obtained from MAAS, with hash indexes for lookups.
+
+    An index over a key (a field name, a path into nested dicts or a tuple of
+    those for compound keys) is built on the first lookup that needs it and
+    reused afterwards, so one fetched list can answer many lookups without
+    scanning it again.
+    """
+
+    def __init__(self, items):
+        self.items = list(items)
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def _get_index(self, keys):
+        index = self._indexes.get(keys)
+        if index is None:
+            index = {}
+            for item in self.items:
+                index_key = tuple(_freeze(_get_value(item, k)) for k in keys)
+                index.setdefault(index_key, []).append(item)
+            self._indexes[keys] = index
+        return index
+
+    def find_all(self, conditions):
+        """Returns all records that match every key: value pair."""
+        keys = tuple(sorted(conditions, key=repr))
+        index_key = tuple(_freeze(conditions[k]) for k in keys)
+        return list(self._get_index(keys).get(index_key, []))
+
+    def find(self, conditions):
+        """Returns the only matching record, None if there is no match."""
+        records = self.find_all(conditions)
+        if len(records) > 1:
+            raise MaasError(
+                "{0} records match the {1} query.".format(
+                    len(records), conditions
+                )
+            )
+        return records[0] if records else None
+
+    def get(self, key, value):
+        return self.find({key: value})
+
+    def get_or_fail(self, key, value, attribute_name):
+        record = self.get(key, value)
+        if record:
+            return record
+
+        available_items = ", ".join(
+            str(_get_value(item, key)) for item in self.items
+        )
+        raise MaasError(
+            f"Can not find matching {attribute_name}. Options are [{available_items}]"
+        )
+
+
+class CollectionLoader:
+    """
+    Fetches lists from MAAS at most once and keeps them as RecordCollections.
+
+    A module creates one loader per task and passes it to every function that
+    looks records up, so all lookups into the same list share one fetch and
+    its indexes. Lists that the task has changed are dropped with invalidate
+    and fetched again on their next use.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._collections = {}
+
+    def get(self, endpoint):
+        collection = self._collections.get(endpoint)
+        if collection is None:
+            collection = RecordCollection(self.client.get(endpoint).json)
+            self._collections[endpoint] = collection
+        return collection
+
+    def invalidate(self, endpoint):
+        self._collections.pop(endpoint, None)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import zlib
+
+from .errors import MaasError
+
+# Content encodings the client can decode, sent as Accept-Encoding.
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Number of compressed bytes read from the response at once.
+CHUNK_SIZE = 64 * 1024
+
+
+class _DeflateDecoder:
+    # Deflate responses should be zlib streams, but some servers send raw
+    # deflate data. The format is detected from the first bytes.
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, chunk):
+        if self._decoder is None:
+            is_zlib = (
+                len(chunk) >= 2
+                and chunk[0] & 0x0F == 8
+                and (chunk[0] * 256 + chunk[1]) % 31 == 0
+            )
+            self._decoder = zlib.decompressobj(
+                zlib.MAX_WBITS if is_zlib else -zlib.MAX_WBITS
+            )
+        return self._decoder.decompress(chunk)
+
+    def flush(self):
+        return self._decoder.flush() if self._decoder else b""
+
+
+def get_decoder(content_encoding):
+    """Returns a decompressobj-like decoder or None for identity."""
+    encoding = (content_encoding or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    return None
+
+
+class DecodedBody:
+    """
+    Iterates over the decoded chunks of a response body while it is read.
+
+    Compressed bodies are decompressed chunk by chunk, so neither the whole
+    compressed nor the whole decoded body has to be held in memory. The
+    number of bytes actually received is kept in bytes_received.
+    """
+
+    def __init__(self, fp, content_encoding):
+        self.fp = fp
+        self.content_encoding = content_encoding
+        self.bytes_received = 0
+
+    def __iter__(self):
+        decoder = get_decoder(self.content_encoding)
+        try:
+            while True:
+                chunk = self.fp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.bytes_received += len(chunk)
+                if decoder is None:
+                    yield chunk
+                else:
+                    yield decoder.decompress(chunk)
+            if decoder is not None:
+                yield decoder.flush()
+        except zlib.error as e:
+            raise MaasError(
+                "Received invalid {0} encoded response: {1}".format(
+                    self.content_encoding, e
+                )
+            )
+
+
+def read_body(fp, content_encoding):
+    """Reads and decodes a whole response body.
+
+    Returns the decoded body and the number of bytes that were actually
+    received.
+    """
+    if get_decoder(content_encoding) is None:
+        data = fp.read()
+        return data, len(data)
+    body = DecodedBody(fp, content_encoding)
+    data = b"".join(body)
+    return data, body.bytes_received
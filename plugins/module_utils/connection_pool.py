@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from collections import deque
+import socket
+import ssl
+import threading
+import time
+
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import urlsplit
+
+from .compression import DecodedBody, read_body
+from .errors import MaasError
+
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_POOL_IDLE_TIMEOUT = 30
+DEFAULT_TIMEOUT = 10
+
+# Methods that leave MAAS in the same state when a request is sent twice.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+# Errors raised when the server has silently closed an idle keep-alive
+# connection. If sending the request fails, MAAS could not have processed it
+# and it is safe to send it again over a fresh connection. If only reading
+# the response fails, the request might have been processed already, so only
+# idempotent requests are sent again. Callers that know better can retry the
+# others with a RetryPolicy.
+STALE_CONNECTION_ERRORS = (
+    http_client.RemoteDisconnected,
+    http_client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class PooledResponse:
+    """Fully read HTTP response, detached from the underlying connection."""
+
+    def __init__(
+        self, status, reason, data, headers, ttfb=None, bytes_received=None
+    ):
+        self.status = status
+        self.reason = reason
+        self.data = data  # Decoded body.
+        self.headers = headers
+        self.ttfb = ttfb  # Seconds until the response headers arrived.
+        # Size of the body as received, before it was decompressed.
+        self.bytes_received = (
+            len(data) if bytes_received is None else bytes_received
+        )
+
+
+class StreamedResponse:
+    """
+    HTTP response whose body is read while it is iterated over.
+
+    Iterating yields the decoded chunks of the body. Once the body is read
+    completely, release is called to let the connection be reused. A
+    response that is closed before that calls discard instead, since the
+    rest of the body would be left unread on the connection.
+    """
+
+    def __init__(
+        self,
+        status,
+        reason,
+        headers,
+        body,
+        ttfb=None,
+        release=None,
+        discard=None,
+    ):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body  # DecodedBody
+        self.ttfb = ttfb  # Seconds until the response headers arrived.
+        self._release = release
+        self._discard = discard
+        self._done = False
+
+    @property
+    def bytes_received(self):
+        return self.body.bytes_received
+
+    def __iter__(self):
+        try:
+            for chunk in self.body:
+                yield chunk
+        except Exception:
+            self.close()
+            raise
+        if not self._done:
+            self._done = True
+            if self._release:
+                self._release()
+
+    def close(self):
+        if not self._done:
+            self._done = True
+            if self._discard:
+                self._discard()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of persistent HTTP/1.1 connections, kept per host.
+
+    Idle connections are reused for subsequent requests to the same
+    scheme/host/port, so consecutive API calls do not pay for a new TCP and
+    TLS handshake. At most maxsize idle connections are kept for each host and
+    connections that have been idle for longer than idle_timeout seconds are
+    discarded instead of reused.
+    """
+
+    def __init__(
+        self,
+        maxsize=DEFAULT_POOL_MAXSIZE,
+        idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+    ):
+        if maxsize < 1:
+            raise MaasError("Connection pool size must be at least 1.")
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = {}  # (scheme, host, port) -> deque([(conn, released_at)])
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(url):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        return scheme, parts.hostname, port
+
+    @staticmethod
+    def _new_connection(key, timeout):
+        scheme, host, port = key
+        if scheme == "https":
+            # Certificates are not validated, same as with the
+            # validate_certs=False setting the client used so far.
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            return http_client.HTTPSConnection(
+                host, port, timeout=timeout, context=context
+            )
+        return http_client.HTTPConnection(host, port, timeout=timeout)
+
+    @staticmethod
+    def _connect(conn):
+        # Request bodies are sent in chunks after the headers. Disable
+        # Nagle's algorithm so that they are not held back until the server
+        # acknowledges the headers.
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _acquire(self, key):
+        # Returns an idle connection that can still be used or None.
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout:
+                    return conn
+                conn.close()
+        return None
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.maxsize:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _released_at in connections:
+                conn.close()
+
+    @staticmethod
+    def _set_timeout(conn, timeout):
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+    def _finish(self, key, conn, will_close):
+        if will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+    def _send(self, method, url, data, headers, timeout):
+        # Returns the connection and the response, once its headers arrive.
+        key = self.get_key(url)
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = "{0}?{1}".format(target, parts.query)
+        timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+
+        while True:
+            conn = self._acquire(key)
+            reused = conn is not None
+            if not reused:
+                conn = self._new_connection(key, timeout)
+            self._set_timeout(conn, timeout)
+            sent = False
+            try:
+                if conn.sock is None:
+                    self._connect(conn)
+                started = time.perf_counter()
+                conn.request(method, target, body=data, headers=headers or {})
+                sent = True
+                raw_resp = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    continue
+                raise
+            except (socket.timeout, OSError, http_client.HTTPException):
+                conn.close()
+                raise
+            return key, conn, raw_resp, time.perf_counter() - started
+
+    def urlopen(self, method, url, data=None, headers=None, timeout=None):
+        key, conn, raw_resp, ttfb = self._send(
+            method, url, data, headers, timeout
+        )
+        try:
+            data_read, bytes_received = read_body(
+                raw_resp, raw_resp.getheader("Content-Encoding")
+            )
+        except (
+            socket.timeout,
+            OSError,
+            http_client.HTTPException,
+            MaasError,
+        ):
+            conn.close()
+            raise
+        self._finish(key, conn, raw_resp.will_close)
+        return PooledResponse(
+            raw_resp.status,
+            raw_resp.reason,
+            data_read,
+            raw_resp.getheaders(),
+            ttfb,
+            bytes_received,
+        )
+
+    def stream(self, method, url, data=None, headers=None, timeout=None):
+        """Same as urlopen, but the body is read by iterating the response."""
+        key, conn, raw_resp, ttfb = self._send(
+            method, url, data, headers, timeout
+        )
+        return StreamedResponse(
+            raw_resp.status,
+            raw_resp.reason,
+            raw_resp.getheaders(),
+            DecodedBody(raw_resp, raw_resp.getheader("Content-Encoding")),
+            ttfb,
+            release=lambda: self._finish(key, conn, raw_resp.will_close),
+            discard=conn.close,
+        )
@@ -16,6 +16,11 @@ class AuthError(MaasError):
     pass
 
 
+# The request could not be sent or its response could not be received.
+class RequestFailed(MaasError):
+    pass
+
+
 class UnexpectedAPIResponse(MaasError):
     def __init__(self, response):
         self.message = "Unexpected response - {0} {1}".format(
@@ -24,6 +29,16 @@ class UnexpectedAPIResponse(MaasError):
         super(UnexpectedAPIResponse, self).__init__(self.message)
 
 
+# Some requests of a batch sent with RestClient.execute_many failed.
+class BatchError(MaasError):
+    def __init__(self, errors, total):
+        self.errors = errors
+        self.message = "{0} of {1} requests failed - {2}".format(
+            len(errors), total, "; ".join(str(e) for e in errors)
+        )
+        super(BatchError, self).__init__(self.message)
+
+
 class InvalidUuidFormatError(MaasError):
     def __init__(self, data):
         self.message = "Invalid UUID - {0}".format(data)
@@ -87,3 +102,9 @@ class PartitionNotFound(MaasError):
     def __init__(self, data):
         self.message = "Partition - {0} - not found".format(data)
         super(PartitionNotFound, self).__init__(self.message)
+
+
+class WaitTimeout(MaasError):
+    def __init__(self, data):
+        self.message = "Timed out waiting for - {0}".format(data)
+        super(WaitTimeout, self).__init__(self.message)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import os
+import tempfile
+
+
+def get_key(*parts):
+    # File name for data identified by parts, such as a URL and the user
+    # that can see it.
+    return hashlib.sha256(
+        "\0".join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def write_atomic(path, data):
+    """
+    Replaces the content of the file at path with data.
+
+    The data is written to a temporary file in the same directory that then
+    replaces the file, so processes reading the file never see a partially
+    written one. A missing directory is created, readable only by the
+    current user. Raises OSError if the file cannot be written.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
@@ -7,34 +7,138 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import os
 import random
 
 from .errors import MaasError
 
+# Number of bytes read from file values at once.
+CHUNK_SIZE = 64 * 1024
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def _file_size(value):
+    # Number of bytes left in the file, the position is left unchanged.
+    start = value.tell()
+    value.seek(0, os.SEEK_END)
+    size = value.tell() - start
+    value.seek(start)
+    return start, size
+
+
+class MultipartBody:
+    """
+    Multipart/form-data request body.
+
+    The body is described once as a list of parts: encoded headers and
+    values, plus (file, offset, size) references for file values. Its length
+    is known up front and iterating over it yields the body chunk by chunk,
+    reading files only while the body is being sent. The body can be iterated
+    more than once, so a request can be retried with the same body.
+    """
+
+    def __init__(self, fields, boundary):
+        self.boundary = boundary
+        self._parts = []
+        self._length = 0
+        for key, value in fields:
+            disposition = f'Content-Disposition: form-data; name="{key}"'
+            if hasattr(value, "read"):
+                filename = os.path.basename(str(getattr(value, "name", key)))
+                self._add(
+                    f"--{boundary}\r\n{disposition}; "
+                    f'filename="{filename}"\r\n'
+                    "Content-Type: application/octet-stream\r\n\r\n"
+                )
+                start, size = _file_size(value)
+                self._parts.append((value, start, size))
+                self._length += size
+            else:
+                self._add(f"--{boundary}\r\n{disposition}\r\n\r\n")
+                self._add(_to_bytes(value))
+            self._add("\r\n")
+        self._add(f"--{boundary}--")
+
+    def _add(self, chunk):
+        chunk = _to_bytes(chunk)
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary="{self.boundary}"'
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            value, start, size = part
+            value.seek(start)
+            while size > 0:
+                chunk = _to_bytes(value.read(min(size, CHUNK_SIZE)))
+                if not chunk:
+                    raise MaasError(
+                        "File - {0} - changed while it was being sent.".format(
+                            getattr(value, "name", value)
+                        )
+                    )
+                size -= len(chunk)
+                yield chunk
+
+    def __bytes__(self):
+        return b"".join(self)
+
 
 class Multipart:
     SAFE_CHARS = "0123456789abcdefghijklmnoprstuvzABCDEFGHIJKLMNOPRSTUVZ"
-    RN = "\r\n"
 
     @staticmethod
     def generate_boundary():
-        boundary = ""
-        for i in range(0, 32):
-            boundary += random.choice(Multipart.SAFE_CHARS)
-        return boundary
+        return "".join(random.choice(Multipart.SAFE_CHARS) for i in range(32))
+
+    @staticmethod
+    def get_fields(data):
+        """
+        Returns form fields as a list of (name, value) pairs.
+
+        Data is either a dict or a list of (name, value) pairs. Names can
+        repeat in a list of pairs, and list values are sent as repeated
+        fields with the same name. Values are str, bytes, file-like objects
+        or anything else that is sent as its str() representation.
+        """
+        if isinstance(data, dict):
+            pairs = data.items()
+        elif isinstance(data, (list, tuple)) and all(
+            isinstance(pair, (list, tuple)) and len(pair) == 2 for pair in data
+        ):
+            pairs = data
+        else:
+            raise MaasError(
+                "Data should be a dict or a list of (key, value) pairs!"
+            )
+
+        fields = []
+        for k, v in pairs:
+            for item in v if isinstance(v, (list, tuple)) else [v]:
+                fields.append((k, item))
+        return fields
+
+    @staticmethod
+    def encode(data):
+        return MultipartBody(
+            Multipart.get_fields(data), Multipart.generate_boundary()
+        )
 
     @staticmethod
     def get_mulipart(data):
-        rn = Multipart.RN
-        boundary = Multipart.generate_boundary()
-        if not isinstance(data, dict):
-            raise MaasError("Data should be dict!")
-
-        content = ""
-        for k, v in data.items():
-            content += f"--{boundary}{rn}"
-            content += f'Content-Disposition: form-data; name="{k}"{rn}{rn}'
-            content += str(v)
-            content += rn
-        content += f"--{boundary}--"
-        return boundary, content.encode("utf-8")
+        body = Multipart.encode(data)
+        return body.boundary, bytes(body)
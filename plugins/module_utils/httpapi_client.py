@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import time
+
+from ansible.module_utils.connection import ConnectionError
+
+from .client import Client, Response
+from .errors import AuthError, MaasError, RequestFailed
+from .form import Multipart
+
+# Codes of the errors the httpapi plugin reports through the persistent
+# connection, so that HttpApiClient raises the same errors as Client.
+ERROR_CODES = ((AuthError, 1), (RequestFailed, 2), (MaasError, 3))
+
+
+def get_error_code(error):
+    for cls, code in ERROR_CODES:
+        if isinstance(error, cls):
+            return code
+    raise AssertionError("Not a MaasError: {0!r}".format(error))
+
+
+def get_error_class(code):
+    # Errors without a code did not reach the plugin, for example because
+    # the persistent connection socket could not be reached.
+    if code is None:
+        return RequestFailed
+    for cls, error_code in ERROR_CODES:
+        if code == error_code:
+            return cls
+    return MaasError
+
+
+def encode_bytes(data):
+    # The persistent connection exchanges JSON, so bytes travel as base64.
+    return None if data is None else base64.b64encode(data).decode("ascii")
+
+
+def decode_bytes(data):
+    return None if data is None else base64.b64decode(data)
+
+
+class HttpApiClient(Client):
+    """
+    Client that sends requests through the maas.maas.maas httpapi plugin.
+
+    The requests are sent by a Client that lives in Ansible's persistent
+    connection process, so its connections, response cache and retry and
+    rate limits are shared by all tasks that use the same connection. The
+    module only needs the connection, not the MAAS credentials, and has no
+    transport of its own to configure.
+    """
+
+    def __init__(self, connection, trace=None):
+        self.connection = connection  # ansible.module_utils.connection
+        self._setup("", pool_maxsize=0, trace=trace)
+
+    def request(
+        self,
+        method,
+        path,
+        query=None,
+        data=None,
+        headers=None,
+        binary_data=None,
+        timeout=None,
+    ):
+        started = time.perf_counter()
+        try:
+            result = self.connection.send_request(
+                data,
+                method=method,
+                path=path,
+                query=query,
+                headers=headers,
+                binary_data=encode_bytes(binary_data),
+                timeout=timeout,
+            )
+        except ConnectionError as e:
+            raise get_error_class(getattr(e, "code", None))(str(e))
+        # Wrong username/password, or expired access token
+        if result["status"] == 401:
+            raise AuthError(
+                "Failed to authenticate with the instance: {0} {1}".format(
+                    result["status"], decode_bytes(result["data"])
+                ),
+            )
+        response = Response(
+            result["status"],
+            decode_bytes(result["data"]),
+            result["headers"],
+            result["ttfb"],
+            result["bytes_received"],
+        )
+        body = binary_data
+        if data is not None and self.trace is not None:
+            # Same body as the one the plugin's Client sends.
+            body = Multipart.encode(data)
+        self._trace(method, path, body, response, started)
+        return response
+
+    def iter_records(self, path, query=None, timeout=None):
+        # Responses cannot be streamed through the persistent connection.
+        return iter(self.get(path, query=query, timeout=timeout).json)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import codecs
+import json
+
+from .errors import MaasError
+
+_WHITESPACE = " \t\n\r"
+
+
+def _invalid(data):
+    return MaasError("Received invalid JSON response: {0}".format(data))
+
+
+class _Reader:
+    # Text buffer over byte chunks. Only the part of the document that was
+    # not parsed yet is kept.
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            chunk, self.eof = b"", True
+        try:
+            text = self._text.decode(chunk, final=self.eof)
+        except UnicodeDecodeError as e:
+            raise _invalid(e)
+        self.buf = self.buf[self.pos :] + text
+        self.pos = 0
+
+    def peek(self):
+        # Returns the next non-whitespace character or None at the end.
+        while True:
+            while (
+                self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return None
+            self.read_more()
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise _invalid(self.buf[self.pos : self.pos + 100])
+        self.pos += 1
+        return char
+
+    def value(self, decoder):
+        self.peek()  # raw_decode does not skip leading whitespace.
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer can continue in the next
+                # chunk, so a value is only complete once something follows.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                # Most likely the value is not received completely yet.
+                if self.eof:
+                    raise _invalid(self.buf[self.pos : self.pos + 100])
+            self.read_more()
+
+
+def iter_array(chunks):
+    """
+    Yields the items of a JSON array as soon as they are received.
+
+    chunks is an iterable of bytes, for example a DecodedBody. Only the item
+    that is currently being received is buffered, so the whole document is
+    never held in memory, neither as bytes nor as parsed objects.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(chunks)
+    if reader.peek() != "[":
+        raise MaasError(
+            "Expected a JSON list, received: {0}".format(
+                reader.buf[reader.pos : reader.pos + 100]
+            )
+        )
+    reader.pos += 1
+    if reader.peek() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.value(decoder)
+            if reader.expect(",]") == "]":
+                break
+    if reader.peek() is not None:
+        raise _invalid(reader.buf[reader.pos : reader.pos + 100])
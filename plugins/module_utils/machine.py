@@ -15,9 +15,16 @@ from ..module_utils import errors
 from ..module_utils.client import Client
 from ..module_utils.disk import Disk
 from ..module_utils.network_interface import NetworkInterface
+from ..module_utils.polling import Polling
 from ..module_utils.rest_client import RestClient
 from ..module_utils.state import MachineTaskState
-from ..module_utils.utils import MaasValueMapper, get_query
+from ..module_utils.utils import (
+    MaasValueMapper,
+    fqdn_to_query,
+    get_query,
+)
+
+DEFAULT_DEPLOY_TIMEOUT = 60  # seconds
 
 
 class Machine(MaasValueMapper):
@@ -85,10 +92,14 @@ class Machine(MaasValueMapper):
             return machine_from_maas
 
     @classmethod
-    def get_id_from_fqdn(cls, client, *fqdns):
-        all_machines = client.get("/api/2.0/machines/").json
+    def get_id_from_fqdn(cls, client, *fqdns, summary=False):
+        if not fqdns:
+            return []
+        all_machines = client.get(
+            "/api/2.0/machines/", query=fqdn_to_query(*fqdns)
+        ).json
         machine_list = [
-            cls.from_maas(machine)
+            cls.from_maas(machine, summary=summary)
             for machine in all_machines
             if machine["fqdn"] in fqdns
         ]
@@ -124,7 +135,10 @@ class Machine(MaasValueMapper):
             "vm_host"
         ):
             raise errors.MaasError("hostname or vm_host parameter missing.")
-        maas_list = client.get("/api/2.0/machines/").json
+        maas_list = client.get(
+            "/api/2.0/machines/",
+            query=dict(hostname=module.params["hostname"]),
+        ).json
         for maas_dict in maas_list:
             if (
                 maas_dict["hostname"] == module.params["hostname"]
@@ -146,11 +160,13 @@ class Machine(MaasValueMapper):
             raise errors.MachineNotFound(id)
 
     @classmethod
-    def get_by_tag(cls, client, tag_name):
+    def get_by_tag(cls, client, tag_name, summary=False):
         # Returns list of machines with the tag_name or empty list
-        all_machines = client.get("/api/2.0/machines/").json
+        all_machines = client.get(
+            "/api/2.0/machines/", query=dict(tags=tag_name)
+        ).json
         machine_list = [
-            cls.from_maas(machine)
+            cls.from_maas(machine, summary=summary)
             for machine in all_machines
             if tag_name in machine["tag_names"]
         ]
@@ -177,18 +193,25 @@ class Machine(MaasValueMapper):
         return obj
 
     @classmethod
-    def from_maas(cls, maas_dict):
+    def from_maas(cls, maas_dict, summary=False):
+        # With summary=True only the fields needed to identify a machine and
+        # its placement are read. Network interfaces, disks and the rest of
+        # the attributes are left unset, which avoids parsing the nested
+        # interface and block device lists of every machine in a list.
         obj = cls()
         try:
             obj.fqdn = maas_dict["fqdn"]
             obj.hostname = maas_dict["hostname"]
             obj.id = maas_dict["system_id"]
-            obj.memory = maas_dict["memory"]
-            obj.cores = maas_dict["cpu_count"]
             obj.domain = maas_dict["domain"]["id"]
             obj.zone = maas_dict["zone"]["id"]
             obj.pool = maas_dict["pool"]["id"]
             obj.tags = maas_dict["tag_names"]
+            obj.status = maas_dict["status_name"]
+            if summary:
+                return obj
+            obj.memory = maas_dict["memory"]
+            obj.cores = maas_dict["cpu_count"]
             obj.network_interfaces = [
                 NetworkInterface.from_maas(net_interface)
                 for net_interface in maas_dict["interface_set"] or []
@@ -197,7 +220,6 @@ class Machine(MaasValueMapper):
                 Disk.from_maas(disk)
                 for disk in maas_dict["blockdevice_set"] or []
             ]
-            obj.status = maas_dict["status_name"]
             obj.osystem = maas_dict["osystem"]
             obj.distro_series = maas_dict["distro_series"]
             obj.hwe_kernel = maas_dict["hwe_kernel"]
@@ -293,6 +315,38 @@ class Machine(MaasValueMapper):
             )
         return payload
 
+    @staticmethod
+    def payload_for_allocate(module):
+        payload = {}
+        allocate_params = module.params["allocate_params"] or {}
+        if allocate_params.get("min_cpu_count"):
+            payload["cpu_count"] = allocate_params["min_cpu_count"]
+        if allocate_params.get("min_memory"):
+            payload["mem"] = allocate_params["min_memory"]
+        for key in ("zone", "pool", "tags"):
+            if allocate_params.get(key):
+                payload[key] = allocate_params[key]
+        network_interfaces = module.params.get("network_interfaces") or {}
+        name = network_interfaces.get("name")
+        subnet_cidr = network_interfaces.get("subnet_cidr")
+        if name and subnet_cidr:
+            interface = f"{name}:subnet_cidr={subnet_cidr}"
+            if network_interfaces.get("ip_address"):
+                interface += f",ip={network_interfaces['ip_address']}"
+            payload["interfaces"] = interface
+        return payload
+
+    @staticmethod
+    def payload_for_deploy(module):
+        # Returns the payload and the timeout of the deploy request.
+        payload = {}
+        deploy_params = module.params["deploy_params"] or {}
+        for key in ("distro_series", "hwe_kernel", "user_data"):
+            if deploy_params.get(key):
+                payload[key] = deploy_params[key]
+        timeout = deploy_params.get("timeout") or DEFAULT_DEPLOY_TIMEOUT
+        return payload, timeout
+
     def find_nic_by_mac(self, mac):
         # returns nic object or None
         for nic_obj in self.network_interfaces:
@@ -328,16 +382,19 @@ class Machine(MaasValueMapper):
         )
 
     @classmethod
-    def wait_for_state(cls, id, client: Client, check_mode=False, *states):
+    def wait_for_state(
+        cls, id, client: Client, check_mode=False, *states, polling=None
+    ):
         if check_mode:
             return  # add mocked machine when needed
+        delays = (polling or Polling()).delays()
         while True:
             try:
                 maas_dict = client.get(f"/api/2.0/machines/{id}/").json
             except errors.MaasError:
                 raise errors.MachineNotFound(id)
 
-            if maas_dict["status_name"] in states:  # IMPLEMENT TIMEOUT?
+            if maas_dict["status_name"] in states:
                 return cls.from_maas(maas_dict)
             if maas_dict["status_name"] in [
                 MachineTaskState.failed_comissioning.value,
@@ -347,7 +404,13 @@ class Machine(MaasValueMapper):
                 raise errors.MaasError(
                     f"Machine - {maas_dict['hostname']} - Failed to commission or deploy"
                 )
-            sleep(10)
+            delay = next(delays, None)
+            if delay is None:
+                raise errors.WaitTimeout(
+                    f"machine {maas_dict['hostname']} to reach state {' or '.join(states)}, "
+                    f"currently {maas_dict['status_name']}"
+                )
+            sleep(delay)
 
     def deploy(self, client, payload, timeout=20):
         return client.post(
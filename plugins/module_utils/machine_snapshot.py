@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import tempfile
+import time
+
+from .file_cache import get_key, write_atomic
+
+DEFAULT_SNAPSHOT_MAX_AGE = 86400  # seconds
+
+
+def get_default_snapshot_dir():
+    return os.path.join(
+        tempfile.gettempdir(),
+        "ansible-maas-{0}".format(os.getuid()),
+        "snapshots",
+    )
+
+
+class MachineSnapshot:
+    """
+    On-disk snapshot of a machine list and the last MAAS event it reflects.
+
+    A snapshot lets the inventory ask MAAS only for the machines that changed
+    since the event. Snapshots older than max_age seconds are not used, so
+    changes that MAAS does not record as events are picked up eventually.
+    Each snapshot is a JSON file that is replaced atomically. A snapshot
+    that cannot be read is treated as missing and one that cannot be written
+    is skipped, the machines are then downloaded in full.
+    """
+
+    def __init__(self, path, max_age=DEFAULT_SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+
+    @staticmethod
+    def get_key(host, *identity):
+        # Different users and filters see different machines.
+        return get_key(host, *identity)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, key):
+        """Returns the (event_id, created, machines) of a snapshot or None."""
+        try:
+            with open(self._entry_path(key), "r") as f:
+                data = json.load(f)
+            entry = data["event_id"], data["created"], data["machines"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if time.time() - entry[1] > self.max_age:
+            return None
+        return entry
+
+    def set(self, key, event_id, created, machines):
+        data = dict(event_id=event_id, created=created, machines=machines)
+        try:
+            write_atomic(
+                self._entry_path(key), json.dumps(data).encode("utf-8")
+            )
+        except OSError:
+            pass
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class Metrics:
+    """
+    Collects the traces of the requests sent to MAAS during a task.
+
+    An instance is used as the Client trace hook. Every trace is a dict with
+    the method, path, status, bytes_sent, bytes_received (as transferred,
+    possibly compressed), bytes_uncompressed, ttfb (time to the first byte of
+    the response) and time (total time) of a request. Times are in seconds.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, trace):
+        self.requests.append(trace)
+
+    @property
+    def totals(self):
+        return dict(
+            requests=len(self.requests),
+            bytes_sent=sum(r["bytes_sent"] for r in self.requests),
+            bytes_received=sum(r["bytes_received"] for r in self.requests),
+            bytes_uncompressed=sum(
+                r["bytes_uncompressed"] for r in self.requests
+            ),
+            time=round(sum(r["time"] for r in self.requests), 6),
+        )
+
+    def to_ansible(self):
+        return dict(requests=list(self.requests), totals=self.totals)
+
+    def instrument(self, module):
+        # Adds the metrics under the maas_metrics key to whatever result the
+        # module ends with, so modules do not need to handle it themselves.
+        def wrap(end):
+            def end_with_metrics(**result):
+                result["maas_metrics"] = self.to_ansible()
+                end(**result)
+
+            return end_with_metrics
+
+        module.exit_json = wrap(module.exit_json)
+        module.fail_json = wrap(module.fail_json)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import random
+import time
+
+from .errors import MaasError
+
+
+class Polling:
+    """
+    Describes how often to poll MAAS while waiting for something to happen.
+
+    The first poll is repeated after interval seconds. Every following delay
+    is backoff times longer, up to max_interval seconds, and randomized by
+    +/- jitter (a fraction of the delay) so that many waiters do not poll in
+    lockstep. If timeout is set, waiting stops timeout seconds after the
+    polling is started. All waits that use the same Polling share that
+    deadline.
+    """
+
+    def __init__(
+        self, interval=1, backoff=2, max_interval=10, jitter=0.1, timeout=None
+    ):
+        if interval <= 0:
+            raise MaasError("Polling interval must be greater than 0.")
+        if backoff < 1:
+            raise MaasError("Polling backoff must be at least 1.")
+        if max_interval <= 0:
+            raise MaasError("Polling max_interval must be greater than 0.")
+        if not 0 <= jitter < 1:
+            raise MaasError(
+                "Polling jitter must be at least 0 and less than 1."
+            )
+        if timeout is not None and timeout < 0:
+            raise MaasError("Polling timeout must not be negative.")
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.deadline = None
+
+    @classmethod
+    def from_ansible(cls, module):
+        """
+        Returns a started Polling, so that the timeout covers the whole task.
+        """
+        params = module.params.get("polling") or {}
+        return cls(
+            **dict((k, v) for k, v in params.items() if v is not None)
+        ).start()
+
+    def start(self):
+        """Starts counting down the timeout, unless it is running already."""
+        if self.deadline is None and self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        return self
+
+    def delays(self):
+        """
+        Yields the number of seconds to sleep before the next poll.
+
+        Stops once the deadline has passed. The last delay is shortened so
+        that the final poll happens right at the deadline.
+        """
+        self.start()
+        interval = self.interval
+        while True:
+            delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            if self.deadline is not None:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                delay = min(delay, remaining)
+            yield delay
+            interval = min(interval * self.backoff, self.max_interval)
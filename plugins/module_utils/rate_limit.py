@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+from .errors import MaasError
+
+
+def get_default_lock_dir():
+    return os.path.join(
+        tempfile.gettempdir(), "ansible-maas-{0}".format(os.getuid())
+    )
+
+
+class RateLimiter:
+    """
+    Limits the requests all processes on this node send to a MAAS region.
+
+    Ansible runs every task in a separate worker process, so the state of
+    the limiter is kept in files in lock_dir, shared by all limiters with
+    the same key. Requests are spread out with a token bucket that lets
+    through rate requests per second on average, with bursts of up to burst
+    requests. At most max_in_flight requests are sent at the same time, each
+    of them holding a lock on one of max_in_flight slot files. The operating
+    system releases the locks of processes that die.
+
+    Either limit is disabled if it is not set.
+    """
+
+    def __init__(self, lock_dir, key, rate=None, burst=1, max_in_flight=None):
+        if rate is not None and rate <= 0:
+            raise MaasError("Rate limit rate must be greater than 0.")
+        if burst < 1:
+            raise MaasError("Rate limit burst must be at least 1.")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise MaasError("Rate limit max_in_flight must be at least 1.")
+        self.lock_dir = lock_dir
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+
+    @staticmethod
+    def get_key(host):
+        return hashlib.sha256(host.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, name):
+        return os.path.join(self.lock_dir, "{0}.{1}".format(self.key, name))
+
+    def _open(self, name):
+        return os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _take_token(self):
+        # Returns the number of seconds until a token is available, or 0 if
+        # a token was taken.
+        with os.fdopen(self._open("bucket"), "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                state = json.loads(f.read())
+            except ValueError:
+                state = {}
+            now = time.time()
+            elapsed = max(now - state.get("updated", now), 0)
+            tokens = min(
+                self.burst,
+                state.get("tokens", self.burst) + elapsed * self.rate,
+            )
+            wait = 0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(dict(tokens=tokens, updated=now)))
+        return wait
+
+    def _acquire_slot(self):
+        # Returns the descriptor of a locked slot file. Closing it releases
+        # the slot.
+        for i in range(self.max_in_flight):
+            fd = self._open("slot{0}".format(i))
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        # All slots are taken. Sleep in the kernel until a random one is
+        # released instead of polling the files. The wait is bounded by the
+        # request its holder is sending, which is bounded by its timeout.
+        fd = self._open("slot{0}".format(random.randrange(self.max_in_flight)))
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @contextmanager
+    def limit(self):
+        """Waits until a request may be sent and holds its slot meanwhile."""
+        try:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+        except OSError as e:
+            raise MaasError(
+                "Cannot create the lock directory {0}: {1}".format(
+                    self.lock_dir, e
+                )
+            )
+        slot = self._acquire_slot() if self.max_in_flight else None
+        try:
+            while self.rate:
+                wait = self._take_token()
+                if not wait:
+                    break
+                time.sleep(wait)
+            yield
+        finally:
+            if slot is not None:
+                os.close(slot)
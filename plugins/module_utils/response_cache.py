@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+
+from .file_cache import get_key, write_atomic
+
+DEFAULT_CACHE_MAX_SIZE = 100  # MiB
+
+
+class CachedResponse:
+    def __init__(self, data, headers):
+        self.data = data
+        self.headers = headers
+
+    @property
+    def validators(self):
+        # Request headers that ask MAAS to only send changed content.
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk cache of GET responses that MAAS can revalidate.
+
+    Only responses with an ETag or Last-Modified header are stored. Entries
+    are never used without asking MAAS first, they only save transferring
+    content that did not change. Each entry is a file with a JSON line of
+    response headers followed by the body. Files are replaced atomically, so
+    parallel tasks can share the directory. When the directory grows over
+    max_size bytes, least recently used entries are removed.
+
+    The cache is an optimization only: errors while reading or writing it
+    are ignored.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_CACHE_MAX_SIZE * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+
+    @staticmethod
+    def get_key(url, *identity):
+        # Different users can see different content at the same URL.
+        return get_key(url, *identity)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key)
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                headers = json.loads(f.readline().decode("utf-8"))
+                data = f.read()
+            os.utime(path)  # Mark as recently used.
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(data, headers)
+
+    def set(self, key, response):
+        headers = dict(
+            (k, v)
+            for k, v in response.headers.items()
+            if k in ("etag", "last-modified", "content-type")
+        )
+        if not ("etag" in headers or "last-modified" in headers):
+            return
+        data = response.data
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        try:
+            write_atomic(
+                self._entry_path(key),
+                json.dumps(headers).encode("utf-8") + b"\n" + data,
+            )
+            self.prune()
+        except OSError:
+            pass
+
+    def prune(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
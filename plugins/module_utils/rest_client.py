@@ -5,10 +5,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+from concurrent.futures import ThreadPoolExecutor
+
 from . import errors, utils
 
 __metaclass__ = type
 
+# Requests a single task sends to MAAS at the same time with execute_many.
+DEFAULT_MAX_WORKERS = 4
+
 
 def _query(original=None):
     # Make sure the query isn't equal to None
@@ -16,18 +21,101 @@ def _query(original=None):
     return dict(original or {})
 
 
+# Query keys the MAAS API can filter on when listing an endpoint, mapped to
+# the name of the matching list filter. Keys missing here are filtered
+# locally, after the records are downloaded.
+SERVER_SIDE_FILTERS = {
+    "/api/2.0/machines/": dict(
+        hostname="hostname",
+        id="id",
+        system_id="id",
+        mac_address="mac_address",
+        domain="domain",
+        zone="zone",
+        pool="pool",
+        status="status",
+        tags="tags",
+    ),
+}
+
+
+def split_query(endpoint, query):
+    """Splits query into the part MAAS filters on and the part we filter on.
+
+    A fqdn cannot be filtered on directly, but its hostname and domain can,
+    which leaves at most a handful of records for the local fqdn check.
+    """
+    server_filters = SERVER_SIDE_FILTERS.get(endpoint, {})
+    server_query, local_query = {}, {}
+    for key, value in (query or {}).items():
+        if key in server_filters:
+            server_query[server_filters[key]] = value
+        else:
+            local_query[key] = value
+    if "fqdn" in local_query and "hostname" in server_filters:
+        for key, value in utils.fqdn_to_query(local_query["fqdn"]).items():
+            server_query.setdefault(server_filters[key], value)
+    return server_query, local_query
+
+
 class RestClient:
     def __init__(self, client):
         self.client = client
 
     def list_records(self, endpoint, query=None, timeout=None):
-        """Results are obtained so that first off, all records are obtained and
-        then filtered manually"""
+        """Query keys listed in SERVER_SIDE_FILTERS are sent to MAAS as list
+        filters, so only matching records are downloaded. The remaining keys
+        are used to filter the obtained records manually."""
+        server_query, local_query = split_query(endpoint, query)
         try:
-            records = self.client.get(path=endpoint, timeout=timeout).json
+            records = self.client.get(
+                path=endpoint, query=server_query or None, timeout=timeout
+            ).json
         except TimeoutError as e:
             raise errors.MaasError(f"Request timed out: {e}")
-        return utils.filter_results(records, query)
+        return utils.filter_results(records, local_query)
+
+    def iter_records(self, endpoint, query=None, timeout=None):
+        """Same as list_records, but yields the records while the response
+        is received, so even very long lists are processed with bounded
+        memory."""
+        server_query, local_query = split_query(endpoint, query)
+        try:
+            for record in self.client.iter_records(
+                endpoint, query=server_query or None, timeout=timeout
+            ):
+                if utils.is_superset(record, local_query):
+                    yield record
+        except TimeoutError as e:
+            raise errors.MaasError(f"Request timed out: {e}")
+
+    def execute_many(self, func, items, max_workers=DEFAULT_MAX_WORKERS):
+        """Calls func for each of the items concurrently.
+
+        func sends the requests for a single item, and the requests for
+        different items must not depend on each other. Returns the results
+        in the order of items. If some calls fail, the rest still run to
+        completion and a BatchError with all the failures is raised.
+        """
+        items = list(items)
+
+        def call(item):
+            try:
+                return func(item), None
+            except errors.MaasError as e:
+                return None, e
+
+        if len(items) <= 1:
+            outcomes = [call(item) for item in items]
+        else:
+            workers = min(max_workers, len(items))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(call, items))
+
+        failures = [error for _result, error in outcomes if error is not None]
+        if failures:
+            raise errors.BatchError(failures, len(items))
+        return [result for result, _error in outcomes]
 
     def get_record(self, endpoint, query=None, must_exist=False, timeout=None):
         records = self.list_records(
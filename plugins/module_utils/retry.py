@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import itertools
+
+from .connection_pool import IDEMPOTENT_METHODS
+from .polling import Polling
+
+# MAAS answers with 409 while a node is locked by another operation, and
+# with 502-504 while a region controller fails over.
+DEFAULT_RETRY_STATUSES = (409, 502, 503, 504)
+
+# POST operations that leave MAAS in the same state when sent twice.
+SAFE_POST_OPS = (
+    "add_tag",
+    "remove_tag",
+    "set_boot_disk",
+    "set_default",
+    "update_nodes",
+)
+
+
+class RetryPolicy:
+    """
+    Describes which failed requests are sent to MAAS again and when.
+
+    Requests that could not be sent or received, and requests answered with
+    one of the statuses, are retried up to retries times. Waits between the
+    attempts grow the same way as with Polling, starting at interval seconds.
+    A Retry-After header from MAAS is respected up to max_interval seconds.
+    No attempt is made after max_time seconds of retrying.
+
+    Only idempotent methods and the POST operations in safe_post_ops are
+    retried, since other requests might have been processed by MAAS even if
+    their response got lost.
+    """
+
+    def __init__(
+        self,
+        retries=3,
+        interval=1,
+        backoff=2,
+        max_interval=10,
+        jitter=0.1,
+        max_time=60,
+        statuses=DEFAULT_RETRY_STATUSES,
+        safe_post_ops=SAFE_POST_OPS,
+    ):
+        self.retries = retries
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_time = max_time
+        self.statuses = tuple(statuses)
+        self.safe_post_ops = tuple(safe_post_ops)
+
+    @classmethod
+    def from_ansible(cls, params):
+        return cls(**dict((k, v) for k, v in params.items() if v is not None))
+
+    def allows(self, method, query=None):
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return method == "POST" and (query or {}).get("op") in (
+            self.safe_post_ops
+        )
+
+    def delays(self):
+        """Yields the number of seconds to wait before each retry."""
+        polling = Polling(
+            self.interval,
+            self.backoff,
+            self.max_interval,
+            self.jitter,
+            self.max_time,
+        )
+        return itertools.islice(polling.delays(), self.retries)
+
+    def get_delay(self, delay, retry_after=None):
+        # Retry-After is either a number of seconds or a date. Dates are not
+        # worth parsing, MAAS only sends seconds.
+        try:
+            requested = float(retry_after)
+        except (TypeError, ValueError):
+            return delay
+        return min(max(delay, requested), self.max_interval)
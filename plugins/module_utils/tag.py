@@ -12,17 +12,10 @@ from ..module_utils import errors
 
 class Tag:
     @staticmethod
-    def send_tag_request(client, machine_id, tag_name):
-        payload = dict(add=machine_id)
-        client.post(
-            f"/api/2.0/tags/{tag_name}/",
-            query={"op": "update_nodes"},
-            data=payload,
-        ).json
-
-    @staticmethod
-    def send_untag_request(client, machine_id, tag_name):
-        payload = dict(remove=machine_id)
+    def send_update_nodes_request(client, tag_name, add=(), remove=()):
+        # update_nodes accepts any number of repeated add and remove fields,
+        # so all membership changes of a tag are sent in a single request.
+        payload = dict(add=list(add), remove=list(remove))
         client.post(
             f"/api/2.0/tags/{tag_name}/",
             query={"op": "update_nodes"},
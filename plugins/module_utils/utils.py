@@ -97,6 +97,23 @@ def transform_query(raw_query, query_map):
     return {query_map[key]: raw_query[key] for key, value in raw_query.items()}
 
 
+def fqdn_to_query(*fqdns):
+    # Builds the hostname and domain list filters matching the given fqdns.
+    # "host.example.com" -> {"hostname": ["host"], "domain": ["example.com"]}
+    hostnames, domains = [], []
+    for fqdn in fqdns:
+        hostname, _dot, domain = fqdn.partition(".")
+        if hostname not in hostnames:
+            hostnames.append(hostname)
+        if domain not in domains:
+            domains.append(domain)
+    query = dict(hostname=hostnames)
+    # A bare hostname can live in any domain.
+    if "" not in domains:
+        query["domain"] = domains
+    return query
+
+
 def is_changed(before, after):
     return not before == after
 
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from time import sleep
+
+from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
+from ..module_utils.state import MachineTaskState
+
+# Number of system ids sent in a single list request, which keeps the
+# request URL at a size every web server accepts.
+MAX_IDS_PER_REQUEST = 200
+
+FAILED_STATES = (
+    MachineTaskState.failed_comissioning.value,
+    MachineTaskState.failed_deployment.value,
+    MachineTaskState.failed_testing.value,
+)
+
+
+class MachineWaiter:
+    """
+    Waits for many machines at once.
+
+    Instead of polling every machine separately, each poll lists all pending
+    machines in a single request filtered by their system ids. A machine is
+    resolved as soon as it reaches one of its target states; it fails if it
+    ends up in a failed state, disappears or the polling deadline passes.
+    """
+
+    def __init__(self, client, polling=None):
+        self.client = client
+        self.polling = polling or Polling()
+        self.targets = {}  # system_id -> target states
+        self.results = {}  # system_id -> Machine
+        self.failures = {}  # system_id -> error message
+
+    def add(self, system_id, *states):
+        self.targets[system_id] = states
+        self.results.pop(system_id, None)
+        self.failures.pop(system_id, None)
+
+    @property
+    def pending(self):
+        return [
+            system_id
+            for system_id in self.targets
+            if system_id not in self.results and system_id not in self.failures
+        ]
+
+    def _list(self, system_ids):
+        records = []
+        for i in range(0, len(system_ids), MAX_IDS_PER_REQUEST):
+            records.extend(
+                self.client.get(
+                    "/api/2.0/machines/",
+                    query=dict(id=system_ids[i : i + MAX_IDS_PER_REQUEST]),
+                ).json
+            )
+        return records
+
+    def poll(self):
+        """Checks all pending machines once. Returns ids still pending."""
+        pending = self.pending
+        if not pending:
+            return pending
+        found = set()
+        for maas_dict in self._list(pending):
+            system_id = maas_dict["system_id"]
+            if system_id not in self.targets:
+                continue
+            found.add(system_id)
+            status = maas_dict["status_name"]
+            if status in self.targets[system_id]:
+                self.results[system_id] = Machine.from_maas(maas_dict)
+            elif status in FAILED_STATES:
+                self.failures[system_id] = (
+                    f"Machine - {maas_dict['hostname']} - {status}"
+                )
+        for system_id in pending:
+            if system_id not in found:
+                self.failures[system_id] = f"Machine - {system_id} - not found"
+        return self.pending
+
+    def wait(self):
+        """Polls until every machine is resolved or the deadline passes."""
+        delays = self.polling.delays()
+        while self.poll():
+            delay = next(delays, None)
+            if delay is None:
+                for system_id in self.pending:
+                    self.failures[system_id] = (
+                        "Timed out waiting for - machine {0} to reach "
+                        "state {1}".format(
+                            system_id, " or ".join(self.targets[system_id])
+                        )
+                    )
+                break
+            sleep(delay)
+        return self.results, self.failures
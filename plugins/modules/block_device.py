@@ -228,40 +228,53 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.block_device import BlockDevice
 from ..module_utils.client import Client
+from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
 from ..module_utils.partition import Partition
+from ..module_utils.rest_client import RestClient
+
+
+def configure_partition(client, partition, new_partition):
+    if partition["fs_type"]:
+        data = {}
+        data["fstype"] = partition["fs_type"]
+        if partition["label"]:
+            data["label"] = partition["label"]
+        new_partition.format(client, data)
+        if partition["mount_point"]:  # used only if the partition is formatted
+            data = {}
+            data["mount_point"] = partition["mount_point"]
+            if partition["mount_options"]:
+                data["mount_options"] = partition["mount_options"]
+            new_partition.mount(client, data)
+    if partition["tags"]:
+        for tag in partition["tags"]:
+            new_partition.add_tag(client, tag)
 
 
 def create_partitions(module, client, block_device):
     if module.params["partitions"]:
+        # Partitions are laid out in the order they are created, so they are
+        # created one by one. Each one is then configured independently.
+        new_partitions = []
         for partition in module.params["partitions"]:
             data = {}
             if partition["size_gigabytes"]:
                 data["size"] = partition["size_gigabytes"] * 1024 * 1024 * 1024
             if partition["bootable"]:
                 data["bootable"] = partition["bootable"]
-            new_partition = Partition.create(client, block_device, data)
-            if partition["fs_type"]:
-                data = {}
-                data["fstype"] = partition["fs_type"]
-                if partition["label"]:
-                    data["label"] = partition["label"]
-                new_partition.format(client, data)
-                if partition[
-                    "mount_point"
-                ]:  # used only if the partition is formatted
-                    data = {}
-                    data["mount_point"] = partition["mount_point"]
-                    if partition["mount_options"]:
-                        data["mount_options"] = partition["mount_options"]
-                    new_partition.mount(client, data)
-            if partition["tags"]:
-                for tag in partition["tags"]:
-                    new_partition.add_tag(client, tag)
+            new_partitions.append(
+                (partition, Partition.create(client, block_device, data))
+            )
+        RestClient(client).execute_many(
+            lambda item: configure_partition(client, *item), new_partitions
+        )
 
 
 def create_tags(module, client, block_device):
     if module.params["tags"]:
+        # MAAS saves the whole tag list of the device on every change, so
+        # concurrent changes would overwrite each other.
         for tag in module.params["tags"]:
             block_device.add_tag(client, tag)
 
@@ -329,6 +342,8 @@ def must_update_partitions(module, block_device):
 
 def delete_partitions(client, block_device):
     if block_device.partitions:  # if partitions exist, delete them
+        # Partitions of one partition table are not independent, so they
+        # are deleted one by one.
         for partition in block_device.partitions:
             partition.delete(client)
 
@@ -479,13 +494,7 @@ def main():
     )
 
     try:
-        cluster_instance = module.params["cluster_instance"]
-        host = cluster_instance["host"]
-        consumer_key = cluster_instance["customer_key"]
-        token_key = cluster_instance["token_key"]
-        token_secret = cluster_instance["token_secret"]
-
-        client = Client(host, token_key, token_secret, consumer_key)
+        client = get_oauth1_client(module.params, module)
         changed, record, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as e:
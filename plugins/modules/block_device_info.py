@@ -129,6 +129,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.block_device import BlockDevice
 from ..module_utils.client import Client
+from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
 
 
@@ -159,13 +160,7 @@ def main():
     )
 
     try:
-        cluster_instance = module.params["cluster_instance"]
-        host = cluster_instance["host"]
-        consumer_key = cluster_instance["customer_key"]
-        token_key = cluster_instance["token_key"]
-        token_secret = cluster_instance["token_secret"]
-
-        client = Client(host, token_key, token_secret, consumer_key)
+        client = get_oauth1_client(module.params, module)
         records = run(module, client)
         module.exit_json(changed=False, records=records)
     except errors.MaasError as e:
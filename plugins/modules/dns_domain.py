@@ -80,6 +80,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.collection import CollectionLoader
 
 ENDPOINT = "/api/2.0/domains/"
 
@@ -88,15 +89,11 @@ def clean_data(data: dict):
     return {key: value for key, value in data.items() if value is not None}
 
 
-def get_match(items, key, value):
-    return next((item for item in items if item.get(key) == value), None)
-
-
 def must_update(old_data, new_data):
     return any(old_data.get(key) != value for key, value in new_data.items())
 
 
-def ensure_present(module, client: Client):
+def ensure_present(module, client: Client, collections):
     # extract all data from ansible task
     domain_name = module.params["name"]
     is_default = module.params["is_default"]
@@ -112,8 +109,7 @@ def ensure_present(module, client: Client):
     # Here name is obligatory, so this case is not reached
 
     # find a match on server, if none, create new object
-    items = client.get(ENDPOINT).json
-    item = get_match(items, "name", domain_name)
+    item = collections.get(ENDPOINT).get("name", domain_name)
     if not item:
         response_json = client.post(ENDPOINT, cleaned_data).json
         return True, response_json, dict(before={}, after=response_json)
@@ -135,11 +131,10 @@ def ensure_present(module, client: Client):
     return True, response_json, dict(before=item, after=response_json)
 
 
-def ensure_absent(module, client: Client):
+def ensure_absent(module, client: Client, collections):
     domain_name = module.params["name"]
 
-    items = client.get(ENDPOINT).json
-    item = get_match(items, "name", domain_name)
+    item = collections.get(ENDPOINT).get("name", domain_name)
     if not item:
         return False, None, dict(before={}, after={})
 
@@ -149,10 +144,11 @@ def ensure_absent(module, client: Client):
 
 
 def run(module, client: Client):
+    collections = CollectionLoader(client)
     if module.params["state"] == "present":
-        record, changed, diff = ensure_present(module, client)
+        record, changed, diff = ensure_present(module, client, collections)
     elif module.params["state"] == "absent":
-        record, changed, diff = ensure_absent(module, client)
+        record, changed, diff = ensure_absent(module, client, collections)
     return changed, record, diff
 
 
@@ -172,7 +168,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         record, changed, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as ex:
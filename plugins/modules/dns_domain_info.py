@@ -69,7 +69,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         records = run(client)
         module.exit_json(changed=False, records=records)
     except errors.MaasError as ex:
@@ -86,6 +86,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.collection import CollectionLoader
 from ..module_utils.dns_record import to_ansible
 
 ENDPOINT_A = "/api/2.0/dnsresources/"
@@ -96,26 +97,11 @@ def clean_data(data: dict):
     return {key: value for key, value in data.items() if value is not None}
 
 
-def get_match(items, key, value):
-    return next((item for item in items if item.get(key) == value), None)
-
-
-def get_match_or_fail(items, key, value, attribute_name):
-    result = get_match(items, key, value)
-    if result:
-        return result
-
-    available_items = ", ".join(x[key] for x in items)
-    raise errors.MaasError(
-        f"Can not find matching {attribute_name}. Options are [{available_items}]"
-    )
-
-
 def must_update(old_data, new_data):
     return any(old_data.get(key) != value for key, value in new_data.items())
 
 
-def ensure_present(module, client: Client):
+def ensure_present(module, client: Client, collections):
     # extract all data from ansible task
     if module.params["fqdn"]:
         resource_name = module.params["fqdn"]
@@ -155,12 +141,12 @@ def ensure_present(module, client: Client):
     cleaned_data = clean_data(data)
 
     # check if domain exist so we can print nicer errors - better than 404 Not found.
-    items = client.get("/api/2.0/domains/").json
-    item = get_match_or_fail(items, "name", domain, "domain " + domain)
+    collections.get("/api/2.0/domains/").get_or_fail(
+        "name", domain, "domain " + domain
+    )
 
     # find a match on server, if none, create new object
-    items = client.get(ENDPOINT_A).json
-    item = get_match(items, "fqdn", resource_name)
+    item = collections.get(ENDPOINT_A).get("fqdn", resource_name)
 
     if not item:
         response_json = client.post(endpoint, cleaned_data).json
@@ -203,15 +189,13 @@ def ensure_present(module, client: Client):
     )
 
 
-def ensure_absent(module, client: Client):
+def ensure_absent(module, client: Client, collections):
     resource_name = (
         module.params["fqdn"]
         or f"{module.params['name']}.{module.params['domain']}"
     )
 
-    items = client.get(ENDPOINT_A).json
-
-    item = get_match(items, "fqdn", resource_name)
+    item = collections.get(ENDPOINT_A).get("fqdn", resource_name)
     if not item:
         return False, None, dict(before={}, after={})
 
@@ -223,10 +207,11 @@ def ensure_absent(module, client: Client):
 
 
 def run(module, client: Client):
+    collections = CollectionLoader(client)
     if module.params["state"] == "present":
-        record, changed, diff = ensure_present(module, client)
+        record, changed, diff = ensure_present(module, client, collections)
     elif module.params["state"] == "absent":
-        record, changed, diff = ensure_absent(module, client)
+        record, changed, diff = ensure_absent(module, client, collections)
     return changed, record, diff
 
 
@@ -258,7 +243,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         record, changed, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as ex:
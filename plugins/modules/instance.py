@@ -24,6 +24,7 @@ description:
 version_added: 1.0.0
 extends_documentation_fragment:
   - maas.maas.cluster_instance
+  - maas.maas.polling
 seealso: []
 options:
   fqdn:
@@ -205,38 +206,11 @@ from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
 
 
 def allocate(module, client: Client):
-    data = {}
-    if module.params["allocate_params"]:
-        if module.params["allocate_params"]["min_cpu_count"]:
-            data["cpu_count"] = module.params["allocate_params"][
-                "min_cpu_count"
-            ]
-        if module.params["allocate_params"]["min_memory"]:
-            data["mem"] = module.params["allocate_params"]["min_memory"]
-        if module.params["allocate_params"]["zone"]:
-            data["zone"] = module.params["allocate_params"]["zone"]
-        if module.params["allocate_params"]["pool"]:
-            data["pool"] = module.params["allocate_params"]["pool"]
-        if module.params["allocate_params"]["tags"]:
-            data["tags"] = module.params["allocate_params"]["tags"]
-    if module.params["network_interfaces"]:
-        if (
-            module.params["network_interfaces"]["name"]
-            and module.params["network_interfaces"]["subnet_cidr"]
-        ):
-            name = module.params["network_interfaces"]["name"]
-            subnet_cidr = module.params["network_interfaces"]["subnet_cidr"]
-            if module.params["network_interfaces"]["ip_address"]:
-                ip_address = module.params["network_interfaces"]["ip_address"]
-                network_interface = (
-                    f"{name}:subnet_cidr={subnet_cidr},ip={ip_address}"
-                )
-            else:
-                network_interface = f"{name}:subnet_cidr={subnet_cidr}"
-            data["interfaces"] = network_interface
+    data = Machine.payload_for_allocate(module)
     maas_dict = client.post(
         "/api/2.0/machines/", query={"op": "allocate"}, data=data
     ).json
@@ -252,6 +226,7 @@ def delete(module, client: Client):
 
 
 def release(module, client: Client):
+    polling = Polling.from_ansible(module)
     machine = Machine.get_by_fqdn(module, client, must_exist=True)
     if machine.status == "Ready":
         return (
@@ -263,7 +238,11 @@ def release(module, client: Client):
         # commissioning will bring machine to the ready state
         # if state == commissioning: "Unexpected response - 409 b\"Machine cannot be released in its current state ('Commissioning').\""
         updated_machine = Machine.wait_for_state(
-            machine.id, client, False, "Ready"
+            machine.id,
+            client,
+            False,
+            "Ready",
+            polling=polling,
         )
         return (
             False,  # No change because we actually don't do anything, just wait for Ready
@@ -277,7 +256,11 @@ def release(module, client: Client):
         # commissioning will bring machine to the ready state
         machine.commission(client)
         updated_machine = Machine.wait_for_state(
-            machine.id, client, False, "Ready"
+            machine.id,
+            client,
+            False,
+            "Ready",
+            polling=polling,
         )
         return (
             True,
@@ -289,7 +272,11 @@ def release(module, client: Client):
     machine.release(client)
     try:  # this is a problem for ephemeral machines
         updated_machine = Machine.wait_for_state(
-            machine.id, client, False, "Ready"
+            machine.id,
+            client,
+            False,
+            "Ready",
+            polling=polling,
         )
     except errors.MachineNotFound:  # we get this for ephemeral machine
         updated_machine = machine
@@ -302,13 +289,21 @@ def release(module, client: Client):
 
 
 def deploy(module, client: Client):
+    # One deadline for all the states the machine goes through.
+    polling = Polling.from_ansible(module)
     if module.params["fqdn"]:
         machine = Machine.get_by_fqdn(module, client, must_exist=True)
     else:
         # allocate random machine
         # If there is no machine to allocate, new is created and can be deployed. If we release it, it is automatically deleted (ephemeral)
         machine = allocate(module, client)
-        Machine.wait_for_state(machine.id, client, False, "Allocated")
+        Machine.wait_for_state(
+            machine.id,
+            client,
+            False,
+            "Allocated",
+            polling=polling,
+        )
     if machine.status == "Deployed":
         return (
             False,
@@ -317,28 +312,32 @@ def deploy(module, client: Client):
         )
     if machine.status == "New" or machine.status == "Failed":
         machine.commission(client)
-        Machine.wait_for_state(machine.id, client, False, "Ready")
+        Machine.wait_for_state(
+            machine.id,
+            client,
+            False,
+            "Ready",
+            polling=polling,
+        )
     if machine.status == "Commissioning":
         # commissioning will bring machine to the ready state
-        Machine.wait_for_state(machine.id, client, False, "Ready")
-    data = {}
-    timeout = 60  # seconds
-    if module.params["deploy_params"]:
-        if module.params["deploy_params"]["distro_series"]:
-            data["distro_series"] = module.params["deploy_params"][
-                "distro_series"
-            ]
-        if module.params["deploy_params"]["timeout"]:
-            timeout = module.params["deploy_params"]["timeout"]
-        if module.params["deploy_params"]["hwe_kernel"]:
-            data["hwe_kernel"] = module.params["deploy_params"]["hwe_kernel"]
-        if module.params["deploy_params"]["user_data"]:
-            data["user_data"] = module.params["deploy_params"]["user_data"]
+        Machine.wait_for_state(
+            machine.id,
+            client,
+            False,
+            "Ready",
+            polling=polling,
+        )
+    data, timeout = Machine.payload_for_deploy(module)
     machine.deploy(
         client, data, timeout
     )  # here we can get TimeoutError: timed out
     updated_machine = Machine.wait_for_state(
-        machine.id, client, False, "Deployed"
+        machine.id,
+        client,
+        False,
+        "Deployed",
+        polling=polling,
     )
     return (
         True,
@@ -360,7 +359,7 @@ def main():
     module = AnsibleModule(
         supports_check_mode=True,
         argument_spec=dict(
-            arguments.get_spec("cluster_instance"),
+            arguments.get_spec("cluster_instance", "polling"),
             fqdn=dict(type="str"),
             state=dict(
                 type="str",
@@ -402,7 +401,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         changed, record, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as e:
@@ -0,0 +1,335 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+module: instances
+
+author:
+  - Polona Mihalič (@PolonaM)
+short_description: Deploy many machines in a single task.
+description:
+  - Bulk variant of M(maas.maas.instance) that deploys many machines at once.
+  - If I(fqdns) is provided, the listed machines are deployed.
+  - If I(count) is provided, that many machines matching I(allocate_params)
+    are allocated and deployed.
+  - Machines in C(New) or C(Failed) state are commissioned first.
+    Machines that are already deployed are left untouched.
+  - Allocate, commission and deploy requests are sent concurrently and the
+    module waits for all machines together, polling their status with a
+    single request.
+  - The task fails if any of the machines fails, but still returns the
+    machines that were deployed successfully.
+version_added: 1.0.0
+extends_documentation_fragment:
+  - maas.maas.cluster_instance
+  - maas.maas.polling
+seealso:
+  - module: maas.maas.instance
+options:
+  fqdns:
+    description:
+      - Fully qualified domain names of the machines to be deployed.
+      - If any of the machines is not found the task will FAIL.
+      - Mutually exclusive with I(count).
+    type: list
+    elements: str
+  count:
+    description:
+      - Number of machines to allocate with I(allocate_params) and deploy.
+      - Mutually exclusive with I(fqdns).
+    type: int
+  allocate_params:
+    description:
+      - Constraints parameters that are used to allocate each machine.
+      - All of the constraints are optional and when multiple constraints are provided, they are combined using 'AND' semantics.
+      - Relevant only if I(count) is provided.
+    type: dict
+    suboptions:
+      min_cpu_count:
+        description:
+          - The minimum number of CPUs a returned machine must have.
+        type: int
+      min_memory:
+        description:
+          - The minimum amount of memory (expressed in MB) the returned machine must have.
+        type: int
+      zone:
+        description: The zone name of the MAAS machine to be allocated.
+        type: str
+      pool:
+        description: The pool name of the MAAS machine to be allocated.
+        type: str
+      tags:
+        description: A set of tag names that must be assigned on the MAAS machine to be allocated.
+        type: str
+  deploy_params:
+    description:
+      - Constraints parameters that are used to deploy every machine.
+      - If no parameters are given, machines will be deployed using the defaults.
+    type: dict
+    suboptions:
+      distro_series:
+        description: The OS release the machines will use.
+        type: str
+      timeout:
+        description: Time in seconds to wait for server response when deploying. Defaults to 60s.
+        type: int
+      hwe_kernel:
+        description:
+          - Specifies the kernel to be used on the machines.
+          - Only used when deploying Ubuntu.
+        type: str
+      user_data:
+        description: Blob of base64-encoded user-data to be made available to the machines through the metadata service.
+        type: str
+  max_workers:
+    description:
+      - Maximum number of allocate, commission and deploy requests sent to
+        MAAS at the same time.
+      - Must be at least C(1).
+    type: int
+    default: 10
+"""
+
+EXAMPLES = r"""
+- name: Deploy already commissioned machines
+  maas.maas.instances:
+    fqdns:
+      - first.maas
+      - second.maas
+    deploy_params:
+      distro_series: jammy
+
+- name: Allocate and deploy ten machines from a pool
+  maas.maas.instances:
+    count: 10
+    allocate_params:
+      pool: rack-1
+      min_memory: 4096
+    deploy_params:
+      distro_series: jammy
+      user_data: my_user_data
+    polling:
+      timeout: 3600
+"""
+
+RETURN = r"""
+records:
+  description:
+    - The deployed machines.
+  returned: always
+  type: list
+  sample:
+    - architecture: amd64/generic
+      cores: 2
+      distro_series: jammy
+      fqdn: new-machine.maas
+      hostname: new-machine
+      hwe_kernel: hwe-22.04
+      id: 6h4fn6
+      memory: 2048
+      min_hwe_kernel: ga-22.04
+      network_interfaces: []
+      osystem: ubuntu
+      pool: default
+      power_type: lxd
+      status: Deployed
+      storage_disks: []
+      tags: []
+      zone: default
+failures:
+  description:
+    - Machines that could not be allocated or deployed, with the reason.
+  returned: always
+  type: list
+  sample:
+    - id: 6h4fn7
+      msg: Machine - new-machine-2 - Failed deployment
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.module_utils.basic import AnsibleModule
+
+from ..module_utils import arguments, errors
+from ..module_utils.client import Client
+from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
+from ..module_utils.state import MachineTaskState
+from ..module_utils.waiter import MachineWaiter
+
+
+def run_concurrently(module, func, items):
+    # Returns a list of (item, result, error) tuples in the order of items.
+    def call(item):
+        try:
+            return item, func(item), None
+        except errors.MaasError as e:
+            return item, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=module.params["max_workers"]) as pool:
+        return list(pool.map(call, items))
+
+
+def allocate(module, client: Client, failures):
+    data = Machine.payload_for_allocate(module)
+
+    def allocate_one(_index):
+        return Machine.from_maas(
+            client.post(
+                "/api/2.0/machines/", query={"op": "allocate"}, data=data
+            ).json
+        )
+
+    machines = []
+    for _index, machine, error in run_concurrently(
+        module, allocate_one, range(module.params["count"])
+    ):
+        if error:
+            failures.append(dict(id=None, msg=error))
+        else:
+            machines.append(machine)
+    return machines
+
+
+def wait(client: Client, polling, machines, failures, *states):
+    # Returns machines that reached one of the states, records the rest.
+    waiter = MachineWaiter(client, polling)
+    for machine in machines:
+        waiter.add(machine.id, *states)
+    results, wait_failures = waiter.wait()
+    for machine in machines:
+        if machine.id in wait_failures:
+            failures.append(dict(id=machine.id, msg=wait_failures[machine.id]))
+    return [results[m.id] for m in machines if m.id in results]
+
+
+def send(module, machines, func, failures):
+    # Sends one request per machine, returns machines that accepted it.
+    accepted = []
+    for machine, _result, error in run_concurrently(module, func, machines):
+        if error:
+            failures.append(dict(id=machine.id, msg=error))
+        else:
+            accepted.append(machine)
+    return accepted
+
+
+def deploy(module, client: Client):
+    # One deadline for all the stages.
+    polling = Polling.from_ansible(module)
+    failures = []
+    allocated = []
+    if module.params["fqdns"]:
+        machines = Machine.get_id_from_fqdn(client, *module.params["fqdns"])
+    else:
+        allocated = allocate(module, client, failures)
+        machines = wait(
+            client, polling, allocated, failures, MachineTaskState.allocated
+        )
+
+    deployed, to_commission, commissioning, to_deploy = [], [], [], []
+    for machine in machines:
+        if machine.status == MachineTaskState.deployed:
+            deployed.append(machine)
+        elif machine.status in (MachineTaskState.new, MachineTaskState.failed):
+            to_commission.append(machine)
+        elif machine.status == MachineTaskState.comissioning:
+            commissioning.append(machine)
+        else:
+            to_deploy.append(machine)
+
+    # commissioning will bring machines to the ready state
+    commissioned = send(
+        module, to_commission, lambda m: m.commission(client), failures
+    )
+    to_deploy += wait(
+        client,
+        polling,
+        commissioned + commissioning,
+        failures,
+        MachineTaskState.ready,
+    )
+
+    data, timeout = Machine.payload_for_deploy(module)
+    deploying = send(
+        module, to_deploy, lambda m: m.deploy(client, data, timeout), failures
+    )
+    deployed += wait(
+        client, polling, deploying, failures, MachineTaskState.deployed
+    )
+
+    records = [machine.to_ansible() for machine in deployed]
+    changed = bool(allocated or commissioned or deploying)
+    before = [machine.to_ansible() for machine in machines]
+    return changed, records, dict(before=before, after=records), failures
+
+
+def run(module, client: Client):
+    return deploy(module, client)
+
+
+def main():
+    module = AnsibleModule(
+        supports_check_mode=False,
+        argument_spec=dict(
+            arguments.get_spec("cluster_instance", "polling"),
+            fqdns=dict(type="list", elements="str"),
+            count=dict(type="int"),
+            deploy_params=dict(
+                type="dict",
+                options=dict(
+                    distro_series=dict(type="str"),
+                    timeout=dict(type="int"),
+                    hwe_kernel=dict(type="str"),
+                    user_data=dict(type="str"),
+                ),
+            ),
+            allocate_params=dict(
+                type="dict",
+                options=dict(
+                    min_cpu_count=dict(type="int"),
+                    min_memory=dict(type="int"),
+                    zone=dict(type="str"),
+                    pool=dict(type="str"),
+                    tags=dict(type="str"),
+                ),
+            ),
+            max_workers=dict(type="int", default=10),
+        ),
+        mutually_exclusive=[("fqdns", "count")],
+        required_one_of=[("fqdns", "count")],
+    )
+    if module.params["max_workers"] < 1:
+        module.fail_json(msg="max_workers must be at least 1.")
+
+    try:
+        client = get_oauth1_client(module.params, module)
+        changed, records, diff, failures = run(module, client)
+        if failures:
+            module.fail_json(
+                msg="{0} of the machines failed to deploy.".format(
+                    len(failures)
+                ),
+                changed=changed,
+                records=records,
+                failures=failures,
+                diff=diff,
+            )
+        module.exit_json(
+            changed=changed, records=records, failures=failures, diff=diff
+        )
+    except errors.MaasError as e:
+        module.fail_json(msg=str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ description:
 version_added: 1.0.0
 extends_documentation_fragment:
   - maas.maas.cluster_instance
+  - maas.maas.polling
 seealso: []
 options:
   state:
@@ -180,6 +181,7 @@ from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
 from ..module_utils.state import MachineTaskState
 
 
@@ -216,9 +218,14 @@ def data_for_add_machine(module):
 
 def add_machine(module, client: Client):
     data = data_for_add_machine(module)
+    polling = Polling.from_ansible(module)
     machine = Machine.create(client, data)
     updated_machine = Machine.wait_for_state(
-        machine.id, client, False, MachineTaskState.ready
+        machine.id,
+        client,
+        False,
+        MachineTaskState.ready,
+        polling=polling,
     )
     return (
         True,
@@ -301,7 +308,7 @@ def main():
     module = AnsibleModule(
         supports_check_mode=True,
         argument_spec=dict(
-            arguments.get_spec("cluster_instance"),
+            arguments.get_spec("cluster_instance", "polling"),
             state=dict(
                 type="str",
                 choices=["present", "absent"],
@@ -350,7 +357,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         changed, record, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as e:
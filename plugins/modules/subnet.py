@@ -121,56 +121,23 @@ record:
     ttl: null
 """
 
-from itertools import groupby
 
 from ansible.module_utils.basic import AnsibleModule
 
 from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.collection import CollectionLoader, RecordCollection
+from ..module_utils.rest_client import RestClient
 
 ENDPOINT = "/api/2.0/subnets/"
+IP_RANGES_ENDPOINT = "/api/2.0/ipranges/"
 
 
 def clean_data(data: dict):
     return {key: value for key, value in data.items() if value is not None}
 
 
-def get_match(items, key, value):
-    return next((item for item in items if item.get(key) == value), None)
-
-
-def get_match_or_fail(items, key, value, attribute_name):
-    result = get_match(items, key, value)
-    if result:
-        return result
-
-    available_items = ", ".join(x[key] for x in items)
-    raise errors.MaasError(
-        f"Can not find matching {attribute_name}. Options are [{available_items}]"
-    )
-
-
-def get_complex_match(items, conditions: dict):
-    for item in items:
-        complex_conditions = {
-            k: v for k, v in conditions.items() if not isinstance(k, str)
-        }
-
-        is_simple_match = all(
-            item[k] == v
-            for k, v in conditions.items()
-            if k not in complex_conditions
-        )
-        is_complex_match = all(
-            item[k1][k2] == v for (k1, k2), v in complex_conditions.items()
-        )
-        if is_simple_match and is_complex_match:
-            return item
-
-    return None
-
-
 def must_update(old_data, new_data):
     for key, value in new_data.items():
         if old_data.get(key) != value:
@@ -179,53 +146,43 @@ def must_update(old_data, new_data):
     return False
 
 
-def map_item(module, client: Client, fail_if_empty, key, endpoint):
+def map_item(module, collections, fail_if_empty, key, endpoint):
     item_name = module.params[key]
 
     # map subitem
-    items = client.get(endpoint).json
+    items = collections.get(endpoint)
     if fail_if_empty:
-        return get_match_or_fail(items, "name", item_name, key)
-    return get_match(items, "name", item_name)
-
+        return items.get_or_fail("name", item_name, key)
+    return items.get("name", item_name)
 
-def get_ip_ranges(client):
-    def key_function(item):
-        return item["subnet"]
 
-    ip_ranges = client.get("/api/2.0/ipranges/").json
-    data = [
-        {
-            "subnet": ip_range["subnet"]["name"],
-            "id": ip_range["id"],
-            "data": {
+def get_ip_ranges(collections, subnet_name):
+    ip_ranges = collections.get(IP_RANGES_ENDPOINT).find_all(
+        {("subnet", "name"): subnet_name}
+    )
+    return [
+        (
+            ip_range["id"],
+            {
                 "type": ip_range["type"],
                 "start_ip": ip_range["start_ip"],
                 "end_ip": ip_range["end_ip"],
             },
-        }
+        )
         for ip_range in ip_ranges
     ]
 
-    sorted_data = sorted(data, key=key_function)
-
-    grouped = {
-        k: [(v["id"], v["data"]) for v in g]
-        for k, g in groupby(sorted_data, key_function)
-    }
-    return grouped
-
 
 class IpRangeUpdater:
     @staticmethod
-    def ranges_to_update(client, subnet, ip_ranges):
+    def ranges_to_update(collections, subnet, ip_ranges):
         if subnet is None:
             return [], ip_ranges
 
         ranges_to_delete = []
         ranges_to_add = []
 
-        old_ranges = get_ip_ranges(client).get(subnet["name"]) or []
+        old_ranges = get_ip_ranges(collections, subnet["name"])
 
         for ip_range_id, data in old_ranges:
             if any(ip_range == data for ip_range in ip_ranges):
@@ -241,34 +198,48 @@ class IpRangeUpdater:
         return old_ranges, (ranges_to_delete, ranges_to_add)
 
     @staticmethod
-    def update(client, subnet, actions):
+    def update(client, collections, subnet, actions):
         to_delete, to_add = actions
         IpRangeUpdater.remove_ip_ranges(client, to_delete)
         IpRangeUpdater.add_ip_ranges(client, to_add, subnet["id"])
-        result = get_ip_ranges(client).get(subnet["name"])
+        collections.invalidate(IP_RANGES_ENDPOINT)
+        result = get_ip_ranges(collections, subnet["name"])
         return [v for k, v in result]
 
     @staticmethod
     def add_ip_ranges(client: Client, ip_ranges, subnet_id):
         for ip_range in ip_ranges:
             ip_range["subnet"] = subnet_id
-            client.post("/api/2.0/ipranges/", ip_range)
+        RestClient(client).execute_many(
+            lambda ip_range: client.post(IP_RANGES_ENDPOINT, ip_range),
+            ip_ranges,
+        )
 
     @staticmethod
     def remove_ip_ranges(client: Client, ip_range_ids):
-        for ip_range_id in ip_range_ids:
-            client.delete(f"/api/2.0/ipranges/{ip_range_id}/")
+        RestClient(client).execute_many(
+            lambda ip_range_id: client.delete(
+                f"{IP_RANGES_ENDPOINT}{ip_range_id}/"
+            ),
+            ip_range_ids,
+        )
 
 
-def ensure_present(module, client: Client):
+def ensure_present(module, client: Client, collections):
     vlan_name = module.params["vlan"]
     ip_ranges = module.params["ip_ranges"] or []
 
     fabric = map_item(
-        module, client, vlan_name is not None, "fabric", "/api/2.0/fabrics/"
+        module,
+        collections,
+        vlan_name is not None,
+        "fabric",
+        "/api/2.0/fabrics/",
     )
     vlan = (
-        get_match_or_fail(fabric["vlans"], "name", vlan_name, "vlan")
+        RecordCollection(fabric["vlans"]).get_or_fail(
+            "name", vlan_name, "vlan"
+        )
         if vlan_name
         else None
     )
@@ -288,15 +259,14 @@ def ensure_present(module, client: Client):
     cleaned_data = clean_data(data)
 
     # find a match on server, if none, create new object
-    items = client.get(ENDPOINT).json
-    item = get_match(items, "name", module.params["name"])
+    item = collections.get(ENDPOINT).get("name", module.params["name"])
     if not item:
         response_json = client.post(ENDPOINT, cleaned_data).json
 
         # Add IP ranges to new subnet
         if ip_ranges:
             response_json["ip_ranges"] = IpRangeUpdater.update(
-                client, response_json, ([], ip_ranges)
+                client, collections, response_json, ([], ip_ranges)
             )
 
         # map to Ansible module fields
@@ -315,7 +285,7 @@ def ensure_present(module, client: Client):
     item["fabric"] = old_vlan["fabric"]
 
     old_ranges, ranges_to_update = IpRangeUpdater.ranges_to_update(
-        client, item, ip_ranges
+        collections, item, ip_ranges
     )
     item["ip_ranges"] = [v for k, v in old_ranges]
     if not item_changed and ranges_to_update == ([], []):
@@ -331,17 +301,16 @@ def ensure_present(module, client: Client):
     response_json["fabric"] = response_json.get("vlan", {}).get("fabric")
     response_json["vlan"] = response_json.get("vlan", {}).get("name")
     response_json["ip_ranges"] = IpRangeUpdater.update(
-        client, response_json, ranges_to_update
+        client, collections, response_json, ranges_to_update
     )
 
     return True, response_json, dict(before=item, after=response_json)
 
 
-def ensure_absent(module, client: Client):
+def ensure_absent(module, client: Client, collections):
     key = "name"
 
-    items = client.get(ENDPOINT).json
-    item = get_match(items, key, module.params[key])
+    item = collections.get(ENDPOINT).get(key, module.params[key])
     if not item:
         return False, None, dict(before={}, after={})
 
@@ -351,10 +320,11 @@ def ensure_absent(module, client: Client):
 
 
 def run(module, client: Client):
+    collections = CollectionLoader(client)
     if module.params["state"] == "present":
-        record, changed, diff = ensure_present(module, client)
+        record, changed, diff = ensure_present(module, client, collections)
     elif module.params["state"] == "absent":
-        record, changed, diff = ensure_absent(module, client)
+        record, changed, diff = ensure_absent(module, client, collections)
     return changed, record, diff
 
 
@@ -392,7 +362,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         record, changed, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as ex:
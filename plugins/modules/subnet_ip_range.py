@@ -83,6 +83,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
+from ..module_utils.collection import CollectionLoader
 
 ENDPOINT = "/api/2.0/ipranges/"
 
@@ -91,45 +92,17 @@ def clean_data(data: dict):
     return {key: value for key, value in data.items() if value is not None}
 
 
-def get_match(items, key, value):
-    return next((item for item in items if item.get(key) == value), None)
-
-
-def get_complex_match(items, conditions: dict):
-    for item in items:
-        complex_conditions = {
-            k: v for k, v in conditions.items() if not isinstance(k, str)
-        }
-
-        is_simple_match = all(
-            item[k] == v
-            for k, v in conditions.items()
-            if k not in complex_conditions
-        )
-        is_complex_match = all(
-            item[k1][k2] == v for (k1, k2), v in complex_conditions.items()
-        )
-        if is_simple_match and is_complex_match:
-            return item
-
-    return None
-
-
 def must_update(old_data, new_data):
     return any(old_data.get(key) != value for key, value in new_data.items())
 
 
-def ensure_present(module, client: Client):
+def ensure_present(module, client: Client, collections):
     subnet_name = module.params["subnet"]
 
     # map subnet to its Id
-    subnets = client.get("/api/2.0/subnets/").json
-    subnet = get_match(subnets, "name", subnet_name)
-    if not subnet:
-        available_subnets = ", ".join(x["name"] for x in subnets)
-        raise errors.MaasError(
-            f"Can not find matching subnet. Options are [{available_subnets}]"
-        )
+    subnet = collections.get("/api/2.0/subnets/").get_or_fail(
+        "name", subnet_name, "subnet"
+    )
 
     compound_key = {
         ("subnet", "id"): subnet["id"],
@@ -151,8 +124,7 @@ def ensure_present(module, client: Client):
     # Here name is obligatory, so this case is not reached
 
     # find a match on server, if none, create new object
-    items = client.get(ENDPOINT).json
-    item = get_complex_match(items, compound_key)
+    item = collections.get(ENDPOINT).find(compound_key)
     if not item:
         response_json = client.post(ENDPOINT, cleaned_data).json
         return True, response_json, dict(before={}, after=response_json)
@@ -174,7 +146,7 @@ def ensure_present(module, client: Client):
     return True, response_json, dict(before=item, after=response_json)
 
 
-def ensure_absent(module, client: Client):
+def ensure_absent(module, client: Client, collections):
     compound_key = {
         ("subnet", "name"): module.params["subnet"],
         "type": module.params["type"],
@@ -182,8 +154,7 @@ def ensure_absent(module, client: Client):
         "end_ip": module.params["end_ip"],
     }
 
-    items = client.get(ENDPOINT).json
-    item = get_complex_match(items, compound_key)
+    item = collections.get(ENDPOINT).find(compound_key)
     if not item:
         return False, None, dict(before={}, after={})
 
@@ -193,10 +164,11 @@ def ensure_absent(module, client: Client):
 
 
 def run(module, client: Client):
+    collections = CollectionLoader(client)
     if module.params["state"] == "present":
-        record, changed, diff = ensure_present(module, client)
+        record, changed, diff = ensure_present(module, client, collections)
     elif module.params["state"] == "absent":
-        record, changed, diff = ensure_absent(module, client)
+        record, changed, diff = ensure_absent(module, client, collections)
     return changed, record, diff
 
 
@@ -217,7 +189,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         record, changed, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as ex:
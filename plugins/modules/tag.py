@@ -105,7 +105,9 @@ from ..module_utils.utils import is_changed
 
 def get_after(client, after):
     if after:  # Get updated machines
-        updated_machine_list = Machine.get_id_from_fqdn(client, *after)
+        updated_machine_list = Machine.get_id_from_fqdn(
+            client, *after, summary=True
+        )
         after = []
         for machine in updated_machine_list:
             after.append(dict(machine=machine.fqdn, tags=machine.tags))
@@ -117,32 +119,30 @@ def create_tag(client, module, existing_tag):
         Tag.send_create_request(client, module)
 
 
-def add_tag_to_machine(client, module, machine_list, before, after):
+def add_tag_to_machine(module, machine_list, before, after):
+    # Returns ids of the machines that need the tag.
+    machine_ids = []
     for machine in machine_list:
         if module.params["name"] not in machine.tags:
             before.append(dict(machine=machine.fqdn, tags=machine.tags))
-            # Request in a loop is not optimal design, but API does not support sending in a list.
-            Tag.send_tag_request(client, machine.id, module.params["name"])
+            machine_ids.append(machine.id)
             after.append(machine.fqdn)
-    return before, after
+    return machine_ids
 
 
-def remove_tag_from_machine(
-    client, module, machine_list, existing_tag, before, after
-):
+def remove_tag_from_machine(module, machine_list, before, after):
+    # Returns ids of the machines that need the tag removed.
+    machine_ids = []
     for machine in machine_list:
-        if existing_tag["name"] in machine.tags:
+        if module.params["name"] in machine.tags:
             before.append(dict(machine=machine.fqdn, tags=machine.tags))
-            # Request in a loop is not optimal design, but API does not support sending in a list.
-            Tag.send_untag_request(client, machine.id, module.params["name"])
+            machine_ids.append(machine.id)
             after.append(machine.fqdn)
-    return before, after
+    return machine_ids
 
 
 def remove_unnecessary_tag_after_set(
-    client,
     module,
-    existing_tag,
     machine_list_from_ansible,
     machine_list_from_maas,
     before,
@@ -152,30 +152,32 @@ def remove_unnecessary_tag_after_set(
     check_list = [
         machine_ansible.fqdn for machine_ansible in machine_list_from_ansible
     ]
-    remove_list = []
-    for machine in machine_list_from_maas:
-        if (
-            module.params["name"] in machine.tags
-            and machine.fqdn not in check_list
-        ):
-            remove_list.append(machine)
-    before, after = remove_tag_from_machine(
-        client, module, remove_list, existing_tag, before, after
-    )
-    return before, after
+    remove_list = [
+        machine
+        for machine in machine_list_from_maas
+        if machine.fqdn not in check_list
+    ]
+    return remove_tag_from_machine(module, remove_list, before, after)
+
+
+def update_tag(client, module, add, remove):
+    # All machines are tagged and untagged with a single request.
+    if add or remove:
+        Tag.send_update_nodes_request(
+            client, module.params["name"], add=add, remove=remove
+        )
 
 
 def ensure_present(module, client):
     before = []
     after = []
     machine_list_from_ansible = Machine.get_id_from_fqdn(
-        client, *module.params["machines"]
+        client, *module.params["machines"], summary=True
     )
     existing_tag = Tag.get_tag_by_name(client, module)
     create_tag(client, module, existing_tag)
-    before, after = add_tag_to_machine(
-        client, module, machine_list_from_ansible, before, after
-    )
+    add = add_tag_to_machine(module, machine_list_from_ansible, before, after)
+    update_tag(client, module, add, [])
     after = get_after(client, after)
     return is_changed(before, after), after, dict(before=before, after=after)
 
@@ -183,12 +185,13 @@ def ensure_present(module, client):
 def ensure_absent(module, client):
     before = []
     after = []
-    machine_list = Machine.get_id_from_fqdn(client, *module.params["machines"])
+    machine_list = Machine.get_id_from_fqdn(
+        client, *module.params["machines"], summary=True
+    )
     existing_tag = Tag.get_tag_by_name(client, module)
     if existing_tag:
-        before, after = remove_tag_from_machine(
-            client, module, machine_list, existing_tag, before, after
-        )
+        remove = remove_tag_from_machine(module, machine_list, before, after)
+        update_tag(client, module, [], remove)
     after = get_after(client, after)
     return is_changed(before, after), after, dict(before=before, after=after)
 
@@ -199,23 +202,22 @@ def ensure_set(module, client):
     before = []
     after = []
     machine_list_from_ansible = Machine.get_id_from_fqdn(
-        client, *module.params["machines"]
+        client, *module.params["machines"], summary=True
+    )
+    machine_list_from_maas = Machine.get_by_tag(
+        client, module.params["name"], summary=True
     )
-    machine_list_from_maas = Machine.get_by_tag(client, module.params["name"])
     existing_tag = Tag.get_tag_by_name(client, module)
     create_tag(client, module, existing_tag)
-    before, after = add_tag_to_machine(
-        client, module, machine_list_from_ansible, before, after
-    )
-    before, after = remove_unnecessary_tag_after_set(
-        client,
+    add = add_tag_to_machine(module, machine_list_from_ansible, before, after)
+    remove = remove_unnecessary_tag_after_set(
         module,
-        existing_tag,
         machine_list_from_ansible,
         machine_list_from_maas,
         before,
         after,
     )
+    update_tag(client, module, add, remove)
     after = get_after(client, after)
     return is_changed(before, after), after, dict(before=before, after=after)
 
@@ -253,7 +255,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         changed, records, diff = run(module, client)
         module.exit_json(changed=changed, records=records, diff=diff)
     except errors.MaasError as e:
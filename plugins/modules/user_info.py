@@ -105,7 +105,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         record = run(module, client)
         module.exit_json(changed=False, record=record)
     except errors.MaasError as e:
@@ -23,6 +23,7 @@ description:
 version_added: 1.0.0
 extends_documentation_fragment:
   - maas.maas.cluster_instance
+  - maas.maas.polling
 seealso: []
 options:
   state:
@@ -249,6 +250,7 @@ from ..module_utils import arguments, errors
 from ..module_utils.client import Client
 from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
 from ..module_utils.state import MachineTaskState
 from ..module_utils.vmhost import VMHost
 
@@ -334,10 +336,15 @@ def deploy_machine_as_vm_host(module, client, timeout):
         module, client, must_exist=True, name_field_ansible="machine_fqdn"
     )
     data = data_for_deploy_machine_as_vm_host(module)
+    polling = Polling.from_ansible(module)
     machine.deploy(client, data, timeout)
     try:
         Machine.wait_for_state(
-            machine.id, client, False, MachineTaskState.deployed.value
+            machine.id,
+            client,
+            False,
+            MachineTaskState.deployed.value,
+            polling=polling,
         )
     except errors.MachineNotFound:  # when machine is deployed, machine is gone
         pass
@@ -420,7 +427,7 @@ def main():
     module = AnsibleModule(
         supports_check_mode=True,
         argument_spec=dict(
-            arguments.get_spec("cluster_instance"),
+            arguments.get_spec("cluster_instance", "polling"),
             vm_host_name=dict(type="str", required=True),
             machine_fqdn=dict(type="str"),
             timeout=dict(type="int"),
@@ -451,7 +458,7 @@ def main():
     )
 
     try:
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         changed, record, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as e:
@@ -20,6 +20,7 @@ description:
 version_added: 1.0.0
 extends_documentation_fragment:
   - maas.maas.cluster_instance
+  - maas.maas.polling
 seealso: []
 options:
   vm_host:
@@ -171,6 +172,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ..module_utils import arguments, errors
 from ..module_utils.cluster_instance import get_oauth1_client
 from ..module_utils.machine import Machine
+from ..module_utils.polling import Polling
 from ..module_utils.state import MachineTaskState
 from ..module_utils.utils import is_changed, required_one_of
 from ..module_utils.vmhost import VMHost
@@ -196,10 +198,15 @@ def ensure_ready(module, client, vm_host_obj):
             )
     machine_obj = Machine.from_ansible(module)
     payload = machine_obj.payload_for_compose(module)
+    polling = Polling.from_ansible(module)
     task = vm_host_obj.send_compose_request(module, client, payload)
     after = (
         Machine.wait_for_state(
-            task["system_id"], client, False, MachineTaskState.ready.value
+            task["system_id"],
+            client,
+            False,
+            MachineTaskState.ready.value,
+            polling=polling,
         )
     ).to_ansible()
     return is_changed(before, after), after, dict(before=before, after=after)
@@ -219,7 +226,7 @@ def main():
     module = AnsibleModule(
         supports_check_mode=False,
         argument_spec=dict(
-            arguments.get_spec("cluster_instance"),
+            arguments.get_spec("cluster_instance", "polling"),
             vm_host=dict(
                 type="str",
                 required=True,
@@ -299,7 +306,7 @@ def main():
             ],
         )
 
-        client = get_oauth1_client(module.params)
+        client = get_oauth1_client(module.params, module)
         changed, record, diff = run(module, client)
         module.exit_json(changed=changed, record=record, diff=diff)
     except errors.MaasError as e:
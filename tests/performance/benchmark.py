@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Benchmarks for the collection against a fake MAAS region.
+
+Every scenario runs a module's run() or the inventory plugin's parse()
+against a fake_maas.FakeMaas instance serving a synthetic dataset and reports
+the wall time together with the number of requests, connections and bytes
+exchanged with the server. Sizes, latency and scenarios are configurable:
+
+    python tests/performance/benchmark.py --machines 100 1000 --latency 5
+    python tests/performance/benchmark.py --scenario inventory --json out.json
+
+The write scenarios cover the modules that look records up in MAAS lists
+before changing them. network_interface_link and instance are left out:
+their requests are dominated by per-machine state changes (link updates,
+deployment and the polling that waits for it) that the fake server does not
+emulate.
+
+The collection has to be placed at <root>/ansible_collections/maas/maas, the
+same as for the unit tests, or found through ANSIBLE_COLLECTIONS_PATH.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+from collections import defaultdict
+import json
+import os
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_maas import FakeMaas, make_dataset
+
+# <root>/ansible_collections/maas/maas/tests/performance/benchmark.py
+COLLECTIONS_ROOT = Path(os.path.abspath(__file__)).parents[5:6]
+
+# Number of machines the tag module is asked to tag. MAAS is queried for all
+# of them in a single request, so the list is kept at a realistic size.
+TAGGED_MACHINES = 200
+
+# Number of machines that change between incremental inventory runs.
+CHANGED_MACHINES = 10
+
+# Inventory snapshots, kept for the whole benchmark.
+SNAPSHOT_DIR = tempfile.TemporaryDirectory()
+
+
+class BenchModule:
+    """Minimal AnsibleModule stand-in. Missing parameters are None."""
+
+    check_mode = False
+
+    def __init__(self, **params):
+        self.params = defaultdict(lambda: None, params)
+
+    def warn(self, msg):
+        pass
+
+
+def load_collection():
+    from ansible.utils.collection_loader._collection_finder import (
+        _AnsibleCollectionFinder,
+    )
+
+    paths = os.environ.get("ANSIBLE_COLLECTIONS_PATH", "").split(os.pathsep)
+    paths += [str(path) for path in COLLECTIONS_ROOT]
+    _AnsibleCollectionFinder(paths=[p for p in paths if p])._install()
+
+
+def inventory(fake, dataset, client):
+    from ansible.inventory.data import InventoryData
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.plugins.loader import inventory_loader
+
+    os.environ.update(
+        MAAS_HOST=fake.url,
+        MAAS_TOKEN_KEY="token-key",
+        MAAS_TOKEN_SECRET="token-secret",
+        MAAS_CUSTOMER_KEY="customer-key",
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "maas.yml")
+        with open(path, "w") as f:
+            f.write("plugin: maas.maas.inventory\n")
+        plugin = inventory_loader.get("maas.maas.inventory")
+        plugin.parse(InventoryData(), DataLoader(), path, cache=False)
+
+
+def inventory_incremental(fake, dataset, client):
+    from ansible.inventory.data import InventoryData
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.plugins.loader import inventory_loader
+
+    # The first (warmup) run takes the snapshot, every following run has
+    # events for CHANGED_MACHINES machines to apply.
+    events = dataset["events"]
+    for machine in dataset["machines"][:CHANGED_MACHINES]:
+        events.append(dict(id=len(events) + 1, node=machine["system_id"]))
+    os.environ.update(
+        MAAS_HOST=fake.url,
+        MAAS_TOKEN_KEY="token-key",
+        MAAS_TOKEN_SECRET="token-secret",
+        MAAS_CUSTOMER_KEY="customer-key",
+        MAAS_SNAPSHOT_DIR=os.path.join(SNAPSHOT_DIR.name, fake.url[7:]),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "maas.yml")
+        with open(path, "w") as f:
+            f.write("plugin: maas.maas.inventory\nincremental: true\n")
+        plugin = inventory_loader.get("maas.maas.inventory")
+        plugin.parse(InventoryData(), DataLoader(), path, cache=False)
+
+
+def machine_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import machine_info
+
+    machine_info.run(BenchModule(), client)
+
+
+def machine_info_fqdn(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import machine_info
+
+    machines = dataset["machines"]
+    fqdn = machines[len(machines) // 2]["fqdn"]
+    machine_info.run(BenchModule(fqdn=fqdn), client)
+
+
+def block_device_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import (
+        block_device_info,
+    )
+
+    machines = dataset["machines"]
+    fqdn = machines[len(machines) // 2]["fqdn"]
+    block_device_info.run(BenchModule(machine_fqdn=fqdn), client)
+
+
+def tag_set(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import tag
+
+    machines = dataset["machines"][:TAGGED_MACHINES]
+    tag.run(
+        BenchModule(
+            name="tag-0",
+            state="set",
+            machines=[machine["fqdn"] for machine in machines],
+        ),
+        client,
+    )
+
+
+def tag_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import tag_info
+
+    tag_info.run(BenchModule(), client)
+
+
+def subnet_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import subnet_info
+
+    subnet_info.run(client)
+
+
+def subnet_ip_range_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import (
+        subnet_ip_range_info,
+    )
+
+    subnet_ip_range_info.run(client)
+
+
+def dns_record_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import dns_record_info
+
+    dns_record_info.run(BenchModule(all=False), client)
+
+
+def subnet(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import subnet
+
+    # Replaces the IP range of an existing subnet with three new ones.
+    existing = dataset["subnets"][len(dataset["subnets"]) // 2]
+    network = existing["cidr"].rsplit(".", 1)[0]
+    subnet.run(
+        BenchModule(
+            state="present",
+            name=existing["name"],
+            cidr=existing["cidr"],
+            ip_ranges=[
+                dict(
+                    type=type,
+                    start_ip="{0}.{1}".format(network, start),
+                    end_ip="{0}.{1}".format(network, start + 9),
+                )
+                for type, start in (
+                    ("reserved", 10),
+                    ("reserved", 30),
+                    ("dynamic", 100),
+                )
+            ],
+        ),
+        client,
+    )
+
+
+def subnet_ip_range(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import subnet_ip_range
+
+    existing = dataset["subnets"][len(dataset["subnets"]) // 2]
+    network = existing["cidr"].rsplit(".", 1)[0]
+    subnet_ip_range.run(
+        BenchModule(
+            state="present",
+            subnet=existing["name"],
+            type="reserved",
+            start_ip="{0}.10".format(network),
+            end_ip="{0}.19".format(network),
+        ),
+        client,
+    )
+
+
+def dns_record(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import dns_record
+
+    dns_record.run(
+        BenchModule(
+            state="present",
+            name="bench",
+            domain="maas",
+            type="A/AAAA",
+            data="10.255.255.1",
+        ),
+        client,
+    )
+
+
+def vm_host_info(fake, dataset, client):
+    from ansible_collections.maas.maas.plugins.modules import vm_host_info
+
+    vm_host_info.run(BenchModule(), client)
+
+
+SCENARIOS = dict(
+    inventory=inventory,
+    inventory_incremental=inventory_incremental,
+    machine_info=machine_info,
+    machine_info_fqdn=machine_info_fqdn,
+    block_device_info=block_device_info,
+    tag_set=tag_set,
+    tag_info=tag_info,
+    subnet_info=subnet_info,
+    subnet_ip_range_info=subnet_ip_range_info,
+    dns_record_info=dns_record_info,
+    vm_host_info=vm_host_info,
+    subnet=subnet,
+    subnet_ip_range=subnet_ip_range,
+    dns_record=dns_record,
+)
+
+# Scenarios that modify the dataset get a fresh copy for every run.
+MUTATING = ("tag_set", "subnet", "subnet_ip_range", "dns_record")
+
+# Scenarios whose first run only prepares the state of the following ones.
+WARMUP = ("inventory_incremental",)
+
+
+def run_scenario(
+    name, machines, latency, repeat, pool_maxsize, cache_dir, compress=False
+):
+    from ansible_collections.maas.maas.plugins.module_utils.client import (
+        Client,
+    )
+    from ansible_collections.maas.maas.plugins.module_utils.response_cache import (
+        ResponseCache,
+    )
+
+    # With a response cache, the first run only fills the cache.
+    warmup = 1 if cache_dir or name in WARMUP else 0
+    dataset = make_dataset(machines)
+    timings = []
+    with FakeMaas(
+        dataset, latency, etags=bool(cache_dir), compress=compress
+    ) as fake:
+        for i in range(warmup + repeat):
+            if i and name in MUTATING:
+                fake.dataset = dataset = make_dataset(machines)
+            client = Client(
+                fake.url,
+                "token-key",
+                "token-secret",
+                "customer-key",
+                pool_maxsize=pool_maxsize,
+                cache=ResponseCache(cache_dir) if cache_dir else None,
+            )
+            fake.reset_counters()
+            start = time.perf_counter()
+            SCENARIOS[name](fake, dataset, client)
+            if i >= warmup:
+                timings.append(time.perf_counter() - start)
+            client.close()
+        return dict(
+            scenario=name,
+            machines=machines,
+            latency_ms=latency * 1000,
+            seconds=statistics.median(timings),
+            requests=fake.requests,
+            connections=fake.connections,
+            bytes_sent=fake.bytes_sent,
+            bytes_received=fake.bytes_received,
+        )
+
+
+def print_results(results):
+    header = "{0:<22} {1:>8} {2:>10} {3:>9} {4:>6} {5:>12} {6:>10}"
+    row = "{0:<22} {1:>8} {2:>10.1f} {3:>9} {4:>6} {5:>12.1f} {6:>10.1f}"
+    print(
+        header.format(
+            "scenario",
+            "machines",
+            "ms",
+            "requests",
+            "conns",
+            "KiB down",
+            "KiB up",
+        )
+    )
+    for r in results:
+        print(
+            row.format(
+                r["scenario"],
+                r["machines"],
+                r["seconds"] * 1000,
+                r["requests"],
+                r["connections"],
+                r["bytes_sent"] / 1024,
+                r["bytes_received"] / 1024,
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--machines",
+        type=int,
+        nargs="+",
+        default=[100, 1000],
+        help="Dataset sizes, from 100 to 50000 machines.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0,
+        help="Latency added to every request, in milliseconds.",
+    )
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=sorted(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--pool-maxsize",
+        type=int,
+        default=10,
+        help="Client connection pool size, 0 disables connection reuse.",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="Send ETags from the server and cache responses in the client. "
+        "Every scenario runs once more to fill the cache first.",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Gzip encode responses that the client accepts compressed.",
+    )
+    parser.add_argument("--json", help="Also write the results to a file.")
+    args = parser.parse_args()
+
+    load_collection()
+    results = []
+    for machines in args.machines:
+        for name in args.scenario:
+            with tempfile.TemporaryDirectory() as tmp:
+                results.append(
+                    run_scenario(
+                        name,
+                        machines,
+                        args.latency / 1000,
+                        args.repeat,
+                        args.pool_maxsize,
+                        tmp if args.response_cache else None,
+                        args.compress,
+                    )
+                )
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
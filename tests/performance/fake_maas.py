@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Local stand-in for the MAAS region API, used by the benchmarks.
+
+It serves a synthetic dataset of configurable size over HTTP/1.1 with
+keep-alive, optionally adds latency to every request and counts requests and
+bytes, so the cost of a module run can be expressed in round trips and
+traffic. Only the endpoints and filters used by the collection are served.
+
+Run it standalone to point modules or the inventory plugin at it:
+
+    python tests/performance/fake_maas.py --machines 1000 --port 5240
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import socket
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+STATUSES = ["Ready", "Deployed", "Allocated", "New", "Broken"]
+
+
+def make_machine(i, domains, zones, pools, tags, vm_hosts):
+    hostname = "machine-{0:05d}".format(i)
+    system_id = "m{0:05x}".format(i)
+    domain = domains[i % len(domains)]
+    subnet = i // 250
+    interfaces = [
+        dict(
+            id=i * 10 + n,
+            name="eth{0}".format(n),
+            type="physical",
+            mac_address="52:54:00:{0:02x}:{1:02x}:{2:02x}".format(
+                (i >> 16) & 0xFF, (i >> 8) & 0xFF, (i + n) & 0xFF
+            ),
+            vlan=dict(id=5001, name="untagged", fabric="fabric-0", vid=0),
+            links=[
+                dict(
+                    id=i * 10 + n,
+                    mode="auto",
+                    ip_address="10.{0}.{1}.{2}".format(
+                        subnet >> 8, subnet & 0xFF, i % 250 + 2
+                    ),
+                    subnet=dict(id=subnet + 1, cidr="10.0.0.0/24"),
+                )
+            ],
+            mtu=1500,
+            tags=[],
+            effective_mtu=1500,
+            enabled=True,
+            numa_node=0,
+            system_id=system_id,
+        )
+        for n in range(2)
+    ]
+    disks = [
+        dict(
+            id=i * 10 + n,
+            name="sd{0}".format("ab"[n]),
+            size=(n + 1) * 10 * 1024**3,
+            block_size=512,
+            model="QEMU HARDDISK",
+            serial="disk-{0}-{1}".format(i, n),
+            path="/dev/disk/by-dname/sd{0}".format("ab"[n]),
+            id_path=None,
+            tags=["ssd"] if n == 0 else [],
+            type="physical",
+            partitions=[],
+            filesystem=None,
+            used_for="Unused",
+            system_id=system_id,
+        )
+        for n in range(2)
+    ]
+    return dict(
+        system_id=system_id,
+        hostname=hostname,
+        fqdn="{0}.{1}".format(hostname, domain["name"]),
+        domain=domain,
+        zone=zones[i % len(zones)],
+        pool=pools[i % len(pools)],
+        pod=vm_hosts[i % len(vm_hosts)] if vm_hosts else None,
+        tag_names=[tags[i % len(tags)]["name"]] if tags else [],
+        status_name=STATUSES[i % len(STATUSES)],
+        memory=2048,
+        cpu_count=2,
+        osystem="ubuntu",
+        distro_series="jammy",
+        hwe_kernel="hwe-22.04",
+        min_hwe_kernel="ga-22.04",
+        power_type="lxd",
+        architecture="amd64/generic",
+        interface_set=interfaces,
+        blockdevice_set=disks,
+        boot_interface=interfaces[0],
+        ip_addresses=[link["ip_address"] for link in interfaces[0]["links"]],
+        resource_uri="/MAAS/api/2.0/machines/{0}/".format(system_id),
+    )
+
+
+def make_dataset(machines=100):
+    """Returns a synthetic region with the given number of machines."""
+    domains = [dict(id=i, name="domain-{0}".format(i)) for i in range(10)]
+    domains[0]["name"] = "maas"
+    zones = [dict(id=i, name="zone-{0}".format(i)) for i in range(4)]
+    pools = [dict(id=i, name="pool-{0}".format(i)) for i in range(4)]
+    tags = [
+        dict(name="tag-{0}".format(i), definition="", comment="")
+        for i in range(20)
+    ]
+    vm_hosts = [
+        dict(id=i, name="vm-host-{0}".format(i))
+        for i in range(max(1, machines // 50))
+    ]
+    machine_list = [
+        make_machine(i, domains, zones, pools, tags, vm_hosts)
+        for i in range(machines)
+    ]
+    vlan = dict(id=5001, name="untagged", fabric="fabric-0", vid=0)
+    fabrics = [dict(id=0, name="fabric-0", vlans=[dict(vlan, fabric_id=0)])]
+    subnet_count = max(1, (machines + 249) // 250)
+    subnets = [
+        dict(
+            id=i + 1,
+            name="subnet-{0}".format(i),
+            cidr="10.{0}.{1}.0/24".format(i >> 8, i & 0xFF),
+            vlan=dict(vlan),
+            space="undefined",
+            gateway_ip=None,
+            dns_servers=[],
+        )
+        for i in range(subnet_count)
+    ]
+    ip_ranges = [
+        dict(
+            id=i + 1,
+            type="dynamic",
+            start_ip="10.{0}.{1}.200".format(i >> 8, i & 0xFF),
+            end_ip="10.{0}.{1}.250".format(i >> 8, i & 0xFF),
+            subnet=subnets[i],
+            comment="",
+        )
+        for i in range(subnet_count)
+    ]
+    dns_records = [
+        dict(
+            id=i + 1,
+            fqdn=machine["fqdn"],
+            address_ttl=None,
+            ip_addresses=[dict(ip=ip) for ip in machine["ip_addresses"]],
+            resource_records=[],
+        )
+        for i, machine in enumerate(machine_list)
+    ]
+    return dict(
+        machines=machine_list,
+        domains=domains,
+        zones=zones,
+        pools=pools,
+        tags=tags,
+        vm_hosts=vm_hosts,
+        fabrics=fabrics,
+        subnets=subnets,
+        ip_ranges=ip_ranges,
+        events=[],
+        dns_records=dns_records,
+    )
+
+
+def parse_multipart(content_type, body):
+    # Returns form fields as a list of (name, value) pairs.
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not match:
+        return []
+    fields = []
+    for part in body.split(b"--" + match.group(1).encode("ascii")):
+        if b"\r\n\r\n" not in part:
+            continue
+        headers, value = part.split(b"\r\n\r\n", 1)
+        name = re.search(rb'name="([^"]*)"', headers)
+        if name:
+            fields.append(
+                (name.group(1).decode("utf-8"), value[: -len(b"\r\n")])
+            )
+    return fields
+
+
+def form_values(fields):
+    return dict((name, value.decode("utf-8")) for name, value in fields)
+
+
+def make_subnet(dataset, values):
+    dns_servers = values.get("dns_servers") or []
+    if isinstance(dns_servers, str):
+        dns_servers = [s for s in dns_servers.split(",") if s]
+    return dict(
+        name=values["name"],
+        cidr=values["cidr"],
+        vlan=values.get("vlan") or dict(dataset["subnets"][0]["vlan"]),
+        space="undefined",
+        gateway_ip=values.get("gateway_ip"),
+        dns_servers=dns_servers,
+    )
+
+
+def make_ip_range(dataset, values):
+    subnet = values["subnet"]
+    if not isinstance(subnet, dict):
+        subnet = next(
+            s for s in dataset["subnets"] if str(s["id"]) == str(subnet)
+        )
+    return dict(
+        type=values["type"],
+        start_ip=values["start_ip"],
+        end_ip=values["end_ip"],
+        subnet=subnet,
+        comment=values.get("comment") or "",
+    )
+
+
+def make_dns_record(dataset, values):
+    ip_addresses = values.get("ip_addresses") or []
+    if isinstance(ip_addresses, str):
+        ip_addresses = [dict(ip=ip) for ip in ip_addresses.split()]
+    ttl = values.get("address_ttl")
+    fqdn = values.get("fqdn") or "{0}.{1}".format(
+        values["name"], values["domain"]
+    )
+    return dict(
+        fqdn=fqdn,
+        address_ttl=None if ttl is None else int(ttl),
+        ip_addresses=ip_addresses,
+        resource_records=[],
+    )
+
+
+# Lists that can be written to, with the function that turns form values
+# into an item.
+WRITABLE = dict(
+    subnets=make_subnet,
+    ip_ranges=make_ip_range,
+    dns_records=make_dns_record,
+)
+
+
+def matches(machine, query):
+    # Server-side machine filters. A machine matches if it matches any of
+    # the values of every filter, except for tags which must all be set.
+    fields = dict(
+        hostname=lambda m: [m["hostname"]],
+        id=lambda m: [m["system_id"]],
+        domain=lambda m: [m["domain"]["name"]],
+        zone=lambda m: [m["zone"]["name"]],
+        pool=lambda m: [m["pool"]["name"]],
+        status=lambda m: [m["status_name"].lower().replace(" ", "_")],
+        mac_address=lambda m: [i["mac_address"] for i in m["interface_set"]],
+    )
+    for key, values in query.items():
+        if key == "tags":
+            if not set(values) <= set(machine["tag_names"]):
+                return False
+        elif key in fields:
+            if not set(values) & set(fields[key](machine)):
+                return False
+    return True
+
+
+class FakeMaas:
+    """
+    Fake MAAS region serving a dataset from make_dataset().
+
+    Every request sleeps for latency seconds before it is answered. The
+    requests, bytes_received and bytes_sent counters include headers. With
+    etags set, GET responses carry an ETag and conditional requests for
+    unchanged content are answered with 304 Not Modified. With compress set,
+    responses are gzip encoded for clients that accept it.
+    """
+
+    def __init__(
+        self,
+        dataset,
+        latency=0,
+        host="127.0.0.1",
+        port=0,
+        etags=False,
+        compress=False,
+    ):
+        self.dataset = dataset
+        self.latency = latency
+        self.etags = etags
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.reset_counters()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{0}:{1}/MAAS".format(host, port)
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, received=0, sent=0, request=False, connection=False):
+        with self.lock:
+            self.requests += int(request)
+            self.connections += int(connection)
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                # Headers and body are written separately, do not let Nagle's
+                # algorithm delay the body.
+                self.request.setsockopt(
+                    socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+                )
+                BaseHTTPRequestHandler.setup(self)
+                fake._count(connection=True)
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                fake._count(
+                    received=len(self.requestline)
+                    + len(str(self.headers))
+                    + length,
+                    request=True,
+                )
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parts = urlsplit(self.path)
+                path = parts.path[parts.path.find("/api/2.0/") :]
+                query = parse_qs(parts.query)
+                fields = parse_multipart(
+                    self.headers.get("Content-type"), body
+                )
+                with fake.lock:
+                    status, data = fake.route(method, path, query, fields)
+                self._send(status, data, method)
+
+            def _send(self, status, data, method):
+                payload = b"" if status == 204 else json.dumps(data).encode()
+                headers = {"Content-Type": "application/json"}
+                if fake.etags and method == "GET" and status == 200:
+                    etag = '"{0}"'.format(hashlib.md5(payload).hexdigest())
+                    headers["ETag"] = etag
+                    if self.headers.get("If-None-Match") == etag:
+                        status, payload = 304, b""
+                accept = self.headers.get("Accept-Encoding") or ""
+                if payload and fake.compress and "gzip" in accept:
+                    payload = gzip.compress(payload)
+                    headers["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                # Status line and headers are roughly 150 bytes.
+                fake._count(sent=len(payload) + 150)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
+
+    def _machine(self, system_id):
+        for machine in self.dataset["machines"]:
+            if machine["system_id"] == system_id:
+                return machine
+
+    def route(self, method, path, query, fields):
+        """Returns (status, data) for a request. Called under the lock."""
+        data = self.dataset
+        op = (query.pop("op", None) or [None])[0]
+        segments = [s for s in path.split("/")[3:] if s]
+        collection = segments[0] if segments else None
+        key = segments[1] if len(segments) > 1 else None
+
+        if collection == "machines":
+            if key is None and method == "GET":
+                return 200, [m for m in data["machines"] if matches(m, query)]
+            machine = self._machine(key)
+            if machine is None:
+                return 404, "Not Found"
+            return 200, machine
+        if collection == "nodes" and segments[2:3] == ["blockdevices"]:
+            machine = self._machine(key)
+            if machine is None:
+                return 404, "Not Found"
+            return 200, machine["blockdevice_set"]
+        if collection == "tags":
+            return self._route_tags(method, key, op, fields)
+        if collection == "events" and op == "query" and method == "GET":
+            # Newest events first, like MAAS.
+            after = int((query.get("after") or [-1])[0])
+            limit = int((query.get("limit") or [100])[0])
+            events = sorted(
+                (e for e in data["events"] if e["id"] > after),
+                key=lambda e: -e["id"],
+            )
+            return 200, dict(count=len(events[:limit]), events=events[:limit])
+        simple = {
+            "fabrics": "fabrics",
+            "subnets": "subnets",
+            "ipranges": "ip_ranges",
+            "dnsresources": "dns_records",
+            "vm-hosts": "vm_hosts",
+            "pods": "vm_hosts",
+            "domains": "domains",
+            "zones": "zones",
+            "resourcepools": "pools",
+        }
+        if collection in simple:
+            return self._route_simple(method, simple[collection], key, fields)
+        return 404, "Not Found"
+
+    def _route_simple(self, method, name, key, fields):
+        # Lists, plus creating, updating and deleting items of the lists
+        # that the collection's modules write to.
+        items = self.dataset[name]
+        if key is None:
+            if method == "GET":
+                return 200, items
+            if method == "POST" and name in WRITABLE:
+                item = dict(
+                    id=max((i["id"] for i in items), default=0) + 1,
+                    **WRITABLE[name](self.dataset, form_values(fields))
+                )
+                items.append(item)
+                return 200, item
+            return 404, "Not Found"
+        item = next((i for i in items if str(i["id"]) == key), None)
+        if item is None:
+            return 404, "Not Found"
+        if method == "GET":
+            return 200, item
+        if method == "PUT" and name in WRITABLE:
+            values = dict(item, **form_values(fields))
+            item.update(WRITABLE[name](self.dataset, values))
+            return 200, item
+        if method == "DELETE" and name in WRITABLE:
+            items.remove(item)
+            return 204, None
+        return 404, "Not Found"
+
+    def _route_tags(self, method, name, op, fields):
+        tags = self.dataset["tags"]
+        if name is None:
+            if method == "POST":
+                tag = dict(
+                    name=dict(fields)["name"].decode("utf-8"),
+                    definition="",
+                    comment="",
+                )
+                tags.append(tag)
+                return 200, tag
+            return 200, tags
+        if not any(tag["name"] == name for tag in tags):
+            return 404, "Not Found"
+        if op == "machines":
+            return 200, [
+                m for m in self.dataset["machines"] if name in m["tag_names"]
+            ]
+        if op == "update_nodes":
+            add = set(v.decode("utf-8") for k, v in fields if k == "add")
+            remove = set(v.decode("utf-8") for k, v in fields if k == "remove")
+            added = removed = 0
+            for machine in self.dataset["machines"]:
+                if machine["system_id"] in add and (
+                    name not in machine["tag_names"]
+                ):
+                    machine["tag_names"].append(name)
+                    added += 1
+                if machine["system_id"] in remove and (
+                    name in machine["tag_names"]
+                ):
+                    machine["tag_names"].remove(name)
+                    removed += 1
+            return 200, dict(added=added, removed=removed)
+        return 200, next(tag for tag in tags if tag["name"] == name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--machines", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Latency in milliseconds."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5240)
+    parser.add_argument(
+        "--compress", action="store_true", help="Gzip encode responses."
+    )
+    args = parser.parse_args()
+
+    fake = FakeMaas(
+        make_dataset(args.machines),
+        args.latency / 1000,
+        args.host,
+        args.port,
+        compress=args.compress,
+    )
+    print("Serving {0} machines on {1}".format(args.machines, fake.url))
+    try:
+        fake.start()._thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.callback.maas_metrics import (
+    CallbackModule,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def metrics(requests, time):
+    return dict(
+        requests=[],
+        totals=dict(
+            requests=requests,
+            bytes_sent=10 * requests,
+            bytes_received=100 * requests,
+            bytes_uncompressed=400 * requests,
+            time=time,
+        ),
+    )
+
+
+def task_result(mocker, host, action, result):
+    task_result = mocker.Mock(_result=result)
+    task_result._host.get_name.return_value = host
+    task_result._task.resolved_action = action
+    return task_result
+
+
+@pytest.fixture
+def callback(mocker):
+    callback = CallbackModule()
+    callback._display = mocker.Mock()
+    return callback
+
+
+class TestCallback:
+    def test_aggregate(self, callback, mocker):
+        callback.v2_runner_on_ok(
+            task_result(
+                mocker,
+                "a",
+                "maas.maas.tag",
+                dict(maas_metrics=metrics(2, 0.5)),
+            )
+        )
+        callback.v2_runner_on_failed(
+            task_result(
+                mocker,
+                "b",
+                "maas.maas.tag",
+                dict(maas_metrics=metrics(1, 0.25)),
+            )
+        )
+        callback.v2_runner_on_ok(
+            task_result(
+                mocker,
+                "a",
+                "maas.maas.machine_info",
+                dict(
+                    results=[
+                        dict(maas_metrics=metrics(3, 1)),
+                        dict(maas_metrics=metrics(1, 1)),
+                    ]
+                ),
+            )
+        )
+        callback.v2_runner_on_ok(
+            task_result(mocker, "a", "ansible.builtin.debug", dict(msg="x"))
+        )
+
+        assert callback.hosts == {
+            "a": dict(
+                requests=6,
+                bytes_sent=60,
+                bytes_received=600,
+                bytes_uncompressed=2400,
+                time=2.5,
+            ),
+            "b": dict(
+                requests=1,
+                bytes_sent=10,
+                bytes_received=100,
+                bytes_uncompressed=400,
+                time=0.25,
+            ),
+        }
+        assert callback.modules == {
+            "maas.maas.tag": dict(
+                requests=3,
+                bytes_sent=30,
+                bytes_received=300,
+                bytes_uncompressed=1200,
+                time=0.75,
+            ),
+            "maas.maas.machine_info": dict(
+                requests=4,
+                bytes_sent=40,
+                bytes_received=400,
+                bytes_uncompressed=1600,
+                time=2,
+            ),
+        }
+
+    def test_stats(self, callback, mocker):
+        callback.v2_runner_on_ok(
+            task_result(
+                mocker,
+                "a",
+                "maas.maas.tag",
+                dict(maas_metrics=metrics(2, 0.5)),
+            )
+        )
+        callback.v2_playbook_on_stats(mocker.Mock())
+
+        callback._display.display.assert_any_call(
+            "a: 2 requests, 20 bytes sent, 200 bytes received "
+            "(800 uncompressed), 0.500 s"
+        )
+        callback._display.display.assert_any_call(
+            "maas.maas.tag: 2 requests, 20 bytes sent, 200 bytes received "
+            "(800 uncompressed), 0.500 s"
+        )
+
+    def test_stats_without_metrics(self, callback, mocker):
+        callback.v2_playbook_on_stats(mocker.Mock())
+        callback._display.banner.assert_not_called()
+
+    def test_summary_per_play(self, callback, mocker):
+        first = mocker.Mock()
+        first.get_name.return_value = "Deploy"
+        second = mocker.Mock()
+        second.get_name.return_value = "Tag"
+
+        callback.v2_playbook_on_play_start(first)
+        callback.v2_runner_on_ok(
+            task_result(
+                mocker,
+                "a",
+                "maas.maas.instance",
+                dict(maas_metrics=metrics(2, 0.5)),
+            )
+        )
+        callback.v2_playbook_on_play_start(second)
+
+        callback._display.banner.assert_has_calls(
+            [
+                mocker.call("MAAS METRICS PER HOST [Deploy]"),
+                mocker.call("MAAS METRICS PER MODULE [Deploy]"),
+            ]
+        )
+        assert callback.hosts == {}
+        assert callback.modules == {}
+
+        callback._display.reset_mock()
+        callback.v2_runner_on_ok(
+            task_result(
+                mocker,
+                "a",
+                "maas.maas.tag",
+                dict(maas_metrics=metrics(1, 0.25)),
+            )
+        )
+        callback.v2_playbook_on_stats(mocker.Mock())
+
+        assert callback._display.banner.call_args_list == [
+            mocker.call("MAAS METRICS PER HOST [Tag]"),
+            mocker.call("MAAS METRICS PER MODULE [Tag]"),
+        ]
+        # Only the requests of the last play are counted.
+        callback._display.display.assert_any_call(
+            "a: 1 requests, 10 bytes sent, 100 bytes received "
+            "(400 uncompressed), 0.250 s"
+        )
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+from ansible.module_utils.connection import ConnectionError
+import pytest
+
+from ansible_collections.maas.maas.plugins.httpapi.maas import HttpApi
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.httpapi_client import (
+    decode_bytes,
+    get_error_code,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+OPTIONS = dict(
+    path="/MAAS",
+    token_key="token_key",
+    token_secret="token_secret",
+    customer_key="customer_key",
+    pool_maxsize=10,
+    cache_dir=None,
+    cache_max_size=100,
+    retries=None,
+    rate=None,
+    max_in_flight=None,
+)
+
+
+@pytest.fixture
+def httpapi(mocker):
+    connection = mocker.Mock()
+    connection.get_option.side_effect = dict(
+        host="maas", port=5240, use_ssl=False
+    ).get
+
+    def constructor(**options):
+        plugin = HttpApi(connection)
+        mocker.patch.object(
+            plugin, "get_option", side_effect=dict(OPTIONS, **options).get
+        )
+        return plugin
+
+    return constructor
+
+
+class TestHttpApi:
+    def test_get_client(self, httpapi):
+        plugin = httpapi()
+        client = plugin.get_client()
+        assert client.host == "http://maas:5240/MAAS"
+        assert client.retry is None
+        assert plugin.get_client() is client
+
+    def test_get_client_retries(self, httpapi):
+        client = httpapi(retries=5).get_client()
+        assert client.retry.retries == 5
+
+    def test_send_request(self, httpapi, mocker):
+        httpapi = httpapi()
+        request = mocker.patch.object(
+            httpapi.get_client(),
+            "request",
+            return_value=Response(200, b"[]", {"ETag": "x"}, 0.5, 2),
+        )
+
+        result = httpapi.send_request(None, path="/api/2.0/machines/")
+
+        request.assert_called_once_with(
+            "GET",
+            "/api/2.0/machines/",
+            query=None,
+            data=None,
+            headers=None,
+            binary_data=None,
+            timeout=None,
+        )
+        assert decode_bytes(result["data"]) == b"[]"
+        assert result["headers"] == {"etag": "x"}
+        assert result["bytes_received"] == 2
+
+    def test_send_request_error(self, httpapi, mocker):
+        httpapi = httpapi()
+        mocker.patch.object(
+            httpapi.get_client(),
+            "request",
+            side_effect=errors.AuthError("Failed to authenticate"),
+        )
+
+        with pytest.raises(
+            ConnectionError, match="Failed to authenticate"
+        ) as exc_info:
+            httpapi.send_request(None, path="/api/2.0/machines/")
+        assert exc_info.value.code == get_error_code(errors.AuthError(""))
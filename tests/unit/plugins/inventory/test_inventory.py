@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+import json
+import sys
+import time
+
+from ansible.inventory.data import InventoryData
+from ansible.template import Templar
+import pytest
+
+from ansible_collections.maas.maas.plugins.inventory.inventory import (
+    InventoryModule,
+    _TemplateCache,
+)
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.machine_snapshot import (
+    MachineSnapshot,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+MACHINES = [
+    dict(
+        system_id="abc",
+        fqdn="first.maas",
+        domain=dict(name="maas"),
+        status_name="Ready",
+        zone="default",
+        pool="default",
+        tag_names=["virtual"],
+        architecture="amd64/generic",
+        vm_host="pod-1",
+    ),
+    dict(
+        system_id="def",
+        fqdn="second.test",
+        domain=dict(name="test"),
+        status_name="Deployed",
+        zone="zone-1",
+        pool="default",
+        tag_names=[],
+        architecture="arm64/generic",
+        vm_host=None,
+    ),
+]
+
+REGION = dict(
+    host="https://maas.com",
+    token_key="token-key",
+    token_secret="token-secret",
+    customer_key="customer-key",
+)
+
+
+class FakeAsyncClient:
+    def __init__(self, result=None, error=None, delay=0):
+        self.result = result
+        self.error = error
+        self.delay = delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def call(self, func, *args):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def plugin(mocker):
+    def constructor(options=None):
+        plugin = InventoryModule()
+        opts = dict(
+            cache=False,
+            status=None,
+            regions=None,
+            compose=None,
+            groups=None,
+            keyed_groups=None,
+            strict=False,
+            leading_separator=True,
+            incremental=False,
+            snapshot_dir=None,
+            snapshot_timeout=86400,
+        )
+        opts.update(options or {})
+        mocker.patch.object(plugin, "_read_config_data")
+        mocker.patch.object(plugin, "get_option", side_effect=opts.get)
+        mocker.patch.object(plugin, "get_client")
+        mocker.patch.object(plugin, "get_all_machines", return_value=MACHINES)
+        plugin._cache = {}
+        return plugin
+
+    return constructor
+
+
+@pytest.fixture
+def inventory(mocker):
+    inventory = mocker.Mock()
+    inventory.get_host.return_value.get_vars.return_value = {}
+    return inventory
+
+
+class TestGetMachines:
+    def test_get_machines(self, client):
+        client.iter_records.return_value = iter(
+            [
+                {
+                    "system_id": "abc",
+                    "fqdn": "first.maas",
+                    "domain": {"id": 0, "name": "maas"},
+                    "status_name": "Ready",
+                    "zone": {"id": 1, "name": "default"},
+                    "pool": {"id": 0, "name": "default"},
+                    "tag_names": ["virtual"],
+                    "architecture": "amd64/generic",
+                    "pod": {"id": 1, "name": "pod-1"},
+                    "interface_set": [],
+                }
+            ]
+        )
+        assert InventoryModule.get_machines(client) == MACHINES[:1]
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/machines/", query=None
+        )
+
+    def test_get_machines_query(self, client):
+        client.iter_records.return_value = iter([])
+
+        InventoryModule.get_machines(client, dict(status="deployed"))
+
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/machines/", query=dict(status="deployed")
+        )
+
+
+class TestRefreshMachines:
+    @staticmethod
+    def events(*events):
+        return Response(200, json.dumps(dict(events=list(events))))
+
+    @staticmethod
+    def records(*machines):
+        # Machines as returned by MAAS
+        return iter(
+            dict(
+                m,
+                zone=dict(name=m["zone"]),
+                pool=dict(name=m["pool"]),
+                pod=m["vm_host"] and dict(name=m["vm_host"]),
+            )
+            for m in machines
+        )
+
+    def test_full(self, client, mocker):
+        client.host = "https://maas.com"
+        client.token_key = "token"
+        client.get.return_value = self.events(dict(id=7, node="abc"))
+        client.iter_records.return_value = self.records(*MACHINES)
+        snapshot = mocker.Mock(get_key=MachineSnapshot.get_key)
+        snapshot.get.return_value = None
+
+        machines = InventoryModule.refresh_machines(client, {}, snapshot)
+
+        assert machines == MACHINES
+        client.get.assert_called_once_with(
+            "/api/2.0/events/", query=dict(op="query", level="DEBUG", limit=1)
+        )
+        assert snapshot.set.call_args[0][1] == 7
+        assert snapshot.set.call_args[0][3] == MACHINES
+
+    def test_incremental(self, client, mocker):
+        client.host = "https://maas.com"
+        client.token_key = "token"
+        client.get.return_value = self.events(
+            dict(id=9, node="abc"), dict(id=8, node="new"), dict(id=10)
+        )
+        changed = [
+            dict(MACHINES[0], status_name="Deployed"),
+            dict(MACHINES[1], system_id="new"),
+        ]
+        client.iter_records.return_value = self.records(*changed)
+        snapshot = mocker.Mock(get_key=MachineSnapshot.get_key)
+        snapshot.get.return_value = (7, 100, MACHINES)
+
+        machines = InventoryModule.refresh_machines(
+            client, dict(zone="z"), snapshot
+        )
+
+        assert machines == [changed[0], MACHINES[1], changed[1]]
+        client.get.assert_called_once_with(
+            "/api/2.0/events/",
+            query=dict(op="query", level="DEBUG", limit=1000, after=7),
+        )
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/machines/", query=dict(zone="z", id=["abc", "new"])
+        )
+        snapshot.set.assert_called_once_with(mocker.ANY, 10, 100, machines)
+
+    def test_no_changes(self, client, mocker):
+        client.host = "https://maas.com"
+        client.token_key = "token"
+        client.get.return_value = self.events()
+        snapshot = mocker.Mock(get_key=MachineSnapshot.get_key)
+        snapshot.get.return_value = (7, 100, MACHINES)
+
+        machines = InventoryModule.refresh_machines(client, {}, snapshot)
+
+        assert machines == MACHINES
+        client.iter_records.assert_not_called()
+
+    def test_too_many_events(self, client, mocker):
+        client.host = "https://maas.com"
+        client.token_key = "token"
+        client.get.side_effect = [
+            self.events(*[dict(id=i, node="abc") for i in range(1000)]),
+            self.events(dict(id=2000)),
+        ]
+        client.iter_records.return_value = self.records(*MACHINES)
+        snapshot = mocker.Mock(get_key=MachineSnapshot.get_key)
+        snapshot.get.return_value = (7, 100, [])
+
+        machines = InventoryModule.refresh_machines(client, {}, snapshot)
+
+        assert machines == MACHINES
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/machines/", query=None
+        )
+        assert snapshot.set.call_args[0][1] == 2000
+
+    def test_merge_changes_deleted(self):
+        machines = InventoryModule.merge_changes(MACHINES, [], {"abc"})
+
+        assert machines == MACHINES[1:]
+
+
+class TestGetQuery:
+    def test_no_filters(self, plugin):
+        assert plugin().get_query() == {}
+
+    def test_filters(self, plugin):
+        inventory_plugin = plugin(
+            dict(
+                status="failed deployment",
+                zone="z1",
+                pool="p1",
+                domain="maas",
+                tags=["a", "b"],
+            )
+        )
+
+        assert inventory_plugin.get_query() == dict(
+            status="failed_deployment",
+            zone="z1",
+            pool="p1",
+            domain="maas",
+            tags=["a", "b"],
+        )
+
+
+class TestGetRegions:
+    def test_from_env(self, mocker, plugin):
+        mocker.patch.dict(
+            "os.environ",
+            MAAS_HOST="https://maas.com",
+            MAAS_TOKEN_KEY="token-key",
+            MAAS_TOKEN_SECRET="token-secret",
+            MAAS_CUSTOMER_KEY="customer-key",
+        )
+
+        assert plugin().get_regions() == [dict(REGION, name=None)]
+
+    def test_from_options(self, plugin):
+        regions = [dict(REGION, name="east"), dict(REGION, name="west")]
+
+        assert plugin(dict(regions=regions)).get_regions() == regions
+
+    def test_missing_keys(self, plugin):
+        regions = [dict(name="east", host="https://maas.com")]
+
+        with pytest.raises(errors.MaasError, match="token_key.*region east"):
+            plugin(dict(regions=regions)).get_regions()
+
+
+class TestGetAllMachines:
+    def test_concurrent_merge(self, mocker, plugin):
+        clients = dict(
+            east=FakeAsyncClient(MACHINES[:1], delay=0.2),
+            west=FakeAsyncClient(MACHINES[1:], delay=0.2),
+        )
+        inventory_plugin = plugin()
+        inventory_plugin.get_client.side_effect = lambda r: clients[r["name"]]
+        regions = [dict(REGION, name="east"), dict(REGION, name="west")]
+
+        started = time.monotonic()
+        machines = InventoryModule.get_all_machines(inventory_plugin, regions)
+
+        # Regions are fetched at the same time, not one after another.
+        assert time.monotonic() - started < 0.35
+        assert [(m["fqdn"], m["region"]) for m in machines] == [
+            ("first.maas", "east"),
+            ("second.test", "west"),
+        ]
+
+    def test_region_error(self, plugin):
+        inventory_plugin = plugin()
+        inventory_plugin.get_client.return_value = FakeAsyncClient(
+            error=errors.MaasError("boom")
+        )
+        regions = [dict(REGION, name="east")]
+
+        with pytest.raises(errors.MaasError, match="Region east: boom"):
+            InventoryModule.get_all_machines(inventory_plugin, regions)
+
+    def test_merge_dedup(self):
+        regions = [dict(name="east"), dict(name="west")]
+        east = [dict(MACHINES[0])]
+        west = [dict(MACHINES[0]), dict(MACHINES[1])]
+
+        machines = InventoryModule.merge_machines(regions, [east, west])
+
+        assert [(m["system_id"], m["region"]) for m in machines] == [
+            ("abc", "east"),
+            ("def", "west"),
+        ]
+
+
+class TestPopulate:
+    def test_all_machines(self, mocker, plugin, inventory):
+        inventory_plugin = plugin()
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory.add_group.assert_has_calls(
+            [mocker.call("maas"), mocker.call("test")]
+        )
+        inventory.add_host.assert_has_calls(
+            [
+                mocker.call("first.maas", group="maas"),
+                mocker.call("second.test", group="test"),
+            ]
+        )
+
+    def test_status_filter(self, plugin, inventory):
+        inventory_plugin = plugin(dict(status="deployed"))
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory.add_host.assert_called_once_with("second.test", group="test")
+
+    def test_regions(self, plugin, inventory):
+        inventory_plugin = plugin()
+        inventory_plugin.get_all_machines.return_value = [
+            dict(MACHINES[0], region="east")
+        ]
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory.add_child.assert_called_once_with("east", "east_maas")
+        inventory.add_host.assert_called_once_with(
+            "first.maas", group="east_maas"
+        )
+        inventory.set_variable.assert_any_call(
+            "first.maas", "maas_region", "east"
+        )
+
+
+class TestConstruct:
+    def test_groups(self, plugin):
+        inventory_plugin = plugin(
+            dict(
+                compose=dict(arch="architecture"),
+                groups=dict(vms="vm_host is not none"),
+                keyed_groups=[
+                    dict(key="zone", prefix="zone"),
+                    dict(key="tags", prefix="tag"),
+                    dict(key="status | lower", prefix="status"),
+                ],
+            )
+        )
+        inventory = InventoryData()
+
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        def hosts(group):
+            return [h.name for h in inventory.groups[group].get_hosts()]
+
+        assert hosts("vms") == ["first.maas"]
+        assert hosts("zone_default") == ["first.maas"]
+        assert hosts("zone_zone_1") == ["second.test"]
+        assert hosts("tag_virtual") == ["first.maas"]
+        assert hosts("status_deployed") == ["second.test"]
+        assert inventory.get_host("second.test").vars["arch"] == (
+            "arm64/generic"
+        )
+
+    def test_host_variables(self, plugin):
+        inventory_plugin = plugin(
+            dict(
+                compose=dict(
+                    address="ansible_host",
+                    label="ansible_group ~ '-' ~ hostname",
+                ),
+                groups=dict(in_test="ansible_group == 'test'"),
+            )
+        )
+        inventory = InventoryData()
+
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        host_vars = inventory.get_host("first.maas").vars
+        assert host_vars["address"] == "first.maas"
+        assert host_vars["label"] == "maas-first"
+        assert [h.name for h in inventory.groups["in_test"].get_hosts()] == [
+            "second.test"
+        ]
+
+    def test_facts_from_old_cache(self):
+        facts = InventoryModule.get_facts(
+            dict(fqdn="a.maas", domain=dict(name="maas"), status_name="New")
+        )
+
+        assert facts["hostname"] == "a"
+        assert facts["tags"] == []
+        assert facts["zone"] is None
+
+
+class TestTemplateCache:
+    def test_reuses_results(self, mocker):
+        templar = Templar(loader=None)
+        template = mocker.spy(templar, "template")
+        cache = _TemplateCache(templar)
+
+        results = []
+        for zone in ["a", "b", "a", "a"]:
+            cache.available_variables = dict(zone=zone, fqdn=zone + ".maas")
+            results.append(cache.template("{{ zone | upper }}"))
+
+        assert results == ["A", "B", "A", "A"]
+        # The templar also templates its own results, ignore those calls.
+        calls = template.call_args_list
+        assert [c[0][0] for c in calls].count("{{ zone | upper }}") == 2
+
+    def test_unknown_variables_not_cached(self, mocker):
+        templar = Templar(loader=None)
+        template = mocker.spy(templar, "template")
+        cache = _TemplateCache(templar)
+        cache.available_variables = dict(zone="a")
+
+        cache.template("{{ other | default(zone) }}")
+        cache.template("{{ other | default(zone) }}")
+
+        calls = template.call_args_list
+        assert [c[0][0] for c in calls].count(
+            "{{ other | default(zone) }}"
+        ) == 2
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            "{{ 100 | random }}",
+            "{{ zone | ansible.builtin.random }}",
+            "{{ [zone, fqdn] | shuffle }}",
+            "{{ now() }} {{ zone }}",
+            "{{ lookup('env', 'HOME') ~ zone }}",
+            "{{ 'constant' }}",
+        ],
+    )
+    def test_volatile_templates_not_cached(self, mocker, expression):
+        templar = Templar(loader=None)
+        template = mocker.spy(templar, "template")
+        cache = _TemplateCache(templar)
+        cache.available_variables = dict(zone="a", fqdn="a.maas")
+
+        cache.template(expression)
+        cache.template(expression)
+
+        calls = template.call_args_list
+        assert [c[0][0] for c in calls].count(expression) == 2
+
+
+class TestCache:
+    def test_cache_disabled(self, plugin, inventory):
+        inventory_plugin = plugin()
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory_plugin.get_all_machines.assert_called_once()
+        assert inventory_plugin._cache == {}
+
+    def test_cache_hit(self, plugin, inventory):
+        inventory_plugin = plugin(dict(cache=True))
+        cache_key = inventory_plugin.get_cache_key("maas.yml")
+        inventory_plugin._cache[cache_key] = MACHINES[1:]
+
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory_plugin.get_client.assert_not_called()
+        inventory_plugin.get_all_machines.assert_not_called()
+        inventory.add_host.assert_called_once_with("second.test", group="test")
+
+    def test_cache_miss(self, plugin, inventory):
+        inventory_plugin = plugin(dict(cache=True))
+
+        inventory_plugin.parse(inventory, None, "maas.yml")
+
+        inventory_plugin.get_all_machines.assert_called_once()
+        cache_key = inventory_plugin.get_cache_key("maas.yml")
+        assert inventory_plugin._cache == {cache_key: MACHINES}
+
+    def test_cache_refresh(self, plugin, inventory):
+        inventory_plugin = plugin(dict(cache=True))
+        cache_key = inventory_plugin.get_cache_key("maas.yml")
+        inventory_plugin._cache[cache_key] = []
+
+        inventory_plugin.parse(inventory, None, "maas.yml", cache=False)
+
+        inventory_plugin.get_all_machines.assert_called_once()
+        assert inventory_plugin._cache == {cache_key: MACHINES}
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+from ansible.errors import AnsibleLookupError
+import pytest
+
+from ansible_collections.maas.maas.plugins.lookup import maas
+from ansible_collections.maas.maas.plugins.module_utils import errors
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+SUBNETS = [
+    dict(id=1, cidr="10.0.0.0/24", vlan=dict(fabric="fabric-0")),
+    dict(id=2, cidr="10.0.1.0/24", vlan=dict(fabric="fabric-1")),
+]
+
+
+@pytest.fixture
+def lookup(mocker, tmp_path):
+    def constructor(options=None, records=None):
+        opts = dict(
+            host="https://maas.com",
+            token_key="token-key",
+            token_secret="token-secret",
+            customer_key="customer-key",
+            query={},
+            attribute=None,
+            cache_timeout=60,
+            cache_dir=str(tmp_path),
+        )
+        opts.update(options or {})
+        plugin = maas.LookupModule()
+        mocker.patch.object(plugin, "set_options")
+        mocker.patch.object(plugin, "get_option", side_effect=opts.get)
+        client = mocker.Mock(host=opts["host"], token_key=opts["token_key"])
+        client.iter_records.side_effect = lambda *a, **k: iter(records or [])
+        mocker.patch.object(plugin, "get_client", return_value=client)
+        return plugin, client
+
+    mocker.patch.object(maas, "_lists", {})
+    return constructor
+
+
+class TestRun:
+    def test_query_attribute(self, lookup):
+        plugin, client = lookup(
+            dict(query={"cidr": "10.0.1.0/24"}, attribute="id"), SUBNETS
+        )
+
+        assert plugin.run(["subnet"]) == [2]
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/subnets/", query=None, timeout=None
+        )
+
+    def test_nested(self, lookup):
+        plugin, client = lookup(
+            dict(query={"vlan.fabric": "fabric-0"}, attribute="cidr"), SUBNETS
+        )
+
+        assert plugin.run(["subnet"]) == ["10.0.0.0/24"]
+
+    def test_vlans_from_fabrics(self, lookup):
+        fabrics = [
+            dict(id=1, vlans=[dict(id=5, vid=0, fabric="fabric-0")]),
+            dict(id=2, vlans=[dict(id=6, vid=10, fabric="fabric-1")]),
+        ]
+        plugin, client = lookup(
+            dict(query=dict(id=6), attribute="fabric"), fabrics
+        )
+
+        assert plugin.run(["vlan"]) == ["fabric-1"]
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/fabrics/", query=None, timeout=None
+        )
+
+    def test_machine_summary(self, lookup):
+        machines = [dict(system_id="abc", fqdn="a.maas", interface_set=[])]
+        plugin, client = lookup(records=machines)
+
+        assert plugin.run(["machine"]) == [
+            dict(system_id="abc", fqdn="a.maas")
+        ]
+
+    def test_unknown_kind(self, lookup):
+        plugin, client = lookup()
+
+        with pytest.raises(AnsibleLookupError, match="Unknown kind"):
+            plugin.run(["subnets"])
+
+    def test_missing_attribute(self, lookup):
+        plugin, client = lookup(dict(attribute="name"), SUBNETS)
+
+        with pytest.raises(AnsibleLookupError, match="no attribute name"):
+            plugin.run(["subnet"])
+
+    def test_maas_error(self, lookup):
+        plugin, client = lookup()
+        client.iter_records.side_effect = errors.MaasError("boom")
+
+        with pytest.raises(AnsibleLookupError, match="boom"):
+            plugin.run(["subnet"])
+
+    def test_missing_credentials(self, mocker):
+        plugin = maas.LookupModule()
+        mocker.patch.object(
+            plugin, "get_option", side_effect=dict(host="https://maas").get
+        )
+
+        with pytest.raises(AnsibleLookupError, match="token_key"):
+            plugin.get_client()
+
+
+class TestCache:
+    def test_memoized(self, lookup):
+        plugin, client = lookup(dict(attribute="id"), SUBNETS)
+
+        assert plugin.run(["subnet"]) == [1, 2]
+        assert plugin.run(["subnet"]) == [1, 2]
+        client.iter_records.assert_called_once()
+
+    def test_shared_between_processes(self, lookup, mocker):
+        plugin, client = lookup(dict(attribute="id"), SUBNETS)
+        plugin.run(["subnet"])
+        # Another worker process starts without the in-process lists.
+        mocker.patch.object(maas, "_lists", {})
+        other, other_client = lookup(dict(attribute="id"), SUBNETS)
+
+        assert other.run(["subnet"]) == [1, 2]
+        other_client.iter_records.assert_not_called()
+
+    def test_expired(self, lookup, mocker):
+        plugin, client = lookup(dict(attribute="id"), SUBNETS)
+        plugin.run(["subnet"])
+        mocker.patch.object(maas.time, "time", return_value=1e12)
+
+        plugin.run(["subnet"])
+
+        assert client.iter_records.call_count == 2
+
+    def test_disabled(self, lookup, tmp_path):
+        plugin, client = lookup(dict(cache_timeout=0), SUBNETS)
+
+        plugin.run(["subnet"])
+        plugin.run(["subnet"])
+
+        assert client.iter_records.call_count == 2
+        assert list(tmp_path.iterdir()) == []
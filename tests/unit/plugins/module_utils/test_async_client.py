@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.async_client import (
+    AsyncClient,
+)
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestInit:
+    def test_pool_sized_for_concurrency(self):
+        client = AsyncClient("https://maas.com", max_concurrency=5)
+
+        assert client.client._pool.maxsize == 5
+        client.close()
+
+    def test_invalid_host(self):
+        with pytest.raises(errors.MaasError, match="Invalid instance host"):
+            AsyncClient("maas.com")
+
+
+class TestRequests:
+    def test_get(self, mocker):
+        client = AsyncClient("https://maas.com", "key", "secret", "consumer")
+        request = mocker.patch.object(client.client, "request")
+        request.return_value = Response(200, b'{"a": 1}')
+
+        resp = asyncio.run(client.get("/api/2.0/zones/", query=dict(name="z")))
+
+        assert resp.json == {"a": 1}
+        request.assert_called_once_with(
+            "GET", "/api/2.0/zones/", query=dict(name="z"), timeout=None
+        )
+        client.close()
+
+    def test_errors(self, mocker):
+        client = AsyncClient("https://maas.com")
+        mocker.patch.object(client.client, "request").return_value = Response(
+            500, b"oops"
+        )
+
+        with pytest.raises(errors.UnexpectedAPIResponse):
+            asyncio.run(client.post("/api/2.0/tags/", data=dict(name="t")))
+        client.close()
+
+    def test_list_records(self, mocker):
+        client = AsyncClient("https://maas.com")
+        iter_records = mocker.patch.object(client.client, "iter_records")
+        iter_records.return_value = iter([{"a": 1}, {"a": 2}])
+
+        records = asyncio.run(client.list_records("/api/2.0/machines/"))
+
+        assert records == [{"a": 1}, {"a": 2}]
+        iter_records.assert_called_once_with(
+            "/api/2.0/machines/", query=None, timeout=None
+        )
+        client.close()
+
+    def test_concurrent(self, mocker):
+        # Every request waits until all of them are in flight.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def request(method, path, **kwargs):
+            barrier.wait()
+            return Response(200, path.encode())
+
+        client = AsyncClient("https://maas.com", max_concurrency=3)
+        mocker.patch.object(client.client, "request", side_effect=request)
+
+        async def fetch():
+            async with client:
+                return await asyncio.gather(
+                    client.get("/a/"), client.get("/b/"), client.get("/c/")
+                )
+
+        responses = asyncio.run(fetch())
+
+        assert [r.data for r in responses] == [b"/a/", b"/b/", b"/c/"]
+
+    def test_call(self):
+        client = AsyncClient("https://maas.com")
+
+        result = asyncio.run(client.call(lambda c, a, b=0: (c, a, b), 1, b=2))
+
+        assert result == (client.client, 1, 2)
+        client.close()
@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import io
+import sys
+
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.urls import Request
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Client
+from ansible_collections.maas.maas.plugins.module_utils.compression import (
+    DecodedBody,
+)
+from ansible_collections.maas.maas.plugins.module_utils.connection_pool import (
+    ConnectionPool,
+    PooledResponse,
+    StreamedResponse,
+)
+from ansible_collections.maas.maas.plugins.module_utils.rate_limit import (
+    RateLimiter,
+)
+from ansible_collections.maas.maas.plugins.module_utils.response_cache import (
+    ResponseCache,
+)
+from ansible_collections.maas.maas.plugins.module_utils.retry import (
+    RetryPolicy,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestInit:
+    def test_invalid_host(self):
+        with pytest.raises(errors.MaasError, match="Invalid instance host"):
+            Client("maas:5240")
+
+    def test_pool_disabled(self):
+        client = Client("http://maas", pool_maxsize=0)
+        assert client._pool is None
+
+    def test_pool_options(self):
+        client = Client("http://maas", pool_maxsize=3, pool_idle_timeout=5)
+        assert client._pool.maxsize == 3
+        assert client._pool.idle_timeout == 5
+
+
+class TestRequest:
+    def test_request_through_pool(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.return_value = PooledResponse(
+            200, "OK", b'{"a": 1}', [("Content-Type", "application/json")]
+        )
+        client = Client("http://maas/MAAS", "key", "secret", "consumer")
+
+        resp = client.get("/api/2.0/machines/", query={"op": "list"})
+
+        method, url = urlopen.call_args[0]
+        assert method == "GET"
+        assert url == "http://maas/MAAS/api/2.0/machines/?op=list"
+        assert resp.json == {"a": 1}
+        assert resp.headers == {"content-type": "application/json"}
+
+    def test_accept_encoding(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.return_value = PooledResponse(
+            200, "OK", b"[]" * 100, [], bytes_received=20
+        )
+        trace = mocker.Mock()
+        client = Client(
+            "http://maas/MAAS", "key", "secret", "consumer", trace=trace
+        )
+
+        client.get("/api/2.0/machines/")
+
+        (record,) = trace.call_args[0]
+        headers = urlopen.call_args[1]["headers"]
+        assert headers["Accept-Encoding"] == "gzip, deflate"
+        assert record["bytes_received"] == 20
+        assert record["bytes_uncompressed"] == 200
+
+    def test_multipart_body(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.return_value = PooledResponse(200, "OK", b"{}", [])
+        client = Client("http://maas/MAAS", "key", "secret", "consumer")
+
+        client.post("/api/2.0/tags/t/", data=dict(add=["a", "b"]))
+
+        body = urlopen.call_args[1]["data"]
+        headers = urlopen.call_args[1]["headers"]
+        assert headers["Content-Length"] == str(len(bytes(body)))
+        assert headers["Content-type"] == body.content_type
+        assert bytes(body).count(b'name="add"') == 2
+
+    def test_trace(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.return_value = PooledResponse(
+            200, "OK", b'{"a": 1}', [], ttfb=0.0123456789
+        )
+        trace = mocker.Mock()
+        client = Client(
+            "http://maas/MAAS", "key", "secret", "consumer", trace=trace
+        )
+
+        client.post("/api/2.0/tags/", data=dict(name="t"))
+
+        (record,) = trace.call_args[0]
+        body = urlopen.call_args[1]["data"]
+        assert record["method"] == "POST"
+        assert record["path"] == "/api/2.0/tags/"
+        assert record["status"] == 200
+        assert record["bytes_sent"] == len(body)
+        assert record["bytes_received"] == 8
+        assert record["bytes_uncompressed"] == 8
+        assert record["ttfb"] == 0.012346
+        assert record["time"] >= 0
+
+    def test_conditional_get(self, mocker, tmp_path):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.side_effect = [
+            PooledResponse(200, "OK", b'[{"a": 1}]', [("ETag", '"v1"')]),
+            PooledResponse(304, "Not Modified", b"", []),
+        ]
+        client = Client(
+            "http://maas/MAAS",
+            "key",
+            "secret",
+            "consumer",
+            cache=ResponseCache(str(tmp_path)),
+        )
+
+        first = client.get("/api/2.0/machines/")
+        second = client.get("/api/2.0/machines/")
+
+        assert "If-None-Match" not in urlopen.call_args_list[0][1]["headers"]
+        assert (
+            urlopen.call_args_list[1][1]["headers"]["If-None-Match"] == '"v1"'
+        )
+        assert first.json == second.json == [{"a": 1}]
+        assert second.status == 200
+
+    def test_conditional_get_changed(self, mocker, tmp_path):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        urlopen.side_effect = [
+            PooledResponse(200, "OK", b"[1]", [("ETag", '"v1"')]),
+            PooledResponse(200, "OK", b"[2]", [("ETag", '"v2"')]),
+            PooledResponse(304, "Not Modified", b"", []),
+        ]
+        client = Client(
+            "http://maas/MAAS",
+            "key",
+            "secret",
+            "consumer",
+            cache=ResponseCache(str(tmp_path)),
+        )
+
+        assert [client.get("/api/2.0/tags/").json for i in range(3)] == [
+            [1],
+            [2],
+            [2],
+        ]
+
+    def test_unauthorized(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            return_value=PooledResponse(401, "Unauthorized", b"", []),
+        )
+        client = Client("http://maas/MAAS")
+
+        with pytest.raises(errors.AuthError):
+            client.get("/api/2.0/machines/")
+
+    def test_error_status_returned(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            return_value=PooledResponse(404, "Not Found", b"", []),
+        )
+        client = Client("http://maas/MAAS")
+
+        assert client.get("/api/2.0/machines/abc/").status == 404
+
+    @pytest.mark.parametrize(
+        "exception,message",
+        [
+            (TimeoutError(), "The action - timed out."),
+            (ConnectionRefusedError("refused"), "refused"),
+        ],
+    )
+    def test_connection_errors(self, mocker, exception, message):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(ConnectionPool, "urlopen", side_effect=exception)
+        client = Client("http://maas/MAAS")
+
+        with pytest.raises(errors.MaasError, match=message):
+            client.get("/api/2.0/machines/")
+
+    def test_proxied_request_bypasses_pool(self, mocker):
+        mocker.patch.dict(
+            "os.environ", {"http_proxy": "http://proxy:3128"}, clear=True
+        )
+        urlopen = mocker.patch.object(ConnectionPool, "urlopen")
+        request_urllib = mocker.patch.object(Client, "_request_urllib")
+        client = Client("http://maas/MAAS")
+
+        client.request("GET", "/api/2.0/machines/")
+
+        urlopen.assert_not_called()
+        request_urllib.assert_called_once()
+
+
+class TestRateLimit:
+    def test_requests_are_limited(self, mocker, tmp_path):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            return_value=PooledResponse(200, "OK", b"[]", []),
+        )
+        limiter = RateLimiter(str(tmp_path), "k", max_in_flight=1)
+        limit = mocker.spy(limiter, "limit")
+        client = Client("http://maas/MAAS", limiter=limiter)
+
+        client.get("/api/2.0/machines/")
+        client.post("/api/2.0/tags/", data={})
+
+        assert limit.call_count == 2
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch(
+        "ansible_collections.maas.maas.plugins.module_utils.client.time.sleep"
+    )
+
+
+def retrying_client():
+    return Client(
+        "http://maas/MAAS",
+        retry=RetryPolicy(retries=2, interval=1, jitter=0),
+    )
+
+
+class TestRetry:
+    def test_status_is_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=[
+                PooledResponse(503, "Unavailable", b"", []),
+                PooledResponse(409, "Conflict", b"", [("Retry-After", "5")]),
+                PooledResponse(200, "OK", b"[]", []),
+            ],
+        )
+        client = retrying_client()
+
+        assert client.get("/api/2.0/machines/").json == []
+        assert urlopen.call_count == 3
+        assert sleep.call_args_list == [mocker.call(1), mocker.call(5)]
+
+    def test_retries_are_limited(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            return_value=PooledResponse(503, "Unavailable", b"", []),
+        )
+        client = retrying_client()
+
+        with pytest.raises(errors.UnexpectedAPIResponse):
+            client.get("/api/2.0/machines/")
+        assert urlopen.call_count == 3
+
+    def test_connection_error_is_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=[
+                ConnectionResetError("reset"),
+                PooledResponse(200, "OK", b"{}", []),
+            ],
+        )
+        client = retrying_client()
+
+        assert client.delete("/api/2.0/tags/t/").json == {}
+
+    def test_lost_safe_post_response_is_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=[
+                http_client.RemoteDisconnected("closed"),
+                PooledResponse(200, "OK", b"{}", []),
+            ],
+        )
+        client = retrying_client()
+
+        client.post("/api/2.0/tags/t/", data={}, query={"op": "update_nodes"})
+
+        assert urlopen.call_count == 2
+
+    def test_lost_post_response_is_not_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=http_client.RemoteDisconnected("closed"),
+        )
+        client = retrying_client()
+
+        with pytest.raises(errors.RequestFailed):
+            client.post(
+                "/api/2.0/machines/", data={}, query={"op": "allocate"}
+            )
+        urlopen.assert_called_once()
+        sleep.assert_not_called()
+
+    def test_connection_error_is_raised(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=ConnectionRefusedError("refused"),
+        )
+        client = retrying_client()
+
+        with pytest.raises(errors.RequestFailed, match="refused"):
+            client.get("/api/2.0/machines/")
+        assert sleep.call_count == 2
+
+    def test_post_is_not_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            return_value=PooledResponse(503, "Unavailable", b"", []),
+        )
+        client = retrying_client()
+
+        with pytest.raises(errors.UnexpectedAPIResponse):
+            client.post("/api/2.0/machines/", data={}, query={"op": "x"})
+        urlopen.assert_called_once()
+        sleep.assert_not_called()
+
+    def test_safe_post_is_retried(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        urlopen = mocker.patch.object(
+            ConnectionPool,
+            "urlopen",
+            side_effect=[
+                PooledResponse(503, "Unavailable", b"", []),
+                PooledResponse(200, "OK", b"{}", []),
+            ],
+        )
+        client = retrying_client()
+
+        client.post("/api/2.0/tags/t/", data={}, query={"op": "update_nodes"})
+
+        assert urlopen.call_count == 2
+        # The multipart body can be sent again.
+        first, second = urlopen.call_args_list
+        assert bytes(first[1]["data"]) == bytes(second[1]["data"])
+
+    def test_iter_records(self, mocker, sleep):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        unavailable = streamed(503, b"")
+        mocker.patch.object(
+            ConnectionPool,
+            "stream",
+            side_effect=[unavailable, streamed(200, b"[1]")],
+        )
+        mocker.patch.object(unavailable, "close")
+        client = retrying_client()
+
+        assert list(client.iter_records("/api/2.0/machines/")) == [1]
+        unavailable.close.assert_called_once()
+
+
+def streamed(status, data):
+    return StreamedResponse(
+        status, "", [], DecodedBody(io.BytesIO(data), None), ttfb=0.5
+    )
+
+
+class TestIterRecords:
+    def test_records(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        stream = mocker.patch.object(
+            ConnectionPool,
+            "stream",
+            return_value=streamed(200, b'[{"id": 1}, {"id": 2}]'),
+        )
+        trace = mocker.Mock()
+        client = Client("http://maas/MAAS", trace=trace)
+
+        records = client.iter_records("/api/2.0/machines/", dict(id=[1, 2]))
+
+        assert list(records) == [{"id": 1}, {"id": 2}]
+        method, url = stream.call_args[0]
+        assert method == "GET"
+        assert url == "http://maas/MAAS/api/2.0/machines/?id=1&id=2"
+        (record,) = trace.call_args[0]
+        assert record["bytes_received"] == record["bytes_uncompressed"] == 22
+        assert record["ttfb"] == 0.5
+
+    def test_unauthorized(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool, "stream", return_value=streamed(401, b"")
+        )
+        client = Client("http://maas/MAAS")
+
+        with pytest.raises(errors.AuthError):
+            list(client.iter_records("/api/2.0/machines/"))
+
+    def test_error_status(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mocker.patch.object(
+            ConnectionPool, "stream", return_value=streamed(404, b"Gone")
+        )
+        client = Client("http://maas/MAAS")
+
+        with pytest.raises(errors.UnexpectedAPIResponse, match="Gone"):
+            list(client.iter_records("/api/2.0/machines/"))
+
+    def test_without_pool(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        body = io.BytesIO(b'[{"id": 1}]')
+        mocker.patch.object(
+            Request,
+            "open",
+            return_value=mocker.Mock(
+                status=200, reason="OK", headers={}, read=body.read
+            ),
+        )
+        client = Client("http://maas/MAAS", pool_maxsize=0)
+
+        assert list(client.iter_records("/api/2.0/machines/")) == [{"id": 1}]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import (
+    arguments,
+    errors,
+)
+from ansible_collections.maas.maas.plugins.module_utils.client import Client
+from ansible_collections.maas.maas.plugins.module_utils.cluster_instance import (
+    get_oauth1_client,
+)
+from ansible_collections.maas.maas.plugins.module_utils.httpapi_client import (
+    HttpApiClient,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+CLUSTER_INSTANCE = dict(
+    host="http://maas/MAAS",
+    token_key="token_key",
+    token_secret="token_secret",
+    customer_key="customer_key",
+)
+
+
+class TestGetOauth1Client:
+    def test_direct(self, mocker):
+        module = mocker.Mock(_socket_path="/tmp/socket")
+        client = get_oauth1_client(
+            dict(cluster_instance=dict(CLUSTER_INSTANCE, retry=dict())),
+            module,
+        )
+        assert type(client) is Client
+        assert client.host == "http://maas/MAAS"
+        assert client.retry is None
+
+    def test_httpapi(self, mocker):
+        module = mocker.Mock(_socket_path="/tmp/socket")
+        client = get_oauth1_client(
+            dict(cluster_instance=dict(host=None, collect_metrics=True)),
+            module,
+        )
+        assert isinstance(client, HttpApiClient)
+        assert client.connection.socket_path == "/tmp/socket"
+        assert client.trace is not None
+
+    @pytest.mark.parametrize(
+        "options,names",
+        [
+            (dict(pool_maxsize=0), "pool_maxsize"),
+            (dict(cache_dir="/tmp/cache"), "cache_dir"),
+            (dict(retry=dict(retries=3)), "retry"),
+            (
+                dict(pool_idle_timeout=5, rate_limit=dict(rate=2)),
+                "pool_idle_timeout, rate_limit",
+            ),
+        ],
+    )
+    def test_httpapi_transport_options(self, mocker, options, names):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        module = mocker.Mock(_socket_path="/tmp/socket")
+        with pytest.raises(
+            errors.MaasError,
+            match="cluster_instance options {0} cannot be used".format(names),
+        ):
+            get_oauth1_client(
+                dict(cluster_instance=dict(host=None, **options)), module
+            )
+
+    def test_httpapi_default_transport_options(self, mocker):
+        mocker.patch.dict(
+            "os.environ", {"MAAS_CACHE_DIR": "/tmp/cache"}, clear=True
+        )
+        module = mocker.Mock(_socket_path="/tmp/socket")
+        client = get_oauth1_client(
+            dict(
+                cluster_instance=dict(
+                    host=None,
+                    pool_maxsize=10,
+                    pool_idle_timeout=30,
+                    cache_dir="/tmp/cache",
+                    cache_max_size=100,
+                    retry=None,
+                    rate_limit=dict(rate=None, burst=1, max_in_flight=None),
+                )
+            ),
+            module,
+        )
+        assert isinstance(client, HttpApiClient)
+
+    def test_invalid_rate_limit(self, mocker):
+        module = mocker.Mock(_socket_path=None)
+        with pytest.raises(errors.MaasError, match="greater than 0"):
+            get_oauth1_client(
+                dict(
+                    cluster_instance=dict(
+                        CLUSTER_INSTANCE, rate_limit=dict(rate=0)
+                    )
+                ),
+                module,
+            )
+
+    def test_missing_arguments(self, mocker):
+        module = mocker.Mock(_socket_path=None)
+        with pytest.raises(
+            errors.MaasError,
+            match="missing required arguments: token_secret, customer_key",
+        ):
+            get_oauth1_client(
+                dict(
+                    cluster_instance=dict(
+                        host="http://maas/MAAS", token_key="token_key"
+                    )
+                ),
+                module,
+            )
+
+
+def validate(cluster_instance):
+    validator = ArgumentSpecValidator(arguments.get_spec("cluster_instance"))
+    return validator.validate(dict(cluster_instance=cluster_instance))
+
+
+class TestSpec:
+    def test_host_requires_credentials(self, mocker):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        result = validate(dict(host="http://maas/MAAS", token_key="key"))
+        assert result.error_messages == [
+            "missing parameter(s) required by 'host': token_secret, "
+            "customer_key found in cluster_instance"
+        ]
+
+    def test_host_can_be_omitted(self, mocker):
+        # Needed for the httpapi plugin, checked by get_oauth1_client.
+        mocker.patch.dict("os.environ", {}, clear=True)
+        assert validate(dict()).error_messages == []
+
+
+class TestRetrySpec:
+    @staticmethod
+    def validate(cluster_instance):
+        result = validate(cluster_instance)
+        assert result.error_messages == []
+        return result.validated_parameters["cluster_instance"]
+
+    def test_retries_are_opt_in(self):
+        params = self.validate(dict(CLUSTER_INSTANCE))
+        assert params["retry"] is None
+        client = get_oauth1_client(dict(cluster_instance=params))
+        assert client.retry is None
+
+    def test_retry_defaults(self):
+        params = self.validate(dict(CLUSTER_INSTANCE, retry=dict()))
+        assert params["retry"]["retries"] == 3
+        client = get_oauth1_client(dict(cluster_instance=params))
+        assert client.retry.retries == 3
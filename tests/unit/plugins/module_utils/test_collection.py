@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.collection import (
+    CollectionLoader,
+    RecordCollection,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+IP_RANGES = [
+    dict(
+        id=1,
+        type="dynamic",
+        start_ip="10.0.0.10",
+        subnet=dict(id=5, name="lan"),
+    ),
+    dict(
+        id=2,
+        type="reserved",
+        start_ip="10.0.0.50",
+        subnet=dict(id=5, name="lan"),
+    ),
+    dict(
+        id=3,
+        type="dynamic",
+        start_ip="10.1.0.10",
+        subnet=dict(id=6, name="wan"),
+    ),
+]
+
+
+class TestRecordCollection:
+    def test_get(self):
+        records = RecordCollection(IP_RANGES)
+        assert records.get("id", 2) is IP_RANGES[1]
+        assert records.get("id", 4) is None
+
+    def test_get_nested_key(self):
+        records = RecordCollection(IP_RANGES)
+        assert records.get(("subnet", "name"), "wan") is IP_RANGES[2]
+
+    def test_find_compound_key(self):
+        records = RecordCollection(IP_RANGES)
+        assert (
+            records.find({("subnet", "id"): 5, "type": "dynamic"})
+            is IP_RANGES[0]
+        )
+
+    def test_find_all(self):
+        records = RecordCollection(IP_RANGES)
+        assert records.find_all({"type": "dynamic"}) == [
+            IP_RANGES[0],
+            IP_RANGES[2],
+        ]
+
+    def test_find_ambiguous(self):
+        records = RecordCollection(IP_RANGES)
+        with pytest.raises(errors.MaasError, match="2 records match"):
+            records.find({"type": "dynamic"})
+
+    def test_index_is_built_once(self):
+        records = RecordCollection(IP_RANGES)
+        records.get("id", 1)
+        records.get("id", 3)
+        assert list(records._indexes) == [("id",)]
+
+    def test_unhashable_values(self):
+        records = RecordCollection(
+            [dict(name="a", tags=["x", "y"]), dict(name="b", tags=["z"])]
+        )
+        assert records.get("tags", ["z"])["name"] == "b"
+
+    def test_get_or_fail(self):
+        records = RecordCollection([dict(name="one"), dict(name="two")])
+        assert records.get_or_fail("name", "one", "fabric") == dict(name="one")
+        with pytest.raises(
+            errors.MaasError,
+            match=r"Can not find matching fabric. Options are \[one, two\]",
+        ):
+            records.get_or_fail("name", "three", "fabric")
+
+
+class TestCollectionLoader:
+    def test_list_is_fetched_once(self, mocker):
+        client = mocker.Mock()
+        client.get.return_value.json = IP_RANGES
+        loader = CollectionLoader(client)
+
+        assert loader.get("/api/2.0/ipranges/").get("id", 1) is IP_RANGES[0]
+        assert loader.get("/api/2.0/ipranges/").get("id", 3) is IP_RANGES[2]
+        client.get.assert_called_once_with("/api/2.0/ipranges/")
+
+    def test_invalidate(self, mocker):
+        client = mocker.Mock()
+        client.get.return_value.json = IP_RANGES
+        loader = CollectionLoader(client)
+
+        first = loader.get("/api/2.0/ipranges/")
+        loader.invalidate("/api/2.0/ipranges/")
+
+        assert loader.get("/api/2.0/ipranges/") is not first
+        assert client.get.call_count == 2
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import gzip
+import io
+import sys
+import zlib
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.compression import (
+    read_body,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+BODY = b'[{"system_id": "abc", "interface_set": []}]' * 1000
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TestReadBody:
+    @pytest.mark.parametrize(
+        "encoding,encoded",
+        [
+            ("gzip", gzip.compress(BODY)),
+            ("GZIP", gzip.compress(BODY)),
+            ("deflate", zlib.compress(BODY)),
+            ("deflate", raw_deflate(BODY)),
+        ],
+    )
+    def test_compressed(self, mocker, encoding, encoded):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.compression.CHUNK_SIZE",
+            100,
+        )
+        data, received = read_body(io.BytesIO(encoded), encoding)
+        assert data == BODY
+        assert received == len(encoded) < len(BODY)
+
+    @pytest.mark.parametrize("encoding", [None, "", "identity", "br"])
+    def test_not_compressed(self, encoding):
+        assert read_body(io.BytesIO(b"[]"), encoding) == (b"[]", 2)
+
+    def test_empty(self):
+        assert read_body(io.BytesIO(b""), "gzip") == (b"", 0)
+
+    def test_invalid(self):
+        with pytest.raises(errors.MaasError, match="invalid gzip encoded"):
+            read_body(io.BytesIO(b"not gzip"), "gzip")
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import gzip
+import io
+import socket
+import sys
+
+from ansible.module_utils.six.moves import http_client
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.connection_pool import (
+    ConnectionPool,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def make_connection(mocker, will_close=False, status=200):
+    conn = mocker.Mock(spec=http_client.HTTPConnection)
+    conn.sock = None
+    conn.connect.side_effect = lambda: setattr(conn, "sock", mocker.Mock())
+    conn.getresponse.return_value = mocker.Mock(
+        status=status,
+        reason="OK",
+        will_close=will_close,
+        read=mocker.Mock(return_value=b"[]"),
+        getheader=mocker.Mock(return_value=None),
+        getheaders=mocker.Mock(return_value=[("Content-Type", "json")]),
+    )
+    return conn
+
+
+def make_gzip_connection(mocker, body):
+    conn = make_connection(mocker)
+    conn.getresponse.return_value.read = io.BytesIO(body).read
+    conn.getresponse.return_value.getheader.side_effect = lambda name: (
+        "gzip" if name == "Content-Encoding" else None
+    )
+    return conn
+
+
+class TestGetKey:
+    @pytest.mark.parametrize(
+        "url,key",
+        [
+            ("http://maas:5240/MAAS/api/", ("http", "maas", 5240)),
+            ("http://maas/MAAS/api/", ("http", "maas", 80)),
+            ("HTTPS://maas/MAAS/api/", ("https", "maas", 443)),
+        ],
+    )
+    def test_get_key(self, url, key):
+        assert ConnectionPool.get_key(url) == key
+
+
+class TestUrlopen:
+    def test_invalid_maxsize(self):
+        with pytest.raises(errors.MaasError):
+            ConnectionPool(maxsize=0)
+
+    def test_nagle_is_disabled(self, mocker):
+        conn = make_connection(mocker)
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        pool.urlopen("GET", "http://maas/MAAS/api/2.0/machines/")
+
+        conn.sock.setsockopt.assert_called_once_with(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+        )
+
+    def test_connection_is_reused(self, mocker):
+        conn = make_connection(mocker)
+        new_connection = mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        pool.urlopen("GET", "http://maas:5240/MAAS/api/2.0/machines/")
+        resp = pool.urlopen(
+            "GET", "http://maas:5240/MAAS/api/2.0/tags/?op=list"
+        )
+
+        new_connection.assert_called_once()
+        assert conn.request.call_args_list[1][0][:2] == (
+            "GET",
+            "/MAAS/api/2.0/tags/?op=list",
+        )
+        assert resp.status == 200
+        assert resp.data == b"[]"
+        assert resp.headers == [("Content-Type", "json")]
+
+    def test_gzip_response_is_decoded(self, mocker):
+        body = gzip.compress(b"[]" * 1000)
+        mocker.patch.object(
+            ConnectionPool,
+            "_new_connection",
+            return_value=make_gzip_connection(mocker, body),
+        )
+        pool = ConnectionPool()
+
+        resp = pool.urlopen("GET", "http://maas/MAAS/api/2.0/machines/")
+
+        assert resp.data == b"[]" * 1000
+        assert resp.bytes_received == len(body)
+
+    def test_invalid_encoding_closes_connection(self, mocker):
+        conn = make_gzip_connection(mocker, b"not gzip")
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        with pytest.raises(errors.MaasError, match="invalid gzip"):
+            pool.urlopen("GET", "http://maas/MAAS/api/2.0/machines/")
+        conn.close.assert_called_once()
+
+    def test_stream(self, mocker):
+        conn = make_gzip_connection(mocker, gzip.compress(b"[]" * 1000))
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        resp = pool.stream("GET", "http://maas/MAAS/api/2.0/machines/")
+        assert pool._idle == {}  # In use until the body is read.
+
+        assert b"".join(resp) == b"[]" * 1000
+        assert pool._acquire(pool.get_key("http://maas/")) is conn
+
+    def test_stream_closed_early(self, mocker):
+        conn = make_connection(mocker)
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        resp = pool.stream("GET", "http://maas/MAAS/api/2.0/machines/")
+        resp.close()
+
+        conn.close.assert_called_once()
+        assert pool._idle == {}
+
+    def test_connection_closed_by_server_is_not_reused(self, mocker):
+        new_connection = mocker.patch.object(
+            ConnectionPool,
+            "_new_connection",
+            side_effect=[
+                make_connection(mocker, will_close=True),
+                make_connection(mocker),
+            ],
+        )
+        pool = ConnectionPool()
+
+        pool.urlopen("GET", "http://maas/api/")
+        pool.urlopen("GET", "http://maas/api/")
+
+        assert new_connection.call_count == 2
+
+    def test_idle_connection_expires(self, mocker):
+        first, second = make_connection(mocker), make_connection(mocker)
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", side_effect=[first, second]
+        )
+        monotonic = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.connection_pool.time.monotonic"
+        )
+        monotonic.side_effect = [0, 100, 200, 300]
+        pool = ConnectionPool(idle_timeout=30)
+
+        pool.urlopen("GET", "http://maas/api/")
+        pool.urlopen("GET", "http://maas/api/")
+
+        first.close.assert_called_once()
+        second.request.assert_called_once()
+
+    def test_pool_size_is_bounded(self, mocker):
+        pool = ConnectionPool(maxsize=1)
+        first, second = make_connection(mocker), make_connection(mocker)
+        key = ("http", "maas", 80)
+
+        pool._release(key, first)
+        pool._release(key, second)
+
+        first.close.assert_not_called()
+        second.close.assert_called_once()
+        assert pool._acquire(key) is first
+        assert pool._acquire(key) is None
+
+    def test_stale_connection_is_retried(self, mocker):
+        stale, fresh = make_connection(mocker), make_connection(mocker)
+        stale.request.side_effect = http_client.RemoteDisconnected("closed")
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=fresh
+        )
+        pool = ConnectionPool()
+        pool._release(("http", "maas", 80), stale)
+
+        resp = pool.urlopen("GET", "http://maas/api/")
+
+        stale.close.assert_called_once()
+        fresh.request.assert_called_once()
+        assert resp.status == 200
+
+    @pytest.mark.parametrize("method", ["GET", "PUT", "DELETE"])
+    def test_lost_idempotent_response_is_retried(self, mocker, method):
+        stale, fresh = make_connection(mocker), make_connection(mocker)
+        stale.getresponse.side_effect = http_client.RemoteDisconnected(
+            "closed"
+        )
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=fresh
+        )
+        pool = ConnectionPool()
+        pool._release(("http", "maas", 80), stale)
+
+        resp = pool.urlopen(method, "http://maas/api/")
+
+        stale.close.assert_called_once()
+        fresh.request.assert_called_once()
+        assert resp.status == 200
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            http_client.RemoteDisconnected("closed"),
+            ConnectionResetError("reset"),
+        ],
+    )
+    def test_lost_post_response_is_raised(self, mocker, error):
+        # MAAS might have processed the request already.
+        stale, fresh = make_connection(mocker), make_connection(mocker)
+        stale.getresponse.side_effect = error
+        new_connection = mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=fresh
+        )
+        pool = ConnectionPool()
+        pool._release(("http", "maas", 80), stale)
+
+        with pytest.raises(type(error)):
+            pool.urlopen("POST", "http://maas/api/machines/?op=allocate")
+        stale.close.assert_called_once()
+        new_connection.assert_not_called()
+
+    def test_unsent_post_is_retried(self, mocker):
+        stale, fresh = make_connection(mocker), make_connection(mocker)
+        stale.request.side_effect = BrokenPipeError("closed")
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=fresh
+        )
+        pool = ConnectionPool()
+        pool._release(("http", "maas", 80), stale)
+
+        resp = pool.urlopen("POST", "http://maas/api/machines/?op=allocate")
+
+        fresh.request.assert_called_once()
+        assert resp.status == 200
+
+    def test_fresh_connection_error_is_raised(self, mocker):
+        conn = make_connection(mocker)
+        conn.request.side_effect = ConnectionResetError("reset")
+        mocker.patch.object(
+            ConnectionPool, "_new_connection", return_value=conn
+        )
+        pool = ConnectionPool()
+
+        with pytest.raises(ConnectionResetError):
+            pool.urlopen("GET", "http://maas/api/")
+        conn.close.assert_called_once()
+
+    def test_close(self, mocker):
+        pool = ConnectionPool()
+        conn = make_connection(mocker)
+        pool._release(("http", "maas", 80), conn)
+
+        pool.close()
+
+        conn.close.assert_called_once()
+        assert pool._acquire(("http", "maas", 80)) is None
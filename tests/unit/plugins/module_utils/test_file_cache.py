@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import file_cache
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestGetKey:
+    def test_get_key(self):
+        key = file_cache.get_key("http://maas/", "token", 1)
+
+        assert key == file_cache.get_key("http://maas/", "token", "1")
+        assert key != file_cache.get_key("http://maas/", "token", 2)
+        assert key != file_cache.get_key("http://maas/token", 1)
+
+
+class TestWriteAtomic:
+    def test_write(self, tmp_path):
+        path = tmp_path / "cache" / "key"
+
+        file_cache.write_atomic(str(path), b"old")
+        file_cache.write_atomic(str(path), b"new")
+
+        assert path.read_bytes() == b"new"
+        assert os.listdir(str(tmp_path / "cache")) == ["key"]
+        assert os.stat(str(tmp_path / "cache")).st_mode & 0o777 == 0o700
+
+    def test_write_error(self, tmp_path, mocker):
+        mocker.patch.object(file_cache.os, "replace", side_effect=OSError)
+
+        with pytest.raises(OSError):
+            file_cache.write_atomic(str(tmp_path / "key"), b"data")
+
+        assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import io
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.form import (
+    Multipart,
+    MultipartBody,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestMultipart:
+    def test_get_mulipart(self):
+        boundary, content = Multipart.get_mulipart(dict(name="tag"))
+        assert content == (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="name"\r\n\r\n'
+            "tag\r\n"
+            f"--{boundary}--"
+        ).encode("utf-8")
+
+    def test_get_mulipart_repeated_keys(self):
+        boundary, content = Multipart.get_mulipart(
+            dict(add=["id1", "id2"], remove=[])
+        )
+        assert content == (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="add"\r\n\r\n'
+            "id1\r\n"
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="add"\r\n\r\n'
+            "id2\r\n"
+            f"--{boundary}--"
+        ).encode("utf-8")
+
+    def test_get_mulipart_invalid_data(self):
+        with pytest.raises(errors.MaasError, match="Data should be a dict"):
+            Multipart.get_mulipart("data")
+
+    def test_get_fields(self):
+        assert Multipart.get_fields(
+            [("add", "id1"), ("remove", "id2"), ("add", ["id3", "id4"])]
+        ) == [
+            ("add", "id1"),
+            ("remove", "id2"),
+            ("add", "id3"),
+            ("add", "id4"),
+        ]
+
+    def test_get_fields_invalid_pairs(self):
+        with pytest.raises(errors.MaasError, match="list of"):
+            Multipart.get_fields([("add", "id1", "id2")])
+
+
+class TestMultipartBody:
+    def test_values(self):
+        body = MultipartBody(
+            [("name", "č"), ("data", b"\x00\x01"), ("count", 3)], "b"
+        )
+        assert bytes(body) == (
+            b"--b\r\n"
+            b'Content-Disposition: form-data; name="name"\r\n\r\n'
+            b"\xc4\x8d\r\n"
+            b"--b\r\n"
+            b'Content-Disposition: form-data; name="data"\r\n\r\n'
+            b"\x00\x01\r\n"
+            b"--b\r\n"
+            b'Content-Disposition: form-data; name="count"\r\n\r\n'
+            b"3\r\n"
+            b"--b--"
+        )
+        assert len(body) == len(bytes(body))
+
+    def test_file_value_is_streamed(self, mocker):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.form.CHUNK_SIZE",
+            4,
+        )
+        file = io.BytesIO(b"0123456789")
+        file.name = "/tmp/image.img"
+        body = MultipartBody([("content", file)], "b")
+        chunks = list(body)
+        assert chunks[1:4] == [b"0123", b"4567", b"89"]
+        assert bytes(body) == (
+            b"--b\r\n"
+            b'Content-Disposition: form-data; name="content"; '
+            b'filename="image.img"\r\n'
+            b"Content-Type: application/octet-stream\r\n\r\n"
+            b"0123456789\r\n"
+            b"--b--"
+        )
+        assert len(body) == len(bytes(body))
+
+    def test_file_value_can_be_sent_again(self):
+        file = io.BytesIO(b"xx0123")
+        file.seek(2)
+        body = MultipartBody([("content", file)], "b")
+        assert bytes(body) == bytes(body)
+        assert b"\r\n0123\r\n" in bytes(body)
+
+    def test_file_value_truncated(self):
+        file = io.BytesIO(b"0123")
+        body = MultipartBody([("content", file)], "b")
+        file.truncate(2)
+        with pytest.raises(errors.MaasError, match="changed"):
+            bytes(body)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+from ansible.module_utils.connection import ConnectionError
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.form import Multipart
+from ansible_collections.maas.maas.plugins.module_utils.httpapi_client import (
+    HttpApiClient,
+    encode_bytes,
+    get_error_code,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def result(status, data):
+    return dict(
+        status=status,
+        data=encode_bytes(data),
+        headers={"content-type": "application/json"},
+        ttfb=0.1,
+        bytes_received=len(data),
+    )
+
+
+class TestInit:
+    def test_init(self, mocker):
+        client = HttpApiClient(mocker.Mock())
+
+        assert client.host == ""
+        assert client.retry is None
+        assert client.limiter is None
+        assert client.cache is None
+        assert client._pool is None
+
+
+class TestRequest:
+    def test_request(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(200, b'{"a": 1}')
+        trace = mocker.Mock()
+        client = HttpApiClient(connection, trace=trace)
+
+        resp = client.post("/api/2.0/tags/", data=dict(name="t"))
+
+        assert resp.json == {"a": 1}
+        assert resp.headers == {"content-type": "application/json"}
+        connection.send_request.assert_called_once_with(
+            dict(name="t"),
+            method="POST",
+            path="/api/2.0/tags/",
+            query=None,
+            headers=None,
+            binary_data=None,
+            timeout=None,
+        )
+        assert trace.call_args[0][0]["status"] == 200
+
+    def test_binary_data(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(200, b"{}")
+        client = HttpApiClient(connection)
+
+        client.put("/api/2.0/x/", data=None, binary_data=b"\x00\x01")
+
+        assert connection.send_request.call_args[1]["binary_data"] == "AAE="
+
+    def test_bytes_sent(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(200, b"{}")
+        trace = mocker.Mock()
+        client = HttpApiClient(connection, trace=trace)
+
+        client.post("/api/2.0/tags/", data=dict(name="t"))
+
+        bytes_sent = trace.call_args[0][0]["bytes_sent"]
+        assert bytes_sent == len(Multipart.encode(dict(name="t")))
+        assert bytes_sent > 0
+
+    def test_unexpected_status(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(503, b"Busy")
+        client = HttpApiClient(connection)
+
+        with pytest.raises(errors.UnexpectedAPIResponse, match="Busy"):
+            client.get("/api/2.0/machines/")
+
+    def test_unauthorized(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(401, b"Expired")
+        client = HttpApiClient(connection)
+
+        with pytest.raises(errors.AuthError, match="Expired"):
+            client.get("/api/2.0/machines/")
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            errors.AuthError("Failed"),
+            errors.RequestFailed("Failed"),
+            errors.MaasError("Failed"),
+        ],
+    )
+    def test_plugin_error(self, mocker, error):
+        connection = mocker.Mock()
+        connection.send_request.side_effect = ConnectionError(
+            "Failed", code=get_error_code(error)
+        )
+        client = HttpApiClient(connection)
+
+        with pytest.raises(errors.MaasError, match="Failed") as exc_info:
+            client.get("/api/2.0/machines/")
+        assert type(exc_info.value) is type(error)
+
+    def test_socket_error(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.side_effect = ConnectionError(
+            "unable to connect to socket"
+        )
+        client = HttpApiClient(connection)
+
+        with pytest.raises(errors.RequestFailed, match="socket"):
+            client.get("/api/2.0/machines/")
+
+    def test_json_rpc_error(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.side_effect = ConnectionError(
+            "Internal error", code=-32603
+        )
+        client = HttpApiClient(connection)
+
+        with pytest.raises(errors.MaasError, match="Internal") as exc_info:
+            client.get("/api/2.0/machines/")
+        assert type(exc_info.value) is errors.MaasError
+
+    def test_iter_records(self, mocker):
+        connection = mocker.Mock()
+        connection.send_request.return_value = result(200, b"[1, 2]")
+        client = HttpApiClient(connection)
+
+        assert list(client.iter_records("/api/2.0/machines/")) == [1, 2]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.json_stream import (
+    iter_array,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+RECORDS = [
+    {"id": i, "hostname": "mašina-{0}".format(i), "cpu": 1.5, "tags": []}
+    for i in range(20)
+] + [12345, "last", None]
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestIterArray:
+    @pytest.mark.parametrize("size", [1, 2, 7, 100, 100000])
+    def test_chunks(self, size):
+        data = json.dumps(RECORDS, ensure_ascii=False, indent=1).encode()
+        assert list(iter_array(chunked(data, size))) == RECORDS
+
+    def test_items_are_yielded_while_reading(self):
+        def chunks():
+            yield b'[{"id": 1},'
+            raise AssertionError("Read too far.")
+
+        assert next(iter_array(chunks())) == {"id": 1}
+
+    def test_number_split_between_chunks(self):
+        assert list(iter_array([b"[1", b"23]"])) == [123]
+
+    @pytest.mark.parametrize("data", [b"[]", b" [ ]\n"])
+    def test_empty(self, data):
+        assert list(iter_array([data])) == []
+
+    def test_not_a_list(self):
+        with pytest.raises(errors.MaasError, match="Expected a JSON list"):
+            list(iter_array([b'{"id": 1}']))
+
+    @pytest.mark.parametrize(
+        "data", [b"", b"[", b"[1,", b"[1 2]", b"[1,]", b"[1]x", b"[\xff]"]
+    )
+    def test_invalid(self, data):
+        with pytest.raises(errors.MaasError):
+            list(iter_array([data]))
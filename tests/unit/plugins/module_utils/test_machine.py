@@ -19,6 +19,7 @@ import pytest
 from ansible_collections.maas.maas.plugins.module_utils import errors
 from ansible_collections.maas.maas.plugins.module_utils.client import Response
 from ansible_collections.maas.maas.plugins.module_utils.machine import Machine
+from ansible_collections.maas.maas.plugins.module_utils.polling import Polling
 
 pytestmark = pytest.mark.skipif(
     sys.version_info < (2, 7), reason="requires python2.7 or higher"
@@ -179,6 +180,13 @@ class TestGet:
         ).side_effect = [machine_list[0], machine_list[1]]
         results = Machine.get_id_from_fqdn(client, *fqdns)
         assert results == machine_list
+        client.get.assert_called_once_with(
+            "/api/2.0/machines/", query={"hostname": ["one", "two"]}
+        )
+
+    def test_get_id_from_fqdn_no_fqdns(self, client):
+        assert Machine.get_id_from_fqdn(client) == []
+        client.get.assert_not_called()
 
     def test_get_id_from_fqdn_when_error(self, client, mocker):
         fqdns = ["one", "two", "three"]
@@ -210,6 +218,9 @@ class TestGet:
         ).side_effect = [machine1, machine2]
         results = Machine.get_by_tag(client, tag_name)
         assert results == [machine1, machine2]
+        client.get.assert_called_once_with(
+            "/api/2.0/machines/", query={"tags": "first"}
+        )
 
     def test_get_by_tag_empty_list(self, client, mocker):
         tag_name = "first"
@@ -221,6 +232,62 @@ class TestGet:
         assert results == []
 
 
+class TestFromMaas:
+    MAAS_DICT = dict(
+        fqdn="one.maas",
+        hostname="one",
+        system_id="abc123",
+        memory=2048,
+        cpu_count=2,
+        interface_set=[dict(name="eth0")],
+        blockdevice_set=[dict(name="sda")],
+        status_name="Ready",
+        osystem="ubuntu",
+        distro_series="jammy",
+        domain=dict(id=3),
+        pool=dict(id=1),
+        zone=dict(id=2),
+        tag_names=["my_tag"],
+        hwe_kernel="my_kernel",
+        min_hwe_kernel="min_kernel",
+        power_type="lxd",
+        architecture="amd64",
+    )
+
+    def test_from_maas_summary(self, mocker):
+        nic_from_maas = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.NetworkInterface.from_maas"
+        )
+        disk_from_maas = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.Disk.from_maas"
+        )
+        machine = Machine.from_maas(self.MAAS_DICT, summary=True)
+        assert machine == Machine(
+            fqdn="one.maas",
+            hostname="one",
+            id="abc123",
+            domain=3,
+            pool=1,
+            zone=2,
+            tags=["my_tag"],
+            status="Ready",
+        )
+        nic_from_maas.assert_not_called()
+        disk_from_maas.assert_not_called()
+
+    def test_from_maas_summary_missing_value(self):
+        with pytest.raises(errors.MissingValueMAAS):
+            Machine.from_maas(dict(fqdn="one.maas"), summary=True)
+
+    def test_get_by_tag_summary(self, client):
+        client.get.return_value = Response(
+            200, json.dumps([dict(self.MAAS_DICT, interface_set=None)])
+        )
+        results = Machine.get_by_tag(client, "my_tag", summary=True)
+        assert [m.id for m in results] == ["abc123"]
+        assert results[0].network_interfaces is None
+
+
 class TestPayloadForCompose:
     def test_payload_for_compose_with_interface_and_storage(self, mocker):
         module = ""
@@ -276,6 +343,59 @@ class TestPayloadForCompose:
         assert results == {"interfaces": "test:subnet_cidr=ip,name=esp0"}
 
 
+class TestPayloadForAllocate:
+    def test_payload_for_allocate(self, create_module):
+        module = create_module(
+            params=dict(
+                allocate_params=dict(
+                    min_cpu_count=2,
+                    min_memory=4096,
+                    zone=None,
+                    pool="rack-1",
+                    tags="gpu",
+                ),
+                network_interfaces=dict(
+                    name="eth0",
+                    subnet_cidr="10.0.0.0/24",
+                    ip_address="10.0.0.5",
+                ),
+            )
+        )
+        assert Machine.payload_for_allocate(module) == dict(
+            cpu_count=2,
+            mem=4096,
+            pool="rack-1",
+            tags="gpu",
+            interfaces="eth0:subnet_cidr=10.0.0.0/24,ip=10.0.0.5",
+        )
+
+    def test_payload_for_allocate_without_params(self, create_module):
+        module = create_module(params=dict(allocate_params=None))
+        assert Machine.payload_for_allocate(module) == {}
+
+
+class TestPayloadForDeploy:
+    def test_payload_for_deploy(self, create_module):
+        module = create_module(
+            params=dict(
+                deploy_params=dict(
+                    distro_series="jammy",
+                    timeout=30,
+                    hwe_kernel=None,
+                    user_data="data",
+                )
+            )
+        )
+        assert Machine.payload_for_deploy(module) == (
+            dict(distro_series="jammy", user_data="data"),
+            30,
+        )
+
+    def test_payload_for_deploy_default_timeout(self, create_module):
+        module = create_module(params=dict(deploy_params=None))
+        assert Machine.payload_for_deploy(module) == ({}, 60)
+
+
 class TestWaitForState:
     def test_wait_for_state(self, client, mocker):
         system_id = "system_id"
@@ -302,6 +422,57 @@ class TestWaitForState:
 
         assert machine.status == "Commissioning"
 
+    def test_wait_for_state_polls_until_state(self, client, mocker):
+        client.get.side_effect = [
+            Response(
+                200,
+                json.dumps(dict(hostname="my_instance", status_name=status)),
+            )
+            for status in ("Allocating", "Allocating", "Allocated")
+        ]
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.from_maas"
+        ).return_value = Machine(id="system_id", status="Allocated")
+        sleep = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.sleep"
+        )
+
+        machine = Machine.wait_for_state(
+            "system_id",
+            client,
+            False,
+            "Allocated",
+            polling=Polling(interval=1, backoff=2, jitter=0),
+        )
+
+        assert machine.status == "Allocated"
+        sleep.assert_has_calls([mocker.call(1), mocker.call(2)])
+
+    def test_wait_for_state_timeout(self, client, mocker):
+        client.get.return_value = Response(
+            200,
+            json.dumps(dict(hostname="my_instance", status_name="Deploying")),
+        )
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.sleep"
+        )
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.polling.time.monotonic"
+        ).side_effect = [0, 5, 11]
+
+        with pytest.raises(
+            errors.WaitTimeout,
+            match="machine my_instance to reach state Deployed, currently Deploying",
+        ):
+            Machine.wait_for_state(
+                "system_id",
+                client,
+                False,
+                "Deployed",
+                polling=Polling(interval=5, jitter=0, timeout=10),
+            )
+        assert client.get.call_count == 2
+
 
 class TestCommission:
     def test_commission(self, client):
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+import time
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.machine_snapshot import (
+    MachineSnapshot,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestMachineSnapshot:
+    def test_get_key(self):
+        key = MachineSnapshot.get_key("http://maas/", "token", "{}")
+
+        assert key == MachineSnapshot.get_key("http://maas/", "token", "{}")
+        assert key != MachineSnapshot.get_key("http://maas/", "token", "[]")
+
+    def test_set_get(self, tmp_path):
+        snapshot = MachineSnapshot(str(tmp_path / "snapshots"))
+        created = time.time()
+
+        snapshot.set("key", 12, created, [dict(system_id="abc")])
+
+        assert snapshot.get("key") == (12, created, [dict(system_id="abc")])
+        assert os.stat(str(tmp_path / "snapshots")).st_mode & 0o777 == 0o700
+
+    def test_missing(self, tmp_path):
+        assert MachineSnapshot(str(tmp_path)).get("key") is None
+
+    def test_expired(self, tmp_path):
+        snapshot = MachineSnapshot(str(tmp_path), max_age=60)
+
+        snapshot.set("key", 12, time.time() - 61, [])
+
+        assert snapshot.get("key") is None
+
+    def test_corrupt(self, tmp_path):
+        (tmp_path / "key.json").write_text("{")
+
+        assert MachineSnapshot(str(tmp_path)).get("key") is None
+
+    def test_set_errors_ignored(self, tmp_path):
+        path = tmp_path / "file"
+        path.write_text("")
+
+        MachineSnapshot(str(path / "snapshots")).set("key", 1, 0, [])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.metrics import Metrics
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def trace(status=200, bytes_sent=0, bytes_received=100, time=0.5):
+    return dict(
+        method="GET",
+        path="/api/2.0/machines/",
+        status=status,
+        bytes_sent=bytes_sent,
+        bytes_received=bytes_received,
+        bytes_uncompressed=bytes_received * 4,
+        ttfb=0.1,
+        time=time,
+    )
+
+
+class TestMetrics:
+    def test_to_ansible(self):
+        metrics = Metrics()
+        metrics(trace())
+        metrics(trace(bytes_sent=20, bytes_received=5, time=0.25))
+        assert metrics.to_ansible() == dict(
+            requests=[
+                trace(),
+                trace(bytes_sent=20, bytes_received=5, time=0.25),
+            ],
+            totals=dict(
+                requests=2,
+                bytes_sent=20,
+                bytes_received=105,
+                bytes_uncompressed=420,
+                time=0.75,
+            ),
+        )
+
+    def test_to_ansible_no_requests(self):
+        assert Metrics().to_ansible() == dict(
+            requests=[],
+            totals=dict(
+                requests=0,
+                bytes_sent=0,
+                bytes_received=0,
+                bytes_uncompressed=0,
+                time=0,
+            ),
+        )
+
+    def test_instrument(self, mocker):
+        module = mocker.Mock()
+        exit_json, fail_json = module.exit_json, module.fail_json
+        metrics = Metrics()
+        metrics.instrument(module)
+        metrics(trace())
+
+        module.exit_json(changed=True, records=[])
+        module.fail_json(msg="error")
+
+        exit_json.assert_called_once_with(
+            changed=True, records=[], maas_metrics=metrics.to_ansible()
+        )
+        fail_json.assert_called_once_with(
+            msg="error", maas_metrics=metrics.to_ansible()
+        )
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from itertools import islice
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.polling import Polling
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestFromAnsible:
+    def test_no_polling_params(self, create_module):
+        polling = Polling.from_ansible(create_module(params=dict()))
+        assert polling.interval == 1
+        assert polling.timeout is None
+
+    def test_polling_params(self, create_module):
+        module = create_module(
+            params=dict(
+                polling=dict(
+                    interval=2,
+                    backoff=1.5,
+                    max_interval=30,
+                    jitter=0,
+                    timeout=None,
+                )
+            )
+        )
+        polling = Polling.from_ansible(module)
+        assert polling.interval == 2
+        assert polling.backoff == 1.5
+        assert polling.max_interval == 30
+        assert polling.jitter == 0
+        assert polling.timeout is None
+
+    def test_timeout_starts_with_task(self, create_module, mocker):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.polling.time.monotonic"
+        ).return_value = 100
+        module = create_module(params=dict(polling=dict(timeout=30)))
+        assert Polling.from_ansible(module).deadline == 130
+
+    @pytest.mark.parametrize(
+        "params,message",
+        [
+            (dict(interval=0), "interval must be greater than 0"),
+            (dict(backoff=0.5), "backoff must be at least 1"),
+            (dict(max_interval=-1), "max_interval must be greater than 0"),
+            (dict(jitter=1), "jitter must be at least 0 and less than 1"),
+            (dict(jitter=-0.1), "jitter must be at least 0 and less than 1"),
+            (dict(timeout=-5), "timeout must not be negative"),
+        ],
+    )
+    def test_invalid_params(self, create_module, params, message):
+        module = create_module(params=dict(polling=params))
+        with pytest.raises(errors.MaasError, match=message):
+            Polling.from_ansible(module)
+
+
+class TestDelays:
+    def test_exponential_backoff(self):
+        polling = Polling(interval=1, backoff=2, max_interval=5, jitter=0)
+        assert list(islice(polling.delays(), 5)) == [1, 2, 4, 5, 5]
+
+    def test_jitter(self):
+        polling = Polling(interval=10, jitter=0.5)
+        for delay in islice(polling.delays(), 20):
+            assert 5 <= delay <= 15
+
+    def test_deadline(self, mocker):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.polling.time.monotonic"
+        ).side_effect = [0, 0, 2, 6, 10]
+        polling = Polling(interval=2, backoff=2, jitter=0, timeout=10)
+        assert list(polling.delays()) == [2, 4, 4]
+
+    def test_deadline_is_shared(self, mocker):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.polling.time.monotonic"
+        ).side_effect = [0, 6, 8, 10]
+        polling = Polling(interval=4, backoff=1, jitter=0, timeout=10)
+        assert list(islice(polling.delays(), 1)) == [4]
+        # The second wait only gets the time left by the first one.
+        assert list(polling.delays()) == [2]
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fcntl
+import sys
+import threading
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import (
+    errors,
+    rate_limit,
+)
+from ansible_collections.maas.maas.plugins.module_utils.rate_limit import (
+    RateLimiter,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+MODULE = "ansible_collections.maas.maas.plugins.module_utils.rate_limit"
+
+
+@pytest.fixture
+def clock(mocker):
+    return mocker.patch(MODULE + ".time.time", return_value=1000.0)
+
+
+class TestInit:
+    @pytest.mark.parametrize(
+        "options,message",
+        [
+            (dict(rate=0), "rate must be greater than 0"),
+            (dict(rate=-1), "rate must be greater than 0"),
+            (dict(rate=1, burst=0), "burst must be at least 1"),
+            (dict(max_in_flight=0), "max_in_flight must be at least 1"),
+            (dict(max_in_flight=-2), "max_in_flight must be at least 1"),
+        ],
+    )
+    def test_invalid(self, tmp_path, options, message):
+        with pytest.raises(errors.MaasError, match=message):
+            RateLimiter(str(tmp_path), "k", **options)
+
+    def test_valid(self, tmp_path):
+        limiter = RateLimiter(
+            str(tmp_path), "k", rate=0.5, burst=3, max_in_flight=1
+        )
+
+        assert limiter.rate == 0.5
+        assert limiter.burst == 3
+        assert limiter.max_in_flight == 1
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self, tmp_path, clock):
+        limiter = RateLimiter(str(tmp_path), "k", rate=10, burst=2)
+
+        assert limiter._take_token() == 0
+        assert limiter._take_token() == 0
+        assert limiter._take_token() == pytest.approx(0.1)
+        clock.return_value += 0.1
+        assert limiter._take_token() == 0
+
+    def test_shared_between_limiters(self, tmp_path, clock):
+        # Limiters in different processes share the bucket file.
+        first = RateLimiter(str(tmp_path), "k", rate=1)
+        second = RateLimiter(str(tmp_path), "k", rate=1)
+        other_region = RateLimiter(str(tmp_path), "other", rate=1)
+
+        assert first._take_token() == 0
+        assert second._take_token() == pytest.approx(1)
+        assert other_region._take_token() == 0
+
+    def test_limit_waits_for_token(self, tmp_path, clock, mocker):
+        sleep = mocker.patch(MODULE + ".time.sleep")
+        sleep.side_effect = lambda delay: setattr(
+            clock, "return_value", clock.return_value + delay
+        )
+        limiter = RateLimiter(str(tmp_path), "k", rate=2)
+
+        for _i in range(3):
+            with limiter.limit():
+                pass
+
+        assert sleep.call_args_list == [mocker.call(0.5), mocker.call(0.5)]
+
+
+class TestMaxInFlight:
+    def test_free_slot_is_taken(self, tmp_path, mocker):
+        flock = mocker.spy(rate_limit.fcntl, "flock")
+        first = RateLimiter(str(tmp_path), "k", max_in_flight=2)
+        second = RateLimiter(str(tmp_path), "k", max_in_flight=2)
+
+        with first.limit():
+            with second.limit():
+                pass
+
+        # Both slots were locked without blocking.
+        assert all(c[0][1] & fcntl.LOCK_NB for c in flock.call_args_list)
+
+    def test_waits_for_slot(self, tmp_path):
+        first = RateLimiter(str(tmp_path), "k", max_in_flight=1)
+        second = RateLimiter(str(tmp_path), "k", max_in_flight=1)
+        acquired = threading.Event()
+
+        def acquire():
+            with second.limit():
+                acquired.set()
+
+        with first.limit():
+            waiter = threading.Thread(target=acquire)
+            waiter.start()
+            assert not acquired.wait(0.2)
+        waiter.join(5)
+
+        assert acquired.is_set()
+
+    def test_no_limits(self, tmp_path):
+        with RateLimiter(str(tmp_path / "locks"), "k").limit():
+            pass
+        assert list((tmp_path / "locks").iterdir()) == []
+
+    def test_invalid_lock_dir(self, tmp_path):
+        (tmp_path / "file").write_text("")
+        limiter = RateLimiter(str(tmp_path / "file"), "k", max_in_flight=1)
+
+        with pytest.raises(errors.MaasError, match="lock directory"):
+            with limiter.limit():
+                pass
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.response_cache import (
+    ResponseCache,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestResponseCache:
+    def test_get_key(self):
+        key = ResponseCache.get_key("http://maas/api/", "consumer", "token")
+        assert key == ResponseCache.get_key(
+            "http://maas/api/", "consumer", "token"
+        )
+        assert key != ResponseCache.get_key(
+            "http://maas/api/", "consumer", "other"
+        )
+        assert key != ResponseCache.get_key(
+            "http://maas/api/?id=1", "consumer", "token"
+        )
+
+    def test_set_get(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache"))
+        cache.set(
+            "key",
+            Response(
+                200,
+                b'[{"id": 1}]',
+                [("ETag", '"abc"'), ("Last-Modified", "yesterday")],
+            ),
+        )
+
+        cached = cache.get("key")
+        assert cached.data == b'[{"id": 1}]'
+        assert cached.validators == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "yesterday",
+        }
+
+    def test_get_missing(self, tmp_path):
+        assert ResponseCache(str(tmp_path)).get("key") is None
+
+    def test_get_corrupted(self, tmp_path):
+        (tmp_path / "key").write_bytes(b"not json\n")
+        assert ResponseCache(str(tmp_path)).get("key") is None
+
+    def test_set_without_validators(self, tmp_path):
+        cache = ResponseCache(str(tmp_path))
+        cache.set("key", Response(200, "[]", [("Content-Type", "json")]))
+        assert cache.get("key") is None
+
+    def test_set_unwritable_path(self, tmp_path):
+        (tmp_path / "file").write_bytes(b"")
+        cache = ResponseCache(str(tmp_path / "file"))
+        cache.set("key", Response(200, "[]", [("ETag", "abc")]))
+        assert cache.get("key") is None
+
+    def test_least_recently_used_is_pruned(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), max_size=250)
+        for key in ("a", "b"):
+            cache.set(key, Response(200, b"x" * 100, [("ETag", key)]))
+        os.utime(str(tmp_path / "a"), (1, 1))
+        os.utime(str(tmp_path / "b"), (2, 2))
+        cache.get("a")  # a is now used more recently than b
+        cache.set("c", Response(200, b"x" * 100, [("ETag", "c")]))
+
+        assert sorted(os.listdir(str(tmp_path))) == ["a", "c"]
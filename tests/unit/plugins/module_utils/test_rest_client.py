@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.rest_client import (
+    RestClient,
+    split_query,
+)
+from ansible_collections.maas.maas.plugins.module_utils.utils import (
+    fqdn_to_query,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestFqdnToQuery:
+    def test_single(self):
+        assert fqdn_to_query("one.maas") == dict(
+            hostname=["one"], domain=["maas"]
+        )
+
+    def test_multiple(self):
+        assert fqdn_to_query("one.maas", "two.maas", "one.test") == dict(
+            hostname=["one", "two"], domain=["maas", "test"]
+        )
+
+    def test_bare_hostname(self):
+        assert fqdn_to_query("one.maas", "two") == dict(
+            hostname=["one", "two"]
+        )
+
+
+class TestSplitQuery:
+    def test_no_query(self):
+        assert split_query("/api/2.0/machines/", None) == ({}, {})
+
+    def test_endpoint_without_server_filters(self):
+        query = dict(name="test", hostname="test")
+        assert split_query("/api/2.0/tags/", query) == ({}, query)
+
+    def test_machines(self):
+        query = dict(
+            hostname="one",
+            system_id="abc123",
+            status="deployed",
+            tags=["a", "b"],
+            cpu_count=2,
+        )
+        assert split_query("/api/2.0/machines/", query) == (
+            dict(
+                hostname="one", id="abc123", status="deployed", tags=["a", "b"]
+            ),
+            dict(cpu_count=2),
+        )
+
+    def test_machines_fqdn(self):
+        assert split_query("/api/2.0/machines/", dict(fqdn="one.maas")) == (
+            dict(hostname=["one"], domain=["maas"]),
+            dict(fqdn="one.maas"),
+        )
+
+
+class TestListRecords:
+    def test_server_side_filter(self, client):
+        client.get.return_value = Response(
+            200, '[{"fqdn": "one.maas", "hostname": "one"}]'
+        )
+        rest_client = RestClient(client)
+
+        records = rest_client.list_records(
+            "/api/2.0/machines/", dict(fqdn="one.maas")
+        )
+
+        assert records == [{"fqdn": "one.maas", "hostname": "one"}]
+        client.get.assert_called_once_with(
+            path="/api/2.0/machines/",
+            query=dict(hostname=["one"], domain=["maas"]),
+            timeout=None,
+        )
+
+    def test_local_filter(self, client):
+        client.get.return_value = Response(
+            200, '[{"name": "one", "id": 1}, {"name": "two", "id": 2}]'
+        )
+        rest_client = RestClient(client)
+
+        records = rest_client.list_records(
+            "/api/2.0/spaces/", dict(name="two")
+        )
+
+        assert records == [{"name": "two", "id": 2}]
+        client.get.assert_called_once_with(
+            path="/api/2.0/spaces/", query=None, timeout=None
+        )
+
+    def test_get_record_not_unique(self, client):
+        client.get.return_value = Response(
+            200, '[{"name": "one"}, {"name": "one"}]'
+        )
+        rest_client = RestClient(client)
+
+        with pytest.raises(errors.MaasError, match="2 records"):
+            rest_client.get_record("/api/2.0/spaces/", dict(name="one"))
+
+
+class TestIterRecords:
+    def test_filters(self, client):
+        client.iter_records.return_value = iter(
+            [
+                {"fqdn": "one.maas", "hostname": "one"},
+                {"fqdn": "one.other", "hostname": "one"},
+            ]
+        )
+        rest_client = RestClient(client)
+
+        records = rest_client.iter_records(
+            "/api/2.0/machines/", dict(fqdn="one.maas")
+        )
+
+        assert list(records) == [{"fqdn": "one.maas", "hostname": "one"}]
+        client.iter_records.assert_called_once_with(
+            "/api/2.0/machines/",
+            query=dict(hostname=["one"], domain=["maas"]),
+            timeout=None,
+        )
+
+
+class TestExecuteMany:
+    def test_results_in_order(self, client):
+        rest_client = RestClient(client)
+
+        results = rest_client.execute_many(lambda x: x * 2, [1, 2, 3, 4, 5])
+
+        assert results == [2, 4, 6, 8, 10]
+
+    def test_no_items(self, client):
+        rest_client = RestClient(client)
+
+        assert rest_client.execute_many(lambda x: x, []) == []
+
+    def test_single_item_inline(self, client, mocker):
+        pool = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.rest_client.ThreadPoolExecutor"
+        )
+        rest_client = RestClient(client)
+
+        assert rest_client.execute_many(lambda x: x + 1, [1]) == [2]
+        pool.assert_not_called()
+
+    def test_failures_aggregated(self, client):
+        called = []
+
+        def func(item):
+            called.append(item)
+            if item % 2:
+                raise errors.MaasError("item {0}".format(item))
+            return item
+
+        rest_client = RestClient(client)
+
+        with pytest.raises(errors.BatchError, match="2 of 4") as exc:
+            rest_client.execute_many(func, [1, 2, 3, 4])
+
+        assert sorted(called) == [1, 2, 3, 4]
+        assert [str(e) for e in exc.value.errors] == ["item 1", "item 3"]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.retry import (
+    RetryPolicy,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+class TestFromAnsible:
+    def test_params(self):
+        policy = RetryPolicy.from_ansible(
+            dict(retries=5, interval=None, statuses=[503])
+        )
+        assert policy.retries == 5
+        assert policy.interval == 1
+        assert policy.statuses == (503,)
+
+
+class TestAllows:
+    @pytest.mark.parametrize(
+        "method,query,allowed",
+        [
+            ("GET", None, True),
+            ("PUT", None, True),
+            ("DELETE", dict(op="x"), True),
+            ("POST", None, False),
+            ("POST", dict(op="deploy"), False),
+            ("POST", dict(op="update_nodes"), True),
+            ("PATCH", None, False),
+        ],
+    )
+    def test_allows(self, method, query, allowed):
+        assert RetryPolicy().allows(method, query) is allowed
+
+
+class TestDelays:
+    def test_retries(self):
+        policy = RetryPolicy(retries=4, interval=1, max_interval=3, jitter=0)
+        assert list(policy.delays()) == [1, 2, 3, 3]
+
+    def test_disabled(self):
+        assert list(RetryPolicy(retries=0).delays()) == []
+
+    @pytest.mark.parametrize(
+        "retry_after,delay",
+        [(None, 1), ("2", 2), ("0", 1), ("120", 10), ("Fri, 1 Jan", 1)],
+    )
+    def test_get_delay(self, retry_after, delay):
+        assert RetryPolicy(max_interval=10).get_delay(1, retry_after) == delay
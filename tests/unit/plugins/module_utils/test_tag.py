@@ -21,19 +21,35 @@ pytestmark = pytest.mark.skipif(
 
 
 class TestRequest:
-    def test_send_tag_request(self, client):
-        machine_id = "test-id"
-        tag_name = "test"
-        client.post.return_value = Response(200, "[]")
-        results = Tag.send_tag_request(client, machine_id, tag_name)
+    def test_send_update_nodes_request_add(self, client):
+        client.post.return_value = Response(200, "{}")
+        results = Tag.send_update_nodes_request(client, "test", add=["a"])
         assert results is None
+        client.post.assert_called_once_with(
+            "/api/2.0/tags/test/",
+            query={"op": "update_nodes"},
+            data=dict(add=["a"], remove=[]),
+        )
 
-    def test_send_untag_request(self, client):
-        machine_id = "test-id"
-        tag_name = "test"
-        client.post.return_value = Response(200, "[]")
-        results = Tag.send_untag_request(client, machine_id, tag_name)
-        assert results is None
+    def test_send_update_nodes_request_remove(self, client):
+        client.post.return_value = Response(200, "{}")
+        Tag.send_update_nodes_request(client, "test", remove=("a", "b"))
+        client.post.assert_called_once_with(
+            "/api/2.0/tags/test/",
+            query={"op": "update_nodes"},
+            data=dict(add=[], remove=["a", "b"]),
+        )
+
+    def test_send_update_nodes_request(self, client):
+        client.post.return_value = Response(200, "{}")
+        Tag.send_update_nodes_request(
+            client, "test", add=["a", "b"], remove=["c"]
+        )
+        client.post.assert_called_once_with(
+            "/api/2.0/tags/test/",
+            query={"op": "update_nodes"},
+            data=dict(add=["a", "b"], remove=["c"]),
+        )
 
     def test_send_create_request(self, create_module, client):
         module = create_module(
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.machine import Machine
+from ansible_collections.maas.maas.plugins.module_utils.polling import Polling
+from ansible_collections.maas.maas.plugins.module_utils.waiter import (
+    MachineWaiter,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def machines_response(*machines):
+    return Response(
+        200,
+        json.dumps(
+            [
+                dict(system_id=system_id, hostname=system_id, status_name=s)
+                for system_id, s in machines
+            ]
+        ),
+    )
+
+
+@pytest.fixture
+def from_maas(mocker):
+    return mocker.patch(
+        "ansible_collections.maas.maas.plugins.module_utils.waiter.Machine.from_maas",
+        side_effect=lambda d: Machine(
+            id=d["system_id"], status=d["status_name"]
+        ),
+    )
+
+
+class TestPoll:
+    def test_single_request_for_all_machines(self, client, from_maas):
+        client.get.return_value = machines_response(
+            ("a", "Deploying"), ("b", "Deployed")
+        )
+        waiter = MachineWaiter(client)
+        waiter.add("a", "Deployed")
+        waiter.add("b", "Deployed")
+
+        assert waiter.poll() == ["a"]
+        client.get.assert_called_once_with(
+            "/api/2.0/machines/", query=dict(id=["a", "b"])
+        )
+        assert waiter.results["b"].status == "Deployed"
+
+    def test_failed_and_missing_machines(self, client, from_maas):
+        client.get.return_value = machines_response(("a", "Failed deployment"))
+        waiter = MachineWaiter(client)
+        waiter.add("a", "Deployed")
+        waiter.add("b", "Deployed")
+
+        assert waiter.poll() == []
+        assert waiter.failures == {
+            "a": "Machine - a - Failed deployment",
+            "b": "Machine - b - not found",
+        }
+
+    def test_requests_are_chunked(self, client, mocker, from_maas):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.waiter.MAX_IDS_PER_REQUEST",
+            2,
+        )
+        client.get.side_effect = [
+            machines_response(("a", "Ready"), ("b", "Ready")),
+            machines_response(("c", "Ready")),
+        ]
+        waiter = MachineWaiter(client)
+        for system_id in ("a", "b", "c"):
+            waiter.add(system_id, "Ready")
+
+        assert waiter.poll() == []
+        assert client.get.call_count == 2
+
+
+class TestWait:
+    def test_wait(self, client, mocker, from_maas):
+        sleep = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.waiter.sleep"
+        )
+        client.get.side_effect = [
+            machines_response(("a", "Allocating"), ("b", "Allocating")),
+            machines_response(("a", "Allocated"), ("b", "Allocating")),
+            machines_response(("b", "Allocated")),
+        ]
+        waiter = MachineWaiter(client, Polling(interval=1, jitter=0))
+        waiter.add("a", "Allocated")
+        waiter.add("b", "Allocated")
+
+        results, failures = waiter.wait()
+
+        assert sorted(results) == ["a", "b"]
+        assert failures == {}
+        assert client.get.call_args_list[2] == mocker.call(
+            "/api/2.0/machines/", query=dict(id=["b"])
+        )
+        sleep.assert_has_calls([mocker.call(1), mocker.call(2)])
+
+    def test_wait_timeout(self, client, mocker, from_maas):
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.waiter.sleep"
+        )
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.polling.time.monotonic"
+        ).side_effect = [0, 11]
+        client.get.return_value = machines_response(("a", "Deploying"))
+        waiter = MachineWaiter(client, Polling(timeout=10))
+        waiter.add("a", "Deployed")
+
+        results, failures = waiter.wait()
+
+        assert results == {}
+        assert failures == {
+            "a": "Timed out waiting for - machine a to reach state Deployed"
+        }
@@ -435,3 +435,38 @@ class TestMustUpdatePartition:
         result = block_device.must_update_partitions(module, old_block_device)
 
         assert result is False
+
+
+class TestTags:
+    def test_create_tags(self, create_module, client, mocker):
+        module = create_module(
+            params=dict(
+                cluster_instance=dict(
+                    host="https://0.0.0.0",
+                    token_key="URCfn6EhdZ",
+                    token_secret="PhXz3ncACvkcK",
+                    customer_key="nzW4EBWjyDe",
+                ),
+                tags=["ssd", "fast", "backup"],
+            )
+        )
+        device = mocker.Mock()
+
+        block_device.create_tags(module, client, device)
+
+        assert device.add_tag.call_args_list == [
+            mocker.call(client, "ssd"),
+            mocker.call(client, "fast"),
+            mocker.call(client, "backup"),
+        ]
+
+    def test_delete_tags(self, client, mocker):
+        device = mocker.Mock(tags=["ssd", "fast", "backup"])
+
+        block_device.delete_tags(client, device)
+
+        assert device.remove_tag.call_args_list == [
+            mocker.call(client, "ssd"),
+            mocker.call(client, "fast"),
+            mocker.call(client, "backup"),
+        ]
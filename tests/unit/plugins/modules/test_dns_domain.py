@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.collection import (
+    CollectionLoader,
+)
+from ansible_collections.maas.maas.plugins.modules import dns_domain
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+CLUSTER_INSTANCE = dict(
+    host="https://0.0.0.0",
+    token_key="URCfn6EhdZ",
+    token_secret="PhXz3ncACvkcK",
+    customer_key="nzW4EBWjyDe",
+)
+
+DOMAIN = dict(
+    id=1, name="example.com", ttl=3600, authoritative=True, is_default=False
+)
+
+
+def get_params(**params):
+    return dict(
+        dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            name="example.com",
+            ttl=None,
+            authoritative=None,
+            is_default=None,
+        ),
+        **params,
+    )
+
+
+class TestMain:
+    def test_minimal_set_of_params(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            name="example.com",
+        )
+
+        success, result = run_main(dns_domain, params)
+
+        assert success is True
+
+    def test_fail(self, run_main):
+        success, result = run_main(dns_domain)
+
+        assert success is False
+        assert "missing required arguments: name, state" in result["msg"]
+
+
+class TestEnsurePresent:
+    def test_create(self, create_module, client):
+        module = create_module(params=get_params(ttl=3600))
+        client.get.return_value = Response(200, "[]")
+        client.post.return_value = Response(200, json.dumps(DOMAIN))
+
+        changed, record, diff = dns_domain.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record == DOMAIN
+        assert diff == dict(before={}, after=DOMAIN)
+        client.post.assert_called_once_with(
+            "/api/2.0/domains/", dict(name="example.com", ttl=3600)
+        )
+
+    def test_unchanged(self, create_module, client):
+        module = create_module(params=get_params(ttl=3600))
+        client.get.return_value = Response(200, json.dumps([DOMAIN]))
+
+        changed, record, diff = dns_domain.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        assert record == DOMAIN
+        client.post.assert_not_called()
+        client.put.assert_not_called()
+
+    def test_update(self, create_module, client):
+        module = create_module(params=get_params(ttl=60))
+        updated = dict(DOMAIN, ttl=60)
+        client.get.return_value = Response(200, json.dumps([DOMAIN]))
+        client.put.return_value = Response(200, json.dumps(updated))
+
+        changed, record, diff = dns_domain.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(before=DOMAIN, after=updated)
+        client.put.assert_called_once_with(
+            "/api/2.0/domains//1/", dict(name="example.com", ttl=60)
+        )
+
+    def test_set_default(self, create_module, client):
+        module = create_module(params=get_params(is_default=True))
+        default = dict(DOMAIN, is_default=True)
+        client.get.return_value = Response(200, json.dumps([DOMAIN]))
+        client.post.return_value = Response(200, json.dumps(default))
+
+        changed, record, diff = dns_domain.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record == default
+        client.put.assert_not_called()
+        client.post.assert_called_once_with(
+            "/api/2.0/domains//1/", {}, query={"op": "set_default"}
+        )
+
+
+class TestEnsureAbsent:
+    def test_delete(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        client.get.return_value = Response(200, json.dumps([DOMAIN]))
+
+        changed, record, diff = dns_domain.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(before=DOMAIN, after={})
+        client.delete.assert_called_once_with("/api/2.0/domains//1/")
+
+    def test_already_absent(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        client.get.return_value = Response(200, json.dumps([]))
+
+        changed, record, diff = dns_domain.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        client.delete.assert_not_called()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.collection import (
+    CollectionLoader,
+)
+from ansible_collections.maas.maas.plugins.modules import dns_record
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+CLUSTER_INSTANCE = dict(
+    host="https://0.0.0.0",
+    token_key="URCfn6EhdZ",
+    token_secret="PhXz3ncACvkcK",
+    customer_key="nzW4EBWjyDe",
+)
+
+DOMAINS = [dict(id=0, name="maas")]
+
+RECORD = dict(
+    id=5,
+    fqdn="web.maas",
+    address_ttl=300,
+    ip_addresses=[dict(ip="10.0.0.5")],
+    resource_records=[],
+)
+
+RECORD_AS_ANSIBLE = dict(
+    type="A/AAAA",
+    data="10.0.0.5",
+    fqdn="web.maas",
+    name="web",
+    domain="maas",
+    ttl=300,
+    id=5,
+)
+
+
+def get_params(**params):
+    return dict(
+        dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            fqdn="web.maas",
+            name=None,
+            domain=None,
+            type="A/AAAA",
+            data="10.0.0.5",
+            ttl=300,
+        ),
+        **params,
+    )
+
+
+def mock_lists(client, records):
+    lists = {
+        "/api/2.0/domains/": DOMAINS,
+        "/api/2.0/dnsresources/": records,
+    }
+    client.get.side_effect = lambda path, *args, **kwargs: Response(
+        200, json.dumps(lists[path])
+    )
+
+
+class TestMain:
+    def test_minimal_set_of_params(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            fqdn="web.maas",
+            type="A/AAAA",
+            data="10.0.0.5",
+        )
+
+        success, result = run_main(dns_record, params)
+
+        assert success is True
+
+    def test_fail_without_data(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            fqdn="web.maas",
+        )
+
+        success, result = run_main(dns_record, params)
+
+        assert success is False
+        assert "state is present but all of the following" in result["msg"]
+
+
+class TestEnsurePresent:
+    def test_create(self, create_module, client):
+        module = create_module(params=get_params())
+        mock_lists(client, [])
+        client.post.return_value = Response(200, json.dumps(RECORD))
+
+        changed, record, diff = dns_record.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record == RECORD_AS_ANSIBLE
+        assert diff == dict(before={}, after=RECORD_AS_ANSIBLE)
+        client.post.assert_called_once_with(
+            "/api/2.0/dnsresources/",
+            dict(
+                name="web",
+                domain="maas",
+                address_ttl=300,
+                ip_addresses="10.0.0.5",
+            ),
+        )
+
+    def test_create_resource_record(self, create_module, client):
+        module = create_module(
+            params=get_params(
+                fqdn=None, name="www", domain="maas", type="CNAME", data="web"
+            )
+        )
+        mock_lists(client, [])
+        client.post.return_value = Response(
+            200,
+            json.dumps(
+                dict(
+                    id=7,
+                    fqdn="www.maas",
+                    rrtype="CNAME",
+                    rrdata="web",
+                    ttl=None,
+                )
+            ),
+        )
+
+        changed, record, diff = dns_record.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record["type"] == "CNAME"
+        assert record["data"] == "web"
+        client.post.assert_called_once_with(
+            "/api/2.0/dnsresourcerecords/",
+            dict(name="www", domain="maas", rrtype="CNAME", rrdata="web"),
+        )
+
+    def test_unchanged(self, create_module, client):
+        module = create_module(params=get_params())
+        mock_lists(client, [RECORD])
+
+        changed, record, diff = dns_record.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        assert record == RECORD_AS_ANSIBLE
+        client.post.assert_not_called()
+        client.put.assert_not_called()
+
+    def test_update(self, create_module, client):
+        module = create_module(params=get_params(data="10.0.0.6"))
+        updated = dict(RECORD, ip_addresses=[dict(ip="10.0.0.6")])
+        mock_lists(client, [RECORD])
+        client.put.return_value = Response(200, json.dumps(updated))
+
+        changed, record, diff = dns_record.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(
+            before=RECORD_AS_ANSIBLE,
+            after=dict(RECORD_AS_ANSIBLE, data="10.0.0.6"),
+        )
+        client.put.assert_called_once_with(
+            "/api/2.0/dnsresources//5/",
+            dict(address_ttl=300, ip_addresses="10.0.0.6"),
+        )
+
+    def test_unknown_domain(self, create_module, client):
+        module = create_module(params=get_params(fqdn="web.example"))
+        mock_lists(client, [])
+
+        with pytest.raises(errors.MaasError, match="domain example"):
+            dns_record.ensure_present(module, client, CollectionLoader(client))
+        client.post.assert_not_called()
+
+    def test_type_change(self, create_module, client):
+        module = create_module(params=get_params(type="TXT", data="text"))
+        mock_lists(client, [RECORD])
+
+        with pytest.raises(errors.MaasError, match="may not be changed"):
+            dns_record.ensure_present(module, client, CollectionLoader(client))
+        client.put.assert_not_called()
+
+
+class TestEnsureAbsent:
+    def test_delete(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [RECORD])
+
+        changed, record, diff = dns_record.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(before=RECORD_AS_ANSIBLE, after={})
+        client.delete.assert_called_once_with("/api/2.0/dnsresources//5/")
+
+    def test_already_absent(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [])
+
+        changed, record, diff = dns_record.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        client.delete.assert_not_called()
@@ -257,7 +257,7 @@ class TestDeploy:
             id=123456,
             status="Allocated",
         )
-        mocker.patch(
+        wait_for_state = mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.instance.Machine.wait_for_state"
         )
 
@@ -274,6 +274,9 @@ class TestDeploy:
             timeout=30,
         )
         assert result[0] is True
+        # All the waits share one deadline.
+        allocated, deployed = wait_for_state.call_args_list
+        assert allocated[1]["polling"] is deployed[1]["polling"]
 
     def test_deploy_status_deployed(self, create_module, client, mocker):
         module = create_module(
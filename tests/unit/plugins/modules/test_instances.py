@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.machine import Machine
+from ansible_collections.maas.maas.plugins.modules import instances
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+
+def params(**kwargs):
+    result = dict(
+        cluster_instance=dict(
+            host="https://0.0.0.0",
+            token_key="URCfn6EhdZ",
+            token_secret="PhXz3ncACvkcK",
+            customer_key="nzW4EBWjyDe",
+        ),
+        fqdns=None,
+        count=None,
+        allocate_params=None,
+        deploy_params=None,
+        max_workers=4,
+        polling=None,
+    )
+    result.update(kwargs)
+    return result
+
+
+@pytest.fixture
+def waiter(mocker):
+    # Every machine immediately reaches the state it is waited for.
+    def wait(self):
+        return (
+            dict(
+                (system_id, Machine(id=system_id, status=states[0]))
+                for system_id, states in self.targets.items()
+            ),
+            {},
+        )
+
+    return mocker.patch.object(
+        instances.MachineWaiter, "wait", autospec=True, side_effect=wait
+    )
+
+
+class TestAllocate:
+    def test_allocate(self, create_module, client, mocker):
+        module = create_module(
+            params=params(
+                count=3,
+                allocate_params=dict(
+                    min_cpu_count=2,
+                    min_memory=None,
+                    zone=None,
+                    pool="rack-1",
+                    tags=None,
+                ),
+            )
+        )
+        client.post.side_effect = [
+            Response(200, json.dumps(dict(system_id="a"))),
+            Response(200, json.dumps(dict(system_id="b"))),
+            errors.UnexpectedAPIResponse(Response(409, "No machine")),
+        ]
+        mocker.patch.object(
+            instances.Machine,
+            "from_maas",
+            side_effect=lambda d: Machine(id=d["system_id"]),
+        )
+        failures = []
+
+        machines = instances.allocate(module, client, failures)
+
+        assert sorted(m.id for m in machines) == ["a", "b"]
+        assert failures == [
+            dict(id=None, msg="Unexpected response - 409 No machine")
+        ]
+        client.post.assert_called_with(
+            "/api/2.0/machines/",
+            query={"op": "allocate"},
+            data=dict(cpu_count=2, pool="rack-1"),
+        )
+
+
+class TestDeploy:
+    def test_deploy_fqdns(self, create_module, client, mocker, waiter):
+        module = create_module(
+            params=params(
+                fqdns=["a.maas", "b.maas", "c.maas", "d.maas"],
+                deploy_params=dict(
+                    distro_series="jammy",
+                    timeout=None,
+                    hwe_kernel=None,
+                    user_data=None,
+                ),
+            )
+        )
+        mocker.patch.object(
+            instances.Machine,
+            "get_id_from_fqdn",
+            return_value=[
+                Machine(id="a", status="Deployed"),
+                Machine(id="b", status="New"),
+                Machine(id="c", status="Commissioning"),
+                Machine(id="d", status="Ready"),
+            ],
+        )
+        commission = mocker.patch.object(instances.Machine, "commission")
+        deploy = mocker.patch.object(instances.Machine, "deploy")
+
+        changed, records, diff, failures = instances.deploy(module, client)
+
+        assert changed is True
+        assert failures == []
+        commission.assert_called_once_with(client)
+        assert deploy.call_count == 3
+        deploy.assert_called_with(client, dict(distro_series="jammy"), 60)
+        assert sorted(r["id"] for r in records) == ["a", "b", "c", "d"]
+        assert all(r["status"] == "Deployed" for r in records)
+        # All the stages share one deadline.
+        assert (
+            len(set(id(c[0][0].polling) for c in waiter.call_args_list)) == 1
+        )
+
+    def test_deploy_already_deployed(
+        self, create_module, client, mocker, waiter
+    ):
+        module = create_module(params=params(fqdns=["a.maas"]))
+        mocker.patch.object(
+            instances.Machine,
+            "get_id_from_fqdn",
+            return_value=[Machine(id="a", status="Deployed")],
+        )
+        deploy = mocker.patch.object(instances.Machine, "deploy")
+
+        changed, records, diff, failures = instances.deploy(module, client)
+
+        assert changed is False
+        deploy.assert_not_called()
+        assert [r["id"] for r in records] == ["a"]
+
+    def test_deploy_failures(self, create_module, client, mocker, waiter):
+        module = create_module(params=params(fqdns=["a.maas", "b.maas"]))
+        mocker.patch.object(
+            instances.Machine,
+            "get_id_from_fqdn",
+            return_value=[
+                Machine(id="a", status="Ready"),
+                Machine(id="b", status="Ready"),
+            ],
+        )
+
+        def deploy(self, client, data, timeout):
+            if self.id == "b":
+                raise errors.MaasError("Deploy failed")
+
+        mocker.patch.object(
+            instances.Machine, "deploy", autospec=True, side_effect=deploy
+        )
+
+        changed, records, diff, failures = instances.deploy(module, client)
+
+        assert changed is True
+        assert [r["id"] for r in records] == ["a"]
+        assert failures == [dict(id="b", msg="Deploy failed")]
+
+
+class TestMain:
+    cluster_instance = dict(
+        host="https://0.0.0.0",
+        token_key="URCfn6EhdZ",
+        token_secret="PhXz3ncACvkcK",
+        customer_key="nzW4EBWjyDe",
+    )
+
+    def test_fqdns(self, run_main_with_reboot):
+        success, result = run_main_with_reboot(
+            instances,
+            dict(
+                cluster_instance=self.cluster_instance,
+                fqdns=["a.maas", "b.maas"],
+                deploy_params=dict(distro_series="jammy"),
+                max_workers=20,
+                polling=dict(timeout=3600),
+            ),
+        )
+
+        assert success is True
+
+    def test_count(self, run_main_with_reboot):
+        success, result = run_main_with_reboot(
+            instances,
+            dict(
+                cluster_instance=self.cluster_instance,
+                count=10,
+                allocate_params=dict(pool="rack-1"),
+            ),
+        )
+
+        assert success is True
+
+    def test_fqdns_and_count(self, run_main_with_reboot):
+        success, result = run_main_with_reboot(
+            instances,
+            dict(
+                cluster_instance=self.cluster_instance,
+                fqdns=["a.maas"],
+                count=10,
+            ),
+        )
+
+        assert success is False
+        assert "mutually exclusive" in result["msg"]
+
+    @pytest.mark.parametrize("max_workers", [0, -1])
+    def test_invalid_max_workers(self, run_main_with_reboot, max_workers):
+        success, result = run_main_with_reboot(
+            instances,
+            dict(
+                cluster_instance=self.cluster_instance,
+                fqdns=["a.maas"],
+                max_workers=max_workers,
+            ),
+        )
+
+        assert success is False
+        assert result["msg"] == "max_workers must be at least 1."
+
+    def test_missing_fqdns_and_count(self, run_main_with_reboot):
+        success, result = run_main_with_reboot(
+            instances, dict(cluster_instance=self.cluster_instance)
+        )
+
+        assert success is False
+        assert "one of the following is required" in result["msg"]
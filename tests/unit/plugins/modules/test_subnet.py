@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.collection import (
+    CollectionLoader,
+)
+from ansible_collections.maas.maas.plugins.modules import subnet
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+CLUSTER_INSTANCE = dict(
+    host="https://0.0.0.0",
+    token_key="URCfn6EhdZ",
+    token_secret="PhXz3ncACvkcK",
+    customer_key="nzW4EBWjyDe",
+)
+
+SUBNET = dict(
+    id=2,
+    name="lan",
+    cidr="10.0.0.0/24",
+    vlan=dict(id=5, name="untagged", fabric_id=1, fabric="fabric-1"),
+    rdns_mode=2,
+    allow_dns=True,
+    allow_proxy=True,
+    gateway_ip="10.0.0.1",
+    dns_servers=[],
+)
+
+RESERVED = dict(type="reserved", start_ip="10.0.0.10", end_ip="10.0.0.20")
+DYNAMIC = dict(type="dynamic", start_ip="10.0.0.100", end_ip="10.0.0.200")
+
+
+def ip_range(id, data, subnet_name="lan"):
+    return dict(data, id=id, subnet=dict(id=2, name=subnet_name))
+
+
+def get_params(**params):
+    return dict(
+        dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            name="lan",
+            cidr="10.0.0.0/24",
+            fabric=None,
+            vlan=None,
+            rdns_mode=None,
+            allow_dns=None,
+            allow_proxy=None,
+            gateway_ip=None,
+            dns_servers=None,
+            ip_ranges=None,
+        ),
+        **params,
+    )
+
+
+def mock_lists(client, subnets, *ip_ranges):
+    # ip_ranges are the lists of IP ranges MAAS returns, one for each time
+    # the list is fetched.
+    ip_ranges = list(ip_ranges)
+    lists = {
+        "/api/2.0/fabrics/": [],
+        "/api/2.0/subnets/": subnets,
+        "/api/2.0/subnets//2/": SUBNET,
+    }
+
+    def get(path, *args, **kwargs):
+        if path == "/api/2.0/ipranges/":
+            return Response(200, json.dumps(ip_ranges.pop(0)))
+        return Response(200, json.dumps(lists[path]))
+
+    client.get.side_effect = get
+
+
+def posted_ip_ranges(client):
+    return sorted(
+        (c[0][1] for c in client.post.call_args_list if "ipranges" in c[0][0]),
+        key=lambda data: data["start_ip"],
+    )
+
+
+class TestMain:
+    def test_minimal_set_of_params(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            name="lan",
+            cidr="10.0.0.0/24",
+            ip_ranges=[],
+        )
+
+        success, result = run_main(subnet, params)
+
+        assert success is True
+
+    def test_fail_vlan_without_fabric(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            name="lan",
+            cidr="10.0.0.0/24",
+            ip_ranges=[],
+            vlan="untagged",
+        )
+
+        success, result = run_main(subnet, params)
+
+        assert success is False
+        assert "missing parameter(s) required by 'vlan'" in result["msg"]
+
+
+class TestEnsurePresent:
+    def test_create_with_ip_ranges(self, create_module, client):
+        module = create_module(
+            params=get_params(ip_ranges=[dict(RESERVED), dict(DYNAMIC)])
+        )
+        mock_lists(client, [], [ip_range(8, RESERVED), ip_range(9, DYNAMIC)])
+        client.post.return_value = Response(200, json.dumps(SUBNET))
+
+        changed, record, diff = subnet.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record["vlan"] == "untagged"
+        assert record["fabric"] == "fabric-1"
+        assert record["ip_ranges"] == [RESERVED, DYNAMIC]
+        client.post.assert_any_call(
+            "/api/2.0/subnets/",
+            dict(name="lan", cidr="10.0.0.0/24", dns_servers=""),
+        )
+        assert posted_ip_ranges(client) == [
+            dict(RESERVED, subnet=2),
+            dict(DYNAMIC, subnet=2),
+        ]
+
+    def test_unchanged(self, create_module, client):
+        module = create_module(params=get_params(ip_ranges=[dict(RESERVED)]))
+        mock_lists(
+            client,
+            [SUBNET],
+            [ip_range(8, RESERVED), ip_range(9, DYNAMIC, "dmz")],
+        )
+
+        changed, record, diff = subnet.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        assert record["ip_ranges"] == [RESERVED]
+        client.post.assert_not_called()
+        client.put.assert_not_called()
+        client.delete.assert_not_called()
+
+    def test_update(self, create_module, client):
+        module = create_module(params=get_params(gateway_ip="10.0.0.254"))
+        mock_lists(client, [SUBNET], [], [])
+        client.put.return_value = Response(
+            200, json.dumps(dict(SUBNET, gateway_ip="10.0.0.254"))
+        )
+
+        changed, record, diff = subnet.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record["gateway_ip"] == "10.0.0.254"
+        assert diff["before"]["gateway_ip"] == "10.0.0.1"
+        client.put.assert_called_once_with(
+            "/api/2.0/subnets//2/",
+            dict(
+                name="lan",
+                cidr="10.0.0.0/24",
+                gateway_ip="10.0.0.254",
+                dns_servers="",
+            ),
+        )
+
+    def test_add_and_remove_ip_ranges(self, create_module, client):
+        module = create_module(params=get_params(ip_ranges=[dict(DYNAMIC)]))
+        mock_lists(
+            client,
+            [SUBNET],
+            [ip_range(8, RESERVED)],
+            [ip_range(9, DYNAMIC)],
+        )
+
+        changed, record, diff = subnet.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff["before"]["ip_ranges"] == [RESERVED]
+        # The changed list is fetched again for the result.
+        assert record["ip_ranges"] == [DYNAMIC]
+        client.put.assert_not_called()
+        client.delete.assert_called_once_with("/api/2.0/ipranges/8/")
+        assert posted_ip_ranges(client) == [dict(DYNAMIC, subnet=2)]
+
+
+class TestEnsureAbsent:
+    def test_delete(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [SUBNET])
+
+        changed, record, diff = subnet.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(before=SUBNET, after={})
+        client.delete.assert_called_once_with("/api/2.0/subnets//2/")
+
+    def test_already_absent(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [])
+
+        changed, record, diff = subnet.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        client.delete.assert_not_called()
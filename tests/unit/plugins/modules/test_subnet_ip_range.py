@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# # Copyright: (c) 2022, XLAB Steampunk <steampunk@xlab.si>
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import sys
+
+import pytest
+
+from ansible_collections.maas.maas.plugins.module_utils import errors
+from ansible_collections.maas.maas.plugins.module_utils.client import Response
+from ansible_collections.maas.maas.plugins.module_utils.collection import (
+    CollectionLoader,
+)
+from ansible_collections.maas.maas.plugins.modules import subnet_ip_range
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (2, 7), reason="requires python2.7 or higher"
+)
+
+CLUSTER_INSTANCE = dict(
+    host="https://0.0.0.0",
+    token_key="URCfn6EhdZ",
+    token_secret="PhXz3ncACvkcK",
+    customer_key="nzW4EBWjyDe",
+)
+
+SUBNETS = [dict(id=2, name="lan"), dict(id=3, name="dmz")]
+
+
+def ip_range(id, subnet, comment=""):
+    return dict(
+        id=id,
+        subnet=subnet,
+        type="reserved",
+        start_ip="10.0.0.10",
+        end_ip="10.0.0.20",
+        comment=comment,
+    )
+
+
+def get_params(**params):
+    return dict(
+        dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            subnet="lan",
+            type="reserved",
+            start_ip="10.0.0.10",
+            end_ip="10.0.0.20",
+            comment=None,
+        ),
+        **params,
+    )
+
+
+def mock_lists(client, ip_ranges):
+    lists = {
+        "/api/2.0/subnets/": SUBNETS,
+        "/api/2.0/ipranges/": ip_ranges,
+    }
+    client.get.side_effect = lambda path, *args, **kwargs: Response(
+        200, json.dumps(lists[path])
+    )
+
+
+class TestMain:
+    def test_minimal_set_of_params(self, run_main):
+        params = dict(
+            cluster_instance=CLUSTER_INSTANCE,
+            state="present",
+            subnet="lan",
+            type="reserved",
+            start_ip="10.0.0.10",
+            end_ip="10.0.0.20",
+        )
+
+        success, result = run_main(subnet_ip_range, params)
+
+        assert success is True
+
+    def test_fail(self, run_main):
+        success, result = run_main(subnet_ip_range, dict(state="absent"))
+
+        assert success is False
+        assert "missing required arguments" in result["msg"]
+
+
+class TestEnsurePresent:
+    def test_create(self, create_module, client):
+        module = create_module(params=get_params())
+        # The same range on another subnet is not a match.
+        mock_lists(client, [ip_range(8, SUBNETS[1])])
+        client.post.return_value = Response(
+            200, json.dumps(ip_range(9, SUBNETS[0]))
+        )
+
+        changed, record, diff = subnet_ip_range.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record["id"] == 9
+        client.post.assert_called_once_with(
+            "/api/2.0/ipranges/",
+            dict(
+                subnet=2,
+                type="reserved",
+                start_ip="10.0.0.10",
+                end_ip="10.0.0.20",
+            ),
+        )
+
+    def test_unchanged(self, create_module, client):
+        module = create_module(params=get_params())
+        mock_lists(client, [ip_range(9, SUBNETS[0])])
+
+        changed, record, diff = subnet_ip_range.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        assert record == ip_range(9, "lan")
+        client.post.assert_not_called()
+        client.put.assert_not_called()
+
+    def test_update_comment(self, create_module, client):
+        module = create_module(params=get_params(comment="servers"))
+        mock_lists(client, [ip_range(9, SUBNETS[0])])
+        client.put.return_value = Response(
+            200, json.dumps(ip_range(9, SUBNETS[0], comment="servers"))
+        )
+
+        changed, record, diff = subnet_ip_range.ensure_present(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert record == ip_range(9, "lan", comment="servers")
+        assert diff["before"] == ip_range(9, "lan")
+        client.put.assert_called_once_with(
+            "/api/2.0/ipranges//9/",
+            dict(
+                subnet=2,
+                type="reserved",
+                start_ip="10.0.0.10",
+                end_ip="10.0.0.20",
+                comment="servers",
+            ),
+        )
+
+    def test_unknown_subnet(self, create_module, client):
+        module = create_module(params=get_params(subnet="wan"))
+        mock_lists(client, [])
+
+        with pytest.raises(errors.MaasError, match="Can not find matching"):
+            subnet_ip_range.ensure_present(
+                module, client, CollectionLoader(client)
+            )
+
+
+class TestEnsureAbsent:
+    def test_delete(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [ip_range(8, SUBNETS[1]), ip_range(9, SUBNETS[0])])
+
+        changed, record, diff = subnet_ip_range.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is True
+        assert diff == dict(before=ip_range(9, SUBNETS[0]), after={})
+        client.delete.assert_called_once_with("/api/2.0/ipranges//9/")
+
+    def test_already_absent(self, create_module, client):
+        module = create_module(params=get_params(state="absent"))
+        mock_lists(client, [ip_range(8, SUBNETS[1])])
+
+        changed, record, diff = subnet_ip_range.ensure_absent(
+            module, client, CollectionLoader(client)
+        )
+
+        assert changed is False
+        client.delete.assert_not_called()
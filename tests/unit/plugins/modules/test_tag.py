@@ -62,6 +62,33 @@ class TestMain:
             "diff": {"before": {}, "after": {}},
         }
 
+    def test_collect_metrics(self, run_main):
+        params = dict(
+            cluster_instance=dict(
+                host="https://my.host.name",
+                customer_key="client key",
+                token_key="token key",
+                token_secret="token secret",
+                collect_metrics=True,
+            ),
+            machines=[],
+            name="this_name",
+            state="present",
+        )
+
+        success, results = run_main(tag, params)
+        assert success is True
+        assert results["maas_metrics"] == {
+            "requests": [],
+            "totals": {
+                "requests": 0,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "bytes_uncompressed": 0,
+                "time": 0,
+            },
+        }
+
 
 class TestRun:
     def test_run_with_present(self, create_module, client, mocker):
@@ -141,7 +168,6 @@ class TestEnsure:
             )
         )
         machine_obj_list = ["this_machine", "that_machine"]
-        before = []
         after = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.get_id_from_fqdn"
@@ -154,7 +180,7 @@ class TestEnsure:
         ).return_value = None
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.add_tag_to_machine"
-        ).return_value = (before, after)
+        ).return_value = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.get_after"
         ).return_value = after
@@ -176,7 +202,6 @@ class TestEnsure:
             )
         )
         machine_obj_list = ["this_machine", "that_machine"]
-        before = []
         after = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.get_id_from_fqdn"
@@ -186,7 +211,7 @@ class TestEnsure:
         ).return_value = {"name": "this_tag"}
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.remove_tag_from_machine"
-        ).return_value = (before, after)
+        ).return_value = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.get_after"
         ).return_value = after
@@ -238,7 +263,6 @@ class TestEnsure:
             )
         )
         machine_obj_list = ["this_machine", "that_machine"]
-        before = []
         after = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.get_id_from_fqdn"
@@ -254,16 +278,55 @@ class TestEnsure:
         ).return_value = after
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.add_tag_to_machine"
-        ).return_value = (before, after)
+        ).return_value = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.remove_unnecessary_tag_after_set"
-        ).return_value = (before, after)
+        ).return_value = []
         mocker.patch(
             "ansible_collections.maas.maas.plugins.modules.tag.get_after"
         ).return_value = after
         results = tag.ensure_set(module, client)
         assert results == (False, [], {"before": [], "after": []})
 
+    def test_ensure_set_sends_single_request(
+        self, create_module, client, mocker
+    ):
+        module = create_module(
+            params=dict(
+                instance=dict(
+                    host="https://0.0.0.0",
+                    customer_key="client key",
+                    token_key="token key",
+                    token_secret="token secret",
+                ),
+                state="set",
+                name="this_tag",
+                machines=["one", "two"],
+            )
+        )
+        one = Machine(fqdn="one", id="id1", tags=[])
+        two = Machine(fqdn="two", id="id2", tags=["this_tag"])
+        three = Machine(fqdn="three", id="id3", tags=["this_tag"])
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.get_id_from_fqdn"
+        ).return_value = [one, two]
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.machine.Machine.get_by_tag"
+        ).return_value = [two, three]
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.tag.Tag.get_tag_by_name"
+        ).return_value = {"name": "this_tag"}
+        send = mocker.patch(
+            "ansible_collections.maas.maas.plugins.module_utils.tag.Tag.send_update_nodes_request"
+        )
+        mocker.patch(
+            "ansible_collections.maas.maas.plugins.modules.tag.get_after"
+        ).return_value = []
+        tag.ensure_set(module, client)
+        send.assert_called_once_with(
+            client, "this_tag", add=["id1"], remove=["id3"]
+        )
+
 
 class TestUtils:
     def test_get_after_when_after(self, client, mocker):
@@ -324,7 +387,7 @@ class TestUtils:
         results = tag.create_tag(client, module, existing_tag)
         assert results is None
 
-    def test_add_tag_to_machine_when_add(self, create_module, client, mocker):
+    def test_add_tag_to_machine_when_add(self, create_module):
         module = create_module(
             params=dict(
                 instance=dict(
@@ -342,17 +405,12 @@ class TestUtils:
         after = ["this"]
         machine1 = Machine(fqdn="one", tags=["first", "second"])
         machine2 = Machine(fqdn="two", tags=["first", "second", "this_tag"])
-        mocker.patch(
-            "ansible_collections.maas.maas.plugins.module_utils.tag.Tag.send_tag_request"
-        ).return_value = None
         machine_list = [machine1, machine2]
-        after.append(machine1.fqdn)
-        results = tag.add_tag_to_machine(
-            client, module, machine_list, before, after
-        )
-        assert results == (before, after)
+        results = tag.add_tag_to_machine(module, machine_list, before, after)
+        assert results == [machine1.id]
+        assert after == ["this", machine1.fqdn]
 
-    def test_add_tag_to_machine_when_no_add(self, create_module, client):
+    def test_add_tag_to_machine_when_no_add(self, create_module):
         module = create_module(
             params=dict(
                 instance=dict(
@@ -369,14 +427,11 @@ class TestUtils:
         before = ["this"]
         after = ["this"]
         machine_list = []
-        results = tag.add_tag_to_machine(
-            client, module, machine_list, before, after
-        )
-        assert results == (before, after)
+        results = tag.add_tag_to_machine(module, machine_list, before, after)
+        assert results == []
+        assert (before, after) == (["this"], ["this"])
 
-    def test_remove_tag_from_machine_when_remove(
-        self, create_module, client, mocker
-    ):
+    def test_remove_tag_from_machine_when_remove(self, create_module):
         module = create_module(
             params=dict(
                 instance=dict(
@@ -397,19 +452,13 @@ class TestUtils:
             fqdn="two", id=456, tags=["first", "second", "this_tag"]
         )
         machine_list = [machine1, machine2]
-        existing_tag = {"name": "this_tag"}
-        after.append(machine2.fqdn)
-        mocker.patch(
-            "ansible_collections.maas.maas.plugins.module_utils.tag.Tag.send_untag_request"
-        ).return_value = None
         results = tag.remove_tag_from_machine(
-            client, module, machine_list, existing_tag, before, after
+            module, machine_list, before, after
         )
-        assert results == (before, after)
+        assert results == [456]
+        assert after == ["this", machine2.fqdn]
 
-    def test_remove_tag_from_machine_when_no_remove(
-        self, create_module, client
-    ):
+    def test_remove_tag_from_machine_when_no_remove(self, create_module):
         module = create_module(
             params=dict(
                 instance=dict(
@@ -426,15 +475,13 @@ class TestUtils:
         before = ["this"]
         after = ["this"]
         machine_list = []
-        existing_tag = {"name": "this_tag"}
         results = tag.remove_tag_from_machine(
-            client, module, machine_list, existing_tag, before, after
+            module, machine_list, before, after
         )
-        assert results == (before, after)
+        assert results == []
+        assert (before, after) == (["this"], ["this"])
 
-    def test_remove_unnecessary_tag_after_set_when_remove(
-        self, create_module, client, mocker
-    ):
+    def test_remove_unnecessary_tag_after_set_when_remove(self, create_module):
         module = create_module(
             params=dict(
                 instance=dict(
@@ -448,36 +495,31 @@ class TestUtils:
                 machines=["this_machine", "that_machine"],
             )
         )
-        existing_tag = {"name": "this_tag"}
         machine1_ansible = Machine(
             fqdn="one", tags=["first", "second", "this_tag"]
         )
         machine_list_from_ansible = [machine1_ansible]
         machine1_maas = Machine(
-            fqdn="one", tags=["first", "second", "this_tag"]
+            fqdn="one", id="id1", tags=["first", "second", "this_tag"]
         )
         machine2_maas = Machine(
-            fqdn="two", tags=["first", "second", "this_tag"]
+            fqdn="two", id="id2", tags=["first", "second", "this_tag"]
         )
         machine_list_from_maas = [machine1_maas, machine2_maas]
         before = ["this"]
         after = ["this"]
-        mocker.patch(
-            "ansible_collections.maas.maas.plugins.modules.tag.remove_tag_from_machine"
-        ).return_value = (before, after)
         results = tag.remove_unnecessary_tag_after_set(
-            client,
             module,
-            existing_tag,
             machine_list_from_ansible,
             machine_list_from_maas,
             before,
             after,
         )
-        assert results == (before, after)
+        assert results == ["id2"]
+        assert after == ["this", "two"]
 
     def test_remove_unnecessary_tag_after_set_when_no_remove(
-        self, create_module, client, mocker
+        self, create_module
     ):
         module = create_module(
             params=dict(
@@ -492,7 +534,6 @@ class TestUtils:
                 machines=["this_machine", "that_machine"],
             )
         )
-        existing_tag = {"name": "this_tag"}
         machine1_ansible = Machine(
             fqdn="one", tags=["first", "second", "this_tag"]
         )
@@ -500,16 +541,11 @@ class TestUtils:
         machine_list_from_maas = []
         before = ["this"]
         after = ["this"]
-        mocker.patch(
-            "ansible_collections.maas.maas.plugins.modules.tag.remove_tag_from_machine"
-        ).return_value = (before, after)
         results = tag.remove_unnecessary_tag_after_set(
-            client,
             module,
-            existing_tag,
             machine_list_from_ansible,
             machine_list_from_maas,
             before,
             after,
         )
-        assert results == (before, after)
+        assert results == []